@@ -0,0 +1,1432 @@
+"""Reproducible extraction benchmarks for CorpusAid-PDF.
+
+Generates a deterministic synthetic corpus with PyMuPDF, runs both extraction
+modes and every output format over it, and stores pages/sec, peak RSS and
+per-stage timings as JSON. Everything runs offline.
+
+    python benchmark.py generate --corpus bench_corpus
+    python benchmark.py run --corpus bench_corpus --results results.json
+    python benchmark.py normalize --corpus bench_corpus
+    python benchmark.py compression --corpus bench_corpus
+    python benchmark.py service --corpus bench_corpus --jobs 200 --concurrency 8
+    python benchmark.py incremental --corpus bench_corpus
+    python benchmark.py scheduler --corpus bench_corpus
+    python benchmark.py pipeline --corpus bench_corpus --shares local 5:100 30:12
+    python benchmark.py near-duplicates --documents 100000 --thresholds 0.7 0.8 0.9
+    python benchmark.py soak --corpus bench_corpus --hours 24
+    python benchmark.py compare baseline.json results.json --threshold 10
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import re
+import resource
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz
+
+import pdf_convert
+
+WORDS_SEED = 20240601
+PAGE_RECT = fitz.paper_rect("a4")
+BODY_FONT = fitz.Font("tiro")
+MARGIN = 50
+
+# name -> (kind, columns, pages)
+CORPUS_PROFILES = {
+    "quick": [
+        ("cols1_p1", "text", 1, 1),
+        ("cols1_p20", "text", 1, 20),
+        ("cols2_p20", "text", 2, 20),
+        ("cols3_p20", "text", 3, 20),
+        ("supsub_p10", "supsub", 2, 10),
+        ("images_p10", "images", 1, 10),
+        ("cols2_p200", "text", 2, 200),
+        ("scanned_p40", "scanned", 1, 40),
+        ("article_p20", "article", 2, 20),
+    ],
+}
+CORPUS_PROFILES["full"] = CORPUS_PROFILES["quick"] + [
+    ("cols1_p1000", "text", 1, 1000),
+    ("cols3_p1000", "text", 3, 1000),
+    ("supsub_p200", "supsub", 2, 200),
+    ("images_p200", "images", 2, 200),
+    ("cols2_p5000", "text", 2, 5000),
+]
+
+MODES = ["Column-aware", "Layout-preserved"]
+FORMATS = ["TXT", "HTML", "Markdown", "DOCX"]
+FIRST_TEXT_TARGET_MS = 1000  # the viewer should show text within a second of a document starting
+
+
+def make_vocabulary(rng, size=2000):
+    letters = "etaoinshrdlcumwfgypbvkjxqz"
+    weights = [26 - i for i in range(len(letters))]
+    return ["".join(rng.choices(letters, weights, k=rng.randint(2, 11))) for _ in range(size)]
+
+
+def make_paragraph(rng, vocabulary, words):
+    text = " ".join(rng.choice(vocabulary) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def column_rects(columns):
+    gutter = 20
+    width = (PAGE_RECT.width - 2 * MARGIN - gutter * (columns - 1)) / columns
+    return [
+        fitz.Rect(MARGIN + i * (width + gutter), MARGIN + 30, MARGIN + i * (width + gutter) + width, PAGE_RECT.height - MARGIN - 20)
+        for i in range(columns)
+    ]
+
+
+def add_running_header(page, page_num, title):
+    page.insert_text((MARGIN, MARGIN), title, fontsize=9)
+    page.insert_text((PAGE_RECT.width / 2, PAGE_RECT.height - MARGIN + 10), str(page_num + 1), fontsize=9)
+
+
+_word_widths = {}
+
+
+def fill_textbox(page, rect, text, fontsize=9):
+    """Greedy word wrap with cached word widths; overflowing lines are dropped."""
+    space = BODY_FONT.text_length(" ", fontsize)
+    line_height = fontsize * 1.2
+    max_lines = int(rect.height // line_height)
+    lines = []
+    for paragraph in text.split("\n"):
+        line, width = [], 0.0
+        for word in paragraph.split():
+            key = (word, fontsize)
+            word_width = _word_widths.get(key)
+            if word_width is None:
+                word_width = _word_widths[key] = BODY_FONT.text_length(word, fontsize)
+            if line and width + space + word_width > rect.width:
+                lines.append(" ".join(line))
+                line, width = [], 0.0
+            width += (space if line else 0) + word_width
+            line.append(word)
+        if line:
+            lines.append(" ".join(line))
+        if len(lines) >= max_lines:
+            break
+    if lines:
+        page.insert_text((rect.x0, rect.y0 + fontsize), lines[:max_lines], fontsize=fontsize, fontname="tiro", lineheight=1.2)
+
+
+def fill_text_page(page, rng, vocabulary, columns):
+    for rect in column_rects(columns):
+        text = "\n".join(make_paragraph(rng, vocabulary, rng.randint(40, 90)) for _ in range(8))
+        fill_textbox(page, rect, text)
+
+
+def fill_supsub_page(page, rng, vocabulary, columns):
+    for rect in column_rects(columns):
+        paragraphs = []
+        for _ in range(4):
+            words = [rng.choice(vocabulary) for _ in range(rng.randint(30, 60))]
+            for _ in range(6):
+                position = rng.randrange(len(words))
+                if rng.random() < 0.5:
+                    words[position] += f"<sup>{rng.randint(1, 99)}</sup>"
+                else:
+                    words[position] += f"<sub>{rng.randint(0, 9)}</sub>"
+            paragraphs.append(f"<p>{' '.join(words)}.</p>")
+        page.insert_htmlbox(rect, "".join(paragraphs), css="* {font-size: 9px; font-family: serif;}")
+
+
+def make_image(rng, width=320, height=200):
+    # Blocky noise compresses realistically, unlike pure random bytes
+    block = 8
+    row_blocks = []
+    for _ in range(height // block):
+        row = bytearray()
+        for _ in range(width // block):
+            row += bytes(rng.randrange(256) for _ in range(3)) * block
+        row_blocks.append(bytes(row) * block)
+    pix = fitz.Pixmap(fitz.csRGB, width, height, b"".join(row_blocks), 0)
+    return pix.tobytes("png")
+
+
+def fill_images_page(page, rng, vocabulary, columns):
+    rects = column_rects(columns)
+    for rect in rects:
+        image_height = rect.height / 3 - 20
+        for slot in range(2):
+            top = rect.y0 + slot * (image_height + 60)
+            page.insert_image(fitz.Rect(rect.x0, top, rect.x1, top + image_height), stream=make_image(rng))
+            caption = fitz.Rect(rect.x0, top + image_height + 5, rect.x1, top + image_height + 55)
+            fill_textbox(page, caption, make_paragraph(rng, vocabulary, 20), fontsize=8)
+        text_rect = fitz.Rect(rect.x0, rect.y0 + 2 * (image_height + 60), rect.x1, rect.y1)
+        fill_textbox(page, text_rect, make_paragraph(rng, vocabulary, 120))
+
+
+def article_regions(page_num, columns):
+    """Text regions in reading order: a full-width title and abstract above the columns on the first page."""
+    rects = column_rects(columns)
+    if page_num:
+        return rects
+    title = fitz.Rect(MARGIN, MARGIN + 30, PAGE_RECT.width - MARGIN, MARGIN + 70)
+    abstract = fitz.Rect(MARGIN, title.y1 + 10, PAGE_RECT.width - MARGIN, title.y1 + 130)
+    return [title, abstract] + [fitz.Rect(rect.x0, abstract.y1 + 20, rect.x1, rect.y1) for rect in rects]
+
+
+def fill_article_page(page, rng, vocabulary, columns):
+    regions = article_regions(page.number, columns)
+    if page.number == 0:
+        fill_textbox(page, regions[0], make_paragraph(rng, vocabulary, 10), fontsize=16)
+        fill_textbox(page, regions[1], make_paragraph(rng, vocabulary, 150), fontsize=10)
+        regions = regions[2:]
+    for rect in regions:
+        fill_textbox(page, rect, "\n".join(make_paragraph(rng, vocabulary, rng.randint(40, 90)) for _ in range(8)))
+
+
+def reading_order_regions(kind, columns, page_num):
+    if kind == "article":
+        return article_regions(page_num, columns)
+    return column_rects(columns)
+
+
+def fill_scanned_page(page, rng, vocabulary, columns):
+    # Mixed archive: half the pages are bare scans, a quarter are blank separator sheets
+    roll = rng.random()
+    if roll < 0.5:
+        page.insert_image(page.rect, stream=make_image(rng, 480, 680))
+    elif roll < 0.75:
+        fill_text_page(page, rng, vocabulary, columns)
+
+
+PAGE_FILLERS = {
+    "text": fill_text_page,
+    "supsub": fill_supsub_page,
+    "images": fill_images_page,
+    "scanned": fill_scanned_page,
+    "article": fill_article_page,
+}
+
+
+def generate_document(path, kind, columns, pages, seed):
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(random.Random(WORDS_SEED))
+    title = f"Synthetic Journal of Benchmarks - {kind} ({columns} col)"
+    doc = fitz.open()
+    filler = PAGE_FILLERS[kind]
+    for page_num in range(pages):
+        page = doc.new_page(width=PAGE_RECT.width, height=PAGE_RECT.height)
+        if kind != "scanned":
+            add_running_header(page, page_num, title)
+        filler(page, rng, vocabulary, columns)
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+
+
+def generate_corpus(corpus_dir, profile):
+    os.makedirs(corpus_dir, exist_ok=True)
+    paths = []
+    for index, (name, kind, columns, pages) in enumerate(CORPUS_PROFILES[profile]):
+        path = os.path.join(corpus_dir, f"{name}.pdf")
+        if not os.path.exists(path):
+            start = time.perf_counter()
+            generate_document(path, kind, columns, pages, seed=index)
+            print(f"generated {name}.pdf ({pages} pages) in {time.perf_counter() - start:.1f} s")
+        paths.append(path)
+    return paths
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def current_rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except OSError:
+        return peak_rss_mb()
+
+
+def run_case(pdf_path, mode, output_format, log_mode="off", instrument=True):
+    """Runs one document through the engine in a fresh worker process."""
+    if log_mode == "queue":
+        log_dir = tempfile.mkdtemp(prefix="bench-log-")
+        pdf_convert.setup_logging(os.path.join(log_dir, "bench.log"), console_level=logging.CRITICAL)
+    else:
+        logging.disable(logging.CRITICAL)
+    output_dir = tempfile.mkdtemp(prefix="bench-out-")
+    try:
+        rss_start = current_rss_mb()
+        recorder = pdf_convert.PerformanceRecorder(enabled=instrument)
+        engine = pdf_convert.ExtractionEngine(output_dir, mode, output_format, recorder, use_cache=False)
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        result = engine.process_document(pdf_path)
+        output_file = result["output_file"]
+        # The output is written on the writer thread; the case ends once it is on disk
+        errors = engine.close()
+        elapsed = time.perf_counter() - start
+        cpu_seconds = time.process_time() - cpu_start
+        if errors:
+            raise RuntimeError(f"Writing {output_file} failed: {errors[0][2]}")
+        recorder.end_batch()
+        report = recorder.to_dict()
+        pages = result["selected_pages"]
+        return {
+            "document": os.path.basename(pdf_path),
+            "mode": mode,
+            "format": output_format,
+            "logging": log_mode,
+            "instrumented": instrument,
+            "pages": pages,
+            "seconds": elapsed,
+            "cpu_seconds": cpu_seconds,
+            "pages_per_sec": pages / elapsed if elapsed > 0 else 0.0,
+            "rss_start_mb": rss_start,
+            "peak_rss_mb": peak_rss_mb(),
+            "rss_end_mb": current_rss_mb(),
+            "output_bytes": os.path.getsize(output_file),
+            "first_text_ms": report["documents"][0]["first_text_ms"] if report["documents"] else None,
+            "stages_ms": {name: stats["total_ms"] for name, stats in report["stages"].items()},
+            "events": sum(stats["count"] for stats in report["stages"].values()),
+        }
+    finally:
+        if log_mode == "queue":
+            pdf_convert.shutdown_logging()
+            shutil.rmtree(log_dir, ignore_errors=True)
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+
+def stage_cost_ns(samples=200000):
+    """Mean cost of recording one stage, timed in a tight loop where machine noise averages out."""
+    recorder = pdf_convert.PerformanceRecorder(max_events=samples)
+    recorder.begin_document("sample")
+    start = time.perf_counter_ns()
+    for _ in range(samples):
+        with recorder.stage("sample"):
+            pass
+    return (time.perf_counter_ns() - start) / samples
+
+
+def run_isolated(*args):
+    # One process per case so peak RSS belongs to that case alone
+    with ProcessPoolExecutor(max_workers=1, mp_context=pdf_convert.MP_CONTEXT) as executor:
+        return executor.submit(run_case, *args).result()
+
+
+def best_of(repeat, *args):
+    runs = [run_isolated(*args) for _ in range(repeat)]
+    best = max(runs, key=lambda result: result["pages_per_sec"])
+    best["repeat"] = repeat
+    return best
+
+
+def command_generate(args):
+    generate_corpus(args.corpus, args.profile)
+
+
+def command_run(args):
+    paths = generate_corpus(args.corpus, args.profile)
+    if args.documents:
+        paths = [path for path in paths if os.path.splitext(os.path.basename(path))[0] in args.documents]
+    results = []
+    for path in paths:
+        for mode in args.modes:
+            for output_format in args.formats:
+                result = best_of(args.repeat, path, mode, output_format)
+                results.append(result)
+                print(
+                    f"{result['document']:<18}{mode:<18}{output_format:<10}"
+                    f"{result['pages_per_sec']:>9.1f} pages/s{result['peak_rss_mb']:>9.1f} MB peak"
+                    f"{result['first_text_ms'] or 0:>8.0f} ms to first text"
+                )
+    logging_overhead = []
+    if not args.skip_logging and paths:
+        # Logging overhead: the same document with the root logger silenced vs. the queue pipeline at DEBUG
+        page_counts = {spec[0]: spec[3] for spec in CORPUS_PROFILES[args.profile]}
+        sample = max(paths, key=lambda path: page_counts.get(os.path.splitext(os.path.basename(path))[0], 0))
+        repeat = max(args.repeat, 3)
+        for mode in args.modes:
+            silent = best_of(repeat, sample, mode, "TXT", "off")
+            logged = best_of(repeat, sample, mode, "TXT", "queue")
+            overhead = (silent["pages_per_sec"] / logged["pages_per_sec"] - 1) * 100 if logged["pages_per_sec"] else 0.0
+            logging_overhead.append({
+                "document": silent["document"],
+                "mode": mode,
+                "silent_pages_per_sec": silent["pages_per_sec"],
+                "logged_pages_per_sec": logged["pages_per_sec"],
+                "overhead_pct": overhead,
+            })
+            print(f"logging overhead {silent['document']} {mode}: {overhead:+.1f}%")
+    instrumentation_overhead = []
+    if not args.skip_instrumentation and paths:
+        # Instrumentation overhead: the largest document with the recorder disabled vs. recording every stage.
+        # Runs alternate so drift on the machine hits both sides, and CPU time is compared since it is steadier than wall time
+        page_counts = {spec[0]: spec[3] for spec in CORPUS_PROFILES[args.profile]}
+        sample = max(paths, key=lambda path: page_counts.get(os.path.splitext(os.path.basename(path))[0], 0))
+        repeat = max(args.repeat, 5)
+        cost_ns = stage_cost_ns()
+        print(f"recording one stage costs {cost_ns:.0f} ns")
+        for mode in args.modes:
+            runs = {False: [], True: []}
+            for _ in range(repeat):
+                for instrument in (False, True):
+                    runs[instrument].append(run_isolated(sample, mode, "TXT", "off", instrument))
+            bare = min(runs[False], key=lambda result: result["cpu_seconds"])
+            recorded = min(runs[True], key=lambda result: result["cpu_seconds"])
+            overhead = (recorded["cpu_seconds"] / bare["cpu_seconds"] - 1) * 100 if bare["cpu_seconds"] else 0.0
+            instrumentation_overhead.append({
+                "document": bare["document"],
+                "mode": mode,
+                "repeat": repeat,
+                "disabled_cpu_seconds": bare["cpu_seconds"],
+                "enabled_cpu_seconds": recorded["cpu_seconds"],
+                "disabled_pages_per_sec": max(result["pages_per_sec"] for result in runs[False]),
+                "enabled_pages_per_sec": max(result["pages_per_sec"] for result in runs[True]),
+                "overhead_pct": overhead,
+                # What the recorded events cost at the measured price per stage; the figure to hold under 1%
+                "events": recorded["events"],
+                "stage_cost_ns": cost_ns,
+                "estimated_overhead_pct": recorded["events"] * cost_ns / 1e9 / bare["cpu_seconds"] * 100 if bare["cpu_seconds"] else 0.0,
+            })
+            print(
+                f"instrumentation overhead {bare['document']} {mode}: {overhead:+.1f}% measured, "
+                f"{instrumentation_overhead[-1]['estimated_overhead_pct']:.2f}% from {recorded['events']} events"
+            )
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "profile": args.profile,
+            "python": platform.python_version(),
+            "pymupdf": fitz.VersionBind,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+        "logging_overhead": logging_overhead,
+        "instrumentation_overhead": instrumentation_overhead,
+    }
+    with open(args.results, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+    print(f"results written to {args.results}")
+
+
+def reading_order_accuracy(expected, extracted):
+    """Share of the expected word bigrams found in the extracted text; column mix-ups break bigrams."""
+    def bigrams(text):
+        words = re.findall(r"[^\W\d_]+", text.lower())
+        return Counter(zip(words, words[1:]))
+    expected = bigrams(expected)
+    total = sum(expected.values())
+    return sum((expected & bigrams(extracted)).values()) / total if total else 1.0
+
+
+def run_layout_case(pdf_path, kind, columns, reuse, repeat):
+    logging.disable(logging.CRITICAL)
+    doc = fitz.open(pdf_path)
+    expected = [
+        " ".join(page.get_text("text", clip=rect) for rect in reading_order_regions(kind, columns, page.number))
+        for page in doc
+    ]
+    output_dir = tempfile.mkdtemp(prefix="bench-out-")
+    try:
+        best = None
+        for _ in range(repeat):
+            recorder = pdf_convert.PerformanceRecorder()
+            engine = pdf_convert.ExtractionEngine(
+                output_dir, "Column-aware", "TXT", recorder, use_cache=False, layout={"reuse": reuse}
+            )
+            start = time.perf_counter()
+            result = engine.process_document(pdf_path)
+            elapsed = time.perf_counter() - start
+            if best is None or elapsed < best[0]:
+                best = (elapsed, result, recorder.to_dict()["stages"])
+        elapsed, result, stages = best
+        extracted = dict(result["page_texts"])
+        accuracy = sum(reading_order_accuracy(text, extracted.get(page_num, "")) for page_num, text in enumerate(expected))
+        return {
+            "document": os.path.basename(pdf_path),
+            "reuse": reuse,
+            "pages": result["page_count"],
+            "pages_per_sec": result["page_count"] / elapsed if elapsed > 0 else 0.0,
+            "layout_ms": stages.get("layout_analysis", {}).get("total_ms", 0.0),
+            "profiles": result["layout_profiles"],
+            "accuracy": accuracy / len(expected) if expected else 1.0,
+        }
+    finally:
+        doc.close()
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+
+def command_layout(args):
+    paths = generate_corpus(args.corpus, args.profile)
+    specs = {spec[0]: spec for spec in CORPUS_PROFILES[args.profile]}
+    results = []
+    for path in paths:
+        name, kind, columns, _ = specs[os.path.splitext(os.path.basename(path))[0]]
+        if kind == "scanned":
+            continue
+        for reuse in (True, False):
+            with ProcessPoolExecutor(max_workers=1, mp_context=pdf_convert.MP_CONTEXT) as executor:
+                result = executor.submit(run_layout_case, path, kind, columns, reuse, args.repeat).result()
+            results.append(result)
+            print(
+                f"{result['document']:<18}{'profile reuse' if reuse else 'full analysis':<15}"
+                f"{result['pages_per_sec']:>9.1f} pages/s{result['layout_ms']:>9.1f} ms layout"
+                f"{result.get('profiles', {}).get('reused', 0):>6} reused  accuracy {result['accuracy']:.4f}"
+            )
+    with open(args.results, "w", encoding="utf-8") as f:
+        json.dump({"results": results}, f, indent=1)
+    print(f"results written to {args.results}")
+
+
+def soil_text(text, rng):
+    """Breaks long words across lines with hyphens and swaps in ligatures, as typeset PDFs do."""
+    words = text.split(" ")
+    for index, word in enumerate(words):
+        if len(word) >= 6 and word.isalpha() and rng.random() < 0.15:
+            cut = rng.randint(2, len(word) - 2)
+            words[index] = word[:cut] + rng.choice(["- ", "-\n"]) + word[cut:]
+    return " ".join(words).replace("fi", "\ufb01").replace("fl", "\ufb02")
+
+
+def run_normalize_case(pdf_path, mode, repeat):
+    logging.disable(logging.CRITICAL)
+    output_dir = tempfile.mkdtemp(prefix="bench-out-")
+    try:
+        timings = {}
+        page_texts = None
+        for normalize in (None, pdf_convert.TextNormalizer.DEFAULTS):
+            best = None
+            for _ in range(repeat):
+                recorder = pdf_convert.PerformanceRecorder()
+                engine = pdf_convert.ExtractionEngine(output_dir, mode, "TXT", recorder, use_cache=False, normalize=normalize)
+                start = time.perf_counter()
+                result = engine.process_document(pdf_path)
+                elapsed = time.perf_counter() - start
+                if best is None or elapsed < best[0]:
+                    best = (elapsed, recorder.to_dict()["stages"].get("normalize", {}).get("total_ms", 0.0))
+                if normalize is None:
+                    page_texts = [text for _, text in result["page_texts"]]
+            timings["on" if normalize else "off"] = best
+        # The normalizer alone, on page texts soiled with line-end hyphens and ligatures
+        rng = random.Random(WORDS_SEED)
+        soiled = [soil_text(text, rng) for text in page_texts]
+        normalizer = pdf_convert.TextNormalizer()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            cleaned = [normalizer.normalize(text) for text in soiled]
+        alone = (time.perf_counter() - start) / repeat
+        # Typeset corpus pages (supsub) already carry ligatures, so the reference spells them out
+        ligatures = str.maketrans(pdf_convert.TextNormalizer.LIGATURES)
+        reference = [text.translate(ligatures) for text in page_texts]
+        accuracy = lambda texts: sum(map(reading_order_accuracy, reference, texts)) / len(reference) if reference else 1.0
+        pages = len(page_texts)
+        return {
+            "document": os.path.basename(pdf_path),
+            "mode": mode,
+            "pages": pages,
+            "pages_per_sec_off": pages / timings["off"][0] if timings["off"][0] > 0 else 0.0,
+            "pages_per_sec_on": pages / timings["on"][0] if timings["on"][0] > 0 else 0.0,
+            "normalize_ms": timings["on"][1],
+            "normalizer_pages_per_sec": pages / alone if alone > 0 else 0.0,
+            "soiled_accuracy": accuracy(soiled),
+            "normalized_accuracy": accuracy(cleaned),
+        }
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+
+def command_normalize(args):
+    paths = generate_corpus(args.corpus, args.profile)
+    results = []
+    for path in paths:
+        for mode in args.modes:
+            with ProcessPoolExecutor(max_workers=1, mp_context=pdf_convert.MP_CONTEXT) as executor:
+                result = executor.submit(run_normalize_case, path, mode, args.repeat).result()
+            if not result["pages"]:
+                continue
+            results.append(result)
+            print(
+                f"{result['document']:<18}{mode:<18}{result['pages_per_sec_off']:>8.1f} -> {result['pages_per_sec_on']:>8.1f} pages/s"
+                f"{result['normalizer_pages_per_sec']:>10.0f} pages/s alone"
+                f"  accuracy {result['soiled_accuracy']:.3f} -> {result['normalized_accuracy']:.3f}"
+            )
+    with open(args.results, "w", encoding="utf-8") as f:
+        json.dump({"results": results}, f, indent=1)
+    print(f"results written to {args.results}")
+
+
+def run_compression_case(paths, mode, compression, repeat):
+    """Extracts the corpus as one batch, so solid archives and the background writer see a realistic stream."""
+    logging.disable(logging.CRITICAL)
+    best = None
+    for _ in range(repeat):
+        output_dir = tempfile.mkdtemp(prefix="bench-out-")
+        try:
+            recorder = pdf_convert.PerformanceRecorder()
+            engine = pdf_convert.ExtractionEngine(output_dir, mode, "TXT", recorder, use_cache=False, compression=compression)
+            start = time.perf_counter()
+            pages = sum(engine.process_document(path)["selected_pages"] for path in paths)
+            errors = engine.close()
+            elapsed = time.perf_counter() - start
+            if errors:
+                raise RuntimeError(errors[0][2])
+            stats = engine.writer.stats
+            if best is None or elapsed < best["seconds"]:
+                best = {
+                    "mode": mode,
+                    "compression": compression["method"] if compression else "none",
+                    "archive": bool(compression and compression["archive"]),
+                    "pages": pages,
+                    "seconds": elapsed,
+                    "pages_per_sec": pages / elapsed if elapsed > 0 else 0.0,
+                    "raw_bytes": stats["raw_bytes"],
+                    "written_bytes": stats["written_bytes"],
+                    "ratio": stats["raw_bytes"] / stats["written_bytes"] if stats["written_bytes"] else 0.0,
+                    "writer_seconds": stats["seconds"],
+                    "writer_mb_per_sec": stats["raw_bytes"] / 1e6 / stats["seconds"] if stats["seconds"] > 0 else 0.0,
+                    # Time extraction spent handing outputs to the writer; the writes themselves overlapped with it
+                    "write_queue_ms": recorder.to_dict()["stages"].get("write_queue", {}).get("total_ms", 0.0),
+                }
+        finally:
+            shutil.rmtree(output_dir, ignore_errors=True)
+    return best
+
+
+def command_compression(args):
+    paths = generate_corpus(args.corpus, args.profile)
+    methods = [None, "gzip"]
+    try:
+        pdf_convert.check_compression("zstd")
+        methods.append("zstd")
+    except Exception as e:
+        print(f"skipping zstd: {e}")
+    results = []
+    for mode in args.modes:
+        for method in methods:
+            for archive in ((False, True) if method else (False,)):
+                compression = {"method": method, "level": None, "archive": archive} if method else None
+                with ProcessPoolExecutor(max_workers=1, mp_context=pdf_convert.MP_CONTEXT) as executor:
+                    result = executor.submit(run_compression_case, paths, mode, compression, args.repeat).result()
+                results.append(result)
+                label = f"{result['compression']}{' archive' if archive else ''}"
+                print(
+                    f"{mode:<18}{label:<14}{result['pages_per_sec']:>8.1f} pages/s"
+                    f"{result['written_bytes'] / 1e6:>9.2f} MB  ratio {result['ratio']:>5.2f}"
+                    f"{result['writer_mb_per_sec']:>9.1f} MB/s writer"
+                )
+    with open(args.results, "w", encoding="utf-8") as f:
+        json.dump({"results": results}, f, indent=1)
+    print(f"results written to {args.results}")
+
+
+def run_statistics_case(paths, mode, ngram, repeat):
+    """Counting while extracting vs. extracting and then re-reading every output for the same counts."""
+    logging.disable(logging.CRITICAL)
+    best = None
+    for _ in range(repeat):
+        output_dir = tempfile.mkdtemp(prefix="bench-out-")
+        try:
+            engine = pdf_convert.ExtractionEngine(os.path.join(output_dir, "plain"), mode, "TXT", use_cache=False)
+            start = time.perf_counter()
+            output_files = [engine.process_document(path)["output_file"] for path in paths]
+            engine.close()
+            plain = time.perf_counter() - start
+            start = time.perf_counter()
+            statistics = pdf_convert.CorpusStatistics(ngram=ngram)
+            for output_file in output_files:
+                statistics.begin_document()
+                with open(output_file, encoding="utf-8") as f:
+                    statistics.add_page(f.read())
+                statistics.end_document(output_file)
+            statistics.write(os.path.join(output_dir, "second_pass"))
+            second_pass = time.perf_counter() - start
+
+            engine = pdf_convert.ExtractionEngine(
+                os.path.join(output_dir, "inline"), mode, "TXT", use_cache=False, statistics={"ngram": ngram}
+            )
+            start = time.perf_counter()
+            engine.begin_statistics()
+            pages = sum(engine.process_document(path)["selected_pages"] for path in paths)
+            engine.close()
+            summary = engine.write_statistics()
+            inline = time.perf_counter() - start
+            stage_ms = engine.recorder.to_dict()["stages"].get("statistics", {}).get("total_ms", 0.0)
+            if best is None or inline < best["inline_seconds"]:
+                best = {
+                    "mode": mode,
+                    "ngram": ngram,
+                    "pages": pages,
+                    "extract_seconds": plain,
+                    "second_pass_seconds": second_pass,
+                    "inline_seconds": inline,
+                    "statistics_stage_ms": stage_ms,
+                    "saved_pct": (1 - inline / (plain + second_pass)) * 100 if plain + second_pass > 0 else 0.0,
+                    "summary": summary,
+                }
+        finally:
+            shutil.rmtree(output_dir, ignore_errors=True)
+    return best
+
+
+def command_statistics(args):
+    paths = generate_corpus(args.corpus, args.profile)
+    results = []
+    for mode in args.modes:
+        for ngram in args.ngrams:
+            with ProcessPoolExecutor(max_workers=1, mp_context=pdf_convert.MP_CONTEXT) as executor:
+                result = executor.submit(run_statistics_case, paths, mode, ngram, args.repeat).result()
+            results.append(result)
+            print(
+                f"{mode:<18}{ngram}-grams  extract {result['extract_seconds']:.2f} s + second pass "
+                f"{result['second_pass_seconds']:.2f} s vs. inline {result['inline_seconds']:.2f} s "
+                f"({result['saved_pct']:+.1f}% saved)"
+            )
+    with open(args.results, "w", encoding="utf-8") as f:
+        json.dump({"results": results}, f, indent=1)
+    print(f"results written to {args.results}")
+
+
+def rss_slope(samples):
+    """Least-squares growth of RSS in MB per hour over (seconds, MB) samples."""
+    if len(samples) < 2:
+        return 0.0
+    mean_t = sum(t for t, _ in samples) / len(samples)
+    mean_r = sum(r for _, r in samples) / len(samples)
+    variance = sum((t - mean_t) ** 2 for t, _ in samples)
+    if variance == 0:
+        return 0.0
+    return sum((t - mean_t) * (r - mean_r) for t, r in samples) / variance * 3600
+
+
+def run_soak_case(paths, mode, governed, seconds):
+    """Extracts the corpus over and over in one engine, as a GUI session would, sampling RSS after every pass."""
+    logging.disable(logging.CRITICAL)
+    output_dir = tempfile.mkdtemp(prefix="bench-out-")
+    try:
+        # An infinite trim threshold leaves MuPDF's store alone after the first document
+        memory = None if governed else {"trim_mb": float("inf")}
+        engine = pdf_convert.ExtractionEngine(
+            output_dir, mode, "TXT", pdf_convert.PerformanceRecorder(enabled=False), use_cache=False, memory=memory
+        )
+        samples = []
+        documents = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            for path in paths:
+                engine.process_document(path)
+                documents += 1
+            samples.append((time.perf_counter() - start, current_rss_mb()))
+        engine.close()
+        # The first pass warms up imports and caches, so growth is measured from the second one
+        steady = samples[1:] or samples
+        return {
+            "mode": mode,
+            "governed": governed,
+            "seconds": time.perf_counter() - start,
+            "documents": documents,
+            "passes": len(samples),
+            "rss_first_mb": steady[0][1],
+            "rss_last_mb": steady[-1][1],
+            "rss_peak_mb": peak_rss_mb(),
+            "growth_mb_per_hour": rss_slope(steady),
+            "trims": engine.memory.stats["trims"],
+        }
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+
+def command_soak(args):
+    paths = generate_corpus(args.corpus, args.profile)
+    seconds = args.hours * 3600
+    results = []
+    for governed in (False, True):
+        with ProcessPoolExecutor(max_workers=1, mp_context=pdf_convert.MP_CONTEXT) as executor:
+            result = executor.submit(run_soak_case, paths, args.mode, governed, seconds).result()
+        results.append(result)
+        print(
+            f"{'governed' if governed else 'ungoverned':<12}{result['passes']:>5} passes {result['documents']:>7} documents"
+            f"  RSS {result['rss_first_mb']:>7.1f} -> {result['rss_last_mb']:>7.1f} MB"
+            f"  ({result['growth_mb_per_hour']:+8.1f} MB/h, peak {result['rss_peak_mb']:.1f} MB, {result['trims']} trims)"
+        )
+    with open(args.results, "w", encoding="utf-8") as f:
+        json.dump({"results": results}, f, indent=1)
+    print(f"results written to {args.results}")
+
+
+def run_schedule_case(paths, mode, policy, boosted=None):
+    """Runs a batch through the scheduler; `boosted` is clicked by the "user" as soon as the batch starts."""
+    logging.disable(logging.CRITICAL)
+    output_dir = tempfile.mkdtemp(prefix="bench-out-")
+    try:
+        engine = pdf_convert.ExtractionEngine(output_dir, mode, "TXT", pdf_convert.PerformanceRecorder(), use_cache=False)
+        scheduler = pdf_convert.ExtractionScheduler(paths, policy)
+        scheduler.estimate()
+        if boosted is not None:
+            scheduler.boost(boosted)
+        order = []
+        while True:
+            path = scheduler.next()
+            if path is None:
+                break
+            start = time.perf_counter()
+            engine.process_document(path)
+            scheduler.complete(path, time.perf_counter() - start)
+            order.append(os.path.splitext(os.path.basename(path))[0])
+        scheduler.stop()
+        engine.close()
+        summary = scheduler.summary()
+        waits = sorted(result[0] for result in scheduler.results.values())
+        return {
+            "mode": mode,
+            "policy": policy + ("+boost" if boosted else ""),
+            "documents": summary["documents"],
+            "order": order,
+            "mean_time_to_result": summary["mean_time_to_result"],
+            "median_time_to_result": waits[len(waits) // 2],
+            "file_order_mean_time_to_result": summary["file_order_mean_time_to_result"],
+            "boosted_time_to_result": scheduler.results[boosted][0] if boosted else None,
+            "makespan": waits[-1],
+        }
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+
+def command_scheduler(args):
+    paths = generate_corpus(args.corpus, args.profile)
+    page_counts = {spec[0]: spec[3] for spec in CORPUS_PROFILES[args.profile]}
+    # The case the scheduler is for: the biggest document happens to be first in line
+    paths.sort(key=lambda path: -page_counts.get(os.path.splitext(os.path.basename(path))[0], 0))
+    # The "user" clicks a mid-sized document that shortest-job-first alone would leave until late
+    boosted = paths[1]
+    results = []
+    for mode in args.modes:
+        for policy, boost in (("fifo", None), ("sjf", None), ("sjf", boosted)):
+            with ProcessPoolExecutor(max_workers=1, mp_context=pdf_convert.MP_CONTEXT) as executor:
+                result = executor.submit(run_schedule_case, paths, mode, policy, boost).result()
+            results.append(result)
+            boosted_text = f"  boosted doc {result['boosted_time_to_result']:.2f} s" if boost else ""
+            print(
+                f"{mode:<18}{result['policy']:<11}mean time to result {result['mean_time_to_result']:>7.2f} s"
+                f"  median {result['median_time_to_result']:>6.2f} s  makespan {result['makespan']:>6.2f} s{boosted_text}"
+            )
+    with open(args.results, "w", encoding="utf-8") as f:
+        json.dump({"results": results}, f, indent=1)
+    print(f"results written to {args.results}")
+
+
+def share_delay(share, size):
+    """Sleeps like a read or write of size bytes on a network share: one round trip plus the transfer."""
+    if share is not None:
+        latency, bytes_per_sec = share
+        time.sleep(latency + size / bytes_per_sec)
+
+
+def parse_share(spec):
+    """"local", or LATENCY_MS:MB_PER_SEC for a simulated network share."""
+    if spec == "local":
+        return None
+    latency_ms, _, mb_per_sec = spec.partition(":")
+    return float(latency_ms) / 1000.0, float(mb_per_sec) * 1e6
+
+
+# SlowSharePool class for opening documents as if the corpus sat on a network share
+class SlowSharePool(pdf_convert.DocumentPool):
+    def __init__(self, share):
+        super().__init__()
+        self.share = share
+
+    def open_handle(self, path, signature, data=None):
+        if data is None:
+            share_delay(self.share, signature[0])
+        return super().open_handle(path, signature, data)
+
+
+# SlowShareWriter class for writing outputs as if the output folder sat on a network share
+class SlowShareWriter(pdf_convert.OutputWriter):
+    share = None
+
+    def write(self, file_path, payload):
+        share_delay(self.share, len(payload) if isinstance(payload, str) else 0)
+        super().write(file_path, payload)
+
+
+# SlowShareEngine class for an engine whose outputs go through SlowShareWriter
+class SlowShareEngine(pdf_convert.ExtractionEngine):
+    def __init__(self, share, *args, **kwargs):
+        self.share = share
+        super().__init__(*args, **kwargs)
+
+    def create_writer(self):
+        writer = SlowShareWriter(writers=self.writers, recorder=self.recorder)
+        writer.share = self.share
+        return writer
+
+
+# SlowSharePipeline class for reading documents ahead from a simulated network share
+class SlowSharePipeline(pdf_convert.ExtractionPipeline):
+    def __init__(self, share, *args, **kwargs):
+        self.share = share
+        super().__init__(*args, **kwargs)
+
+    def read(self, pdf_path):
+        share_delay(self.share, os.path.getsize(pdf_path))
+        return super().read(pdf_path)
+
+
+def run_pipeline_case(paths, mode, share, pipeline, repeat):
+    """Extracts the corpus as one batch from and to a simulated share, reading ahead and writing in parallel or not."""
+    logging.disable(logging.CRITICAL)
+    best = None
+    for _ in range(repeat):
+        output_dir = tempfile.mkdtemp(prefix="bench-out-")
+        try:
+            engine = SlowShareEngine(
+                share, output_dir, mode, "TXT", pdf_convert.PerformanceRecorder(), use_cache=False,
+                document_pool=SlowSharePool(share), writers=pipeline["writers"]
+            )
+            runner = pdf_convert.DocumentRunner(engine, retry=False)
+            # File order: the page counts shortest-job-first needs would be one more pass over the share
+            stages = SlowSharePipeline(share, runner, pdf_convert.ExtractionScheduler(paths, "fifo"), **pipeline)
+            start = time.perf_counter()
+            stages.start()
+            pages = 0
+            while True:
+                path, prefetched = stages.next()
+                if path is None:
+                    break
+                result = stages.run(path, prefetched=prefetched)
+                if result is None:
+                    raise RuntimeError(runner.failures[-1]["attempts"][-1]["error"])
+                pages += result["selected_pages"]
+            errors = engine.close()
+            utilization = stages.close()
+            elapsed = time.perf_counter() - start
+            if errors:
+                raise RuntimeError(errors[0][2])
+            if best is None or elapsed < best["seconds"]:
+                best = {
+                    "mode": mode,
+                    "share": "local" if share is None else f"{share[0] * 1000:g}:{share[1] / 1e6:g}",
+                    "prefetch": pipeline["prefetch"],
+                    "readers": pipeline["readers"] if pipeline["prefetch"] else 0,
+                    "writers": pipeline["writers"],
+                    "pages": pages,
+                    "seconds": elapsed,
+                    "pages_per_sec": pages / elapsed if elapsed > 0 else 0.0,
+                    "utilization": utilization["stages"],
+                }
+        finally:
+            shutil.rmtree(output_dir, ignore_errors=True)
+    return best
+
+
+def command_pipeline(args):
+    paths = generate_corpus(args.corpus, args.profile)
+    # Strictly one stage after another, apart from the single background writer the engine always had
+    sequential = {"prefetch": 0, "readers": 1, "writers": 1}
+    pipelined = {"prefetch": args.prefetch, "readers": args.readers, "writers": args.writers}
+    results = []
+    for mode in args.modes:
+        for spec in args.shares:
+            share = parse_share(spec)
+            cases = []
+            for pipeline in (sequential, pipelined):
+                with ProcessPoolExecutor(max_workers=1, mp_context=pdf_convert.MP_CONTEXT) as executor:
+                    result = executor.submit(run_pipeline_case, paths, mode, share, pipeline, args.repeat).result()
+                cases.append(result)
+                busy = "  ".join(f"{name} {stage['busy']:>4.0%}" for name, stage in result["utilization"].items())
+                label = "pipelined" if pipeline["prefetch"] else "sequential"
+                print(
+                    f"{mode:<18}{result['share']:<10}{label:<12}{result['pages_per_sec']:>8.1f} pages/s"
+                    f"{result['seconds']:>8.2f} s  busy: {busy}"
+                )
+            cases[1]["speedup"] = cases[0]["seconds"] / cases[1]["seconds"] if cases[1]["seconds"] > 0 else 0.0
+            print(f"{'':<18}{result['share']:<10}{'speedup':<12}{cases[1]['speedup']:>8.2f}x")
+            results.extend(cases)
+    with open(args.results, "w", encoding="utf-8") as f:
+        json.dump({"results": results}, f, indent=1)
+    print(f"results written to {args.results}")
+
+
+def correct_pages(pdf_path, fraction, seed):
+    """Simulates a corrected edition: stamps a short correction on a fraction of the pages, as an incremental update."""
+    doc = fitz.open(pdf_path)
+    rng = random.Random(seed)
+    changed = sorted(rng.sample(range(doc.page_count), max(1, round(doc.page_count * fraction))))
+    for page_num in changed:
+        doc[page_num].insert_text((MARGIN, PAGE_RECT.height / 2), f"Corrected in edition {seed}", fontsize=7)
+    doc.saveIncr()
+    doc.close()
+    return len(changed)
+
+
+def run_incremental_case(pdf_path, mode, fraction):
+    """Times a cold extraction, then a re-run after correcting some pages, against a cold run of the corrected file."""
+    logging.disable(logging.CRITICAL)
+    work_dir = tempfile.mkdtemp(prefix="bench-incr-")
+    try:
+        edition = os.path.join(work_dir, os.path.basename(pdf_path))
+        shutil.copyfile(pdf_path, edition)
+
+        def extract(output_dir, use_cache=True):
+            os.makedirs(output_dir, exist_ok=True)
+            engine = pdf_convert.ExtractionEngine(output_dir, mode, "TXT", pdf_convert.PerformanceRecorder(), use_cache=use_cache)
+            start = time.perf_counter()
+            result = engine.process_document(edition)
+            engine.close()
+            pdf_convert.DOCUMENT_POOL.discard()
+            with open(result["output_file"], encoding="utf-8") as f:
+                return time.perf_counter() - start, result, f.read()
+
+        output_dir = os.path.join(work_dir, "out")
+        cold_seconds, result, _ = extract(output_dir)
+        changed = correct_pages(edition, fraction, seed=2)
+        rerun_seconds, rerun, text = extract(output_dir)
+        fresh_seconds, _, fresh_text = extract(os.path.join(work_dir, "fresh"), use_cache=False)
+        return {
+            "document": os.path.splitext(os.path.basename(pdf_path))[0],
+            "mode": mode,
+            "pages": result["selected_pages"],
+            "changed_pages": changed,
+            "reextracted_pages": rerun["selected_pages"] - rerun["cached_pages"],
+            "cold_seconds": cold_seconds,
+            "rerun_seconds": rerun_seconds,
+            "fresh_seconds": fresh_seconds,
+            "speedup": fresh_seconds / rerun_seconds if rerun_seconds > 0 else 0.0,
+            "identical": text == fresh_text,
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def command_incremental(args):
+    paths = generate_corpus(args.corpus, args.profile)
+    page_counts = {spec[0]: spec[3] for spec in CORPUS_PROFILES[args.profile]}
+    paths = [path for path in paths if page_counts.get(os.path.splitext(os.path.basename(path))[0], 0) >= 20]
+    results = []
+    for path in paths:
+        for mode in args.modes:
+            for fraction in args.fractions:
+                with ProcessPoolExecutor(max_workers=1, mp_context=pdf_convert.MP_CONTEXT) as executor:
+                    result = executor.submit(run_incremental_case, path, mode, fraction).result()
+                results.append(result)
+                print(
+                    f"{result['document']:<18}{mode:<18}{result['changed_pages']:>5}/{result['pages']:<5} changed"
+                    f"{result['fresh_seconds']:>8.3f} s cold{result['rerun_seconds']:>8.3f} s re-run"
+                    f"{result['speedup']:>7.1f}x  {'identical' if result['identical'] else 'DIFFERS'}"
+                )
+    with open(args.results, "w", encoding="utf-8") as f:
+        json.dump({"results": results}, f, indent=1)
+    print(f"results written to {args.results}")
+
+
+async def http_request(host, port, method, path, payload=None, on_chunk=None):
+    """One request on a fresh connection; returns (status, headers, body) with chunked bodies decoded."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if headers.get("transfer-encoding") != "chunked":
+            return status, headers, await reader.readexactly(int(headers.get("content-length", 0)))
+        chunks = []
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            data = (await reader.readexactly(size + 2))[:-2]
+            if size == 0:
+                return status, headers, b"".join(chunks)
+            if on_chunk is not None:
+                on_chunk(data)
+            chunks.append(data)
+    finally:
+        writer.close()
+
+
+async def run_service_job(host, port, path):
+    """Submits one job and streams its pages; returns (latency, time to first page, rejections, pages)."""
+    start = time.perf_counter()
+    rejected = 0
+    while True:
+        status, headers, body = await http_request(host, port, "POST", "/jobs", {"path": path, "cache": False})
+        if status != 429:
+            break
+        # Backpressure: the queue is full, so come back when the service suggests
+        rejected += 1
+        await asyncio.sleep(min(float(headers.get("retry-after", 1)), 1.0))
+    if status != 202:
+        raise RuntimeError(f"submission failed with {status}: {body[:200]}")
+    job = json.loads(body)
+    first_page = []
+    status, headers, body = await http_request(
+        host, port, "GET", job["pages_url"], on_chunk=lambda data: first_page or first_page.append(time.perf_counter() - start)
+    )
+    final = json.loads(body.rstrip(b"\n").rsplit(b"\n", 1)[-1])
+    if final["status"] != "done":
+        raise RuntimeError(f"job {job['id']} ended as {final['status']}: {final.get('error')}")
+    return time.perf_counter() - start, first_page[0] if first_page else None, rejected, final["pages_done"]
+
+
+async def run_service_load(host, port, paths, jobs, concurrency):
+    """Keeps `concurrency` clients busy until `jobs` jobs have finished."""
+    queue = asyncio.Queue()
+    for index in range(jobs):
+        queue.put_nowait(paths[index % len(paths)])
+    results = []
+
+    async def client():
+        while not queue.empty():
+            results.append(await run_service_job(host, port, queue.get_nowait()))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return time.perf_counter() - start, results
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def synthetic_signature(rng, num_perm, base=None, similarity=1.0):
+    """A signature with the statistics of a real MinHash: each slot agrees with base's with probability similarity."""
+    if base is None:
+        return array("I", [rng.getrandbits(32) for _ in range(num_perm)])
+    return array("I", [value if rng.random() < similarity else rng.getrandbits(32) for value in base])
+
+
+def run_near_duplicate_case(documents, threshold, duplicate_rate, queries, seed):
+    """Ingests documents into one index: a share of them are planted near-duplicates of earlier ones with a known similarity."""
+    rng = random.Random(seed)
+    index = pdf_convert.NearDuplicateIndex(threshold=threshold)
+    num_perm = index.num_perm
+    rss_start = current_rss_mb()
+    check_ns = []
+    found = expected = false_positives = negatives = 0
+    for doc_id in range(documents):
+        similarity = None
+        if index.paths and rng.random() < duplicate_rate:
+            # Drawn across the threshold, so both missed duplicates and false alarms show up
+            similarity = rng.uniform(max(0.0, threshold - 0.3), 1.0)
+            base_id = rng.randrange(len(index.paths))
+            base = index.signatures[base_id * num_perm:(base_id + 1) * num_perm]
+            signature = synthetic_signature(rng, num_perm, base, similarity)
+        else:
+            signature = synthetic_signature(rng, num_perm)
+        start = time.perf_counter_ns()
+        match = index.check(f"doc{doc_id}", signature)
+        check_ns.append(time.perf_counter_ns() - start)
+        if similarity is not None and similarity >= threshold:
+            expected += 1
+            found += match is not None
+        elif similarity is None or similarity < threshold - 0.1:
+            negatives += 1
+            false_positives += match is not None
+    build_seconds = sum(check_ns) / 1e9
+    rss_index = current_rss_mb() - rss_start
+    query_ns = []
+    for _ in range(queries):
+        signature = synthetic_signature(rng, num_perm)
+        start = time.perf_counter_ns()
+        index.query(signature)
+        query_ns.append(time.perf_counter_ns() - start)
+    return {
+        "documents": documents,
+        "threshold": threshold,
+        "bands": index.bands,
+        "rows": index.rows,
+        "indexed": len(index.paths),
+        "flagged": len(index.flagged),
+        "build_seconds": build_seconds,
+        "documents_per_sec": documents / build_seconds if build_seconds > 0 else 0.0,
+        "check_p50_us": percentile(check_ns, 0.5) / 1000,
+        "check_p95_us": percentile(check_ns, 0.95) / 1000,
+        "query_p50_us": percentile(query_ns, 0.5) / 1000 if query_ns else 0.0,
+        "query_p95_us": percentile(query_ns, 0.95) / 1000 if query_ns else 0.0,
+        "index_rss_mb": rss_index,
+        "recall": found / expected if expected else 1.0,
+        "false_positive_rate": false_positives / negatives if negatives else 0.0,
+    }
+
+
+def time_signatures(samples, words, seed):
+    """Cost of one signature over the first pages of a document, from synthetic text of that length."""
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(rng, 20000)
+    index = pdf_convert.NearDuplicateIndex()
+    texts = [make_paragraph(rng, vocabulary, words) for _ in range(samples)]
+    start = time.perf_counter()
+    for text in texts:
+        index.signature([text])
+    return (time.perf_counter() - start) / samples * 1000
+
+
+def command_near_duplicates(args):
+    signature_ms = time_signatures(args.signature_samples, args.sample_words, WORDS_SEED)
+    print(f"signature over {args.sample_words} words: {signature_ms:.2f} ms")
+    results = []
+    for threshold in args.thresholds:
+        with ProcessPoolExecutor(max_workers=1, mp_context=pdf_convert.MP_CONTEXT) as executor:
+            result = executor.submit(
+                run_near_duplicate_case, args.documents, threshold, args.duplicate_rate, args.queries, WORDS_SEED
+            ).result()
+        results.append(result)
+        print(
+            f"threshold {threshold:.2f} ({result['bands']}x{result['rows']} bands): {result['documents']} docs in "
+            f"{result['build_seconds']:.2f} s ({result['documents_per_sec']:.0f}/s), check p50 {result['check_p50_us']:.0f} us "
+            f"p95 {result['check_p95_us']:.0f} us, query p95 {result['query_p95_us']:.0f} us, index {result['index_rss_mb']:.0f} MB, "
+            f"recall {result['recall']:.3f}, false positives {result['false_positive_rate']:.4f}"
+        )
+    with open(args.results, "w", encoding="utf-8") as f:
+        json.dump({"signature_ms": signature_ms, "sample_words": args.sample_words, "results": results}, f, indent=1)
+    print(f"results written to {args.results}")
+
+
+def command_service(args):
+    paths = generate_corpus(args.corpus, args.profile)
+    if args.documents:
+        paths = [path for path in paths if os.path.splitext(os.path.basename(path))[0] in args.documents]
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    output_dir = tempfile.mkdtemp(prefix="bench-out-")
+    service = subprocess.Popen(
+        [
+            sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "pdf_convert.py"),
+            "--serve", "--port", str(port), "--output", output_dir, "--mode", args.mode,
+            "--workers", str(args.workers), "--max-queue", str(args.max_queue)
+        ],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = time.time() + 60
+        while True:
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=1):
+                    break
+            except OSError:
+                if time.time() > deadline or service.poll() is not None:
+                    raise RuntimeError("the service did not start")
+                time.sleep(0.2)
+        results = []
+        for concurrency in args.concurrency:
+            elapsed, jobs = asyncio.run(run_service_load("127.0.0.1", port, paths, args.jobs, concurrency))
+            latencies = [job[0] for job in jobs]
+            first_pages = [job[1] for job in jobs if job[1] is not None]
+            result = {
+                "mode": args.mode,
+                "workers": args.workers,
+                "max_queue": args.max_queue,
+                "concurrency": concurrency,
+                "jobs": len(jobs),
+                "pages": sum(job[3] for job in jobs),
+                "seconds": elapsed,
+                "jobs_per_sec": len(jobs) / elapsed,
+                "pages_per_sec": sum(job[3] for job in jobs) / elapsed,
+                "latency_p50_ms": percentile(latencies, 0.5) * 1000,
+                "latency_p95_ms": percentile(latencies, 0.95) * 1000,
+                "first_page_p95_ms": percentile(first_pages, 0.95) * 1000 if first_pages else None,
+                "rejected": sum(job[2] for job in jobs),
+            }
+            results.append(result)
+            print(
+                f"concurrency {concurrency:<4}{result['jobs_per_sec']:>8.2f} jobs/s{result['pages_per_sec']:>9.1f} pages/s"
+                f"  p50 {result['latency_p50_ms']:>8.1f} ms  p95 {result['latency_p95_ms']:>8.1f} ms"
+                f"  first page p95 {result['first_page_p95_ms'] or 0:>8.1f} ms  429s {result['rejected']}"
+            )
+    finally:
+        service.send_signal(signal.SIGINT)
+        try:
+            service.wait(timeout=60)
+        except subprocess.TimeoutExpired:
+            service.kill()
+        shutil.rmtree(output_dir, ignore_errors=True)
+    with open(args.results, "w", encoding="utf-8") as f:
+        json.dump({"results": results}, f, indent=1)
+    print(f"results written to {args.results}")
+
+
+def result_key(result):
+    return (result["document"], result["mode"], result["format"], result.get("logging", "off"))
+
+
+def command_compare(args):
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = {result_key(result): result for result in json.load(f)["results"]}
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)["results"]
+    regressions = 0
+    for result in current:
+        base = baseline.get(result_key(result))
+        if base is None or not base["pages_per_sec"]:
+            continue
+        change = (result["pages_per_sec"] / base["pages_per_sec"] - 1) * 100
+        rss_change = result["peak_rss_mb"] - base["peak_rss_mb"]
+        flag = "SLOWER" if change < -args.threshold else ""
+        if (result.get("first_text_ms") or 0) > FIRST_TEXT_TARGET_MS:
+            flag = (flag + " SLOW FIRST TEXT").strip()
+        regressions += bool(flag)
+        print(
+            f"{result['document']:<18}{result['mode']:<18}{result['format']:<10}"
+            f"{base['pages_per_sec']:>9.1f} -> {result['pages_per_sec']:>9.1f} pages/s ({change:+6.1f}%)"
+            f"{rss_change:>+9.1f} MB  {flag}"
+        )
+    if regressions:
+        print(
+            f"{regressions} case(s) slower than the {args.threshold:.0f}% threshold "
+            f"or over {FIRST_TEXT_TARGET_MS} ms to first text"
+        )
+        return 1
+    print("no regressions above threshold")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CorpusAid-PDF extraction benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    generate_parser = subparsers.add_parser("generate", help="Generate the synthetic corpus")
+    generate_parser.add_argument("--corpus", default="bench_corpus")
+    generate_parser.add_argument("--profile", choices=sorted(CORPUS_PROFILES), default="quick")
+    generate_parser.set_defaults(func=command_generate)
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmarks and store the results as JSON")
+    run_parser.add_argument("--corpus", default="bench_corpus")
+    run_parser.add_argument("--profile", choices=sorted(CORPUS_PROFILES), default="quick")
+    run_parser.add_argument("--results", default="benchmark_results.json")
+    run_parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    run_parser.add_argument("--formats", nargs="+", choices=FORMATS, default=FORMATS)
+    run_parser.add_argument("--documents", nargs="+", help="Only run these corpus documents (names without .pdf)")
+    run_parser.add_argument("--repeat", type=int, default=1, help="Keep the best of N runs per case")
+    run_parser.add_argument("--skip-logging", action="store_true", help="Skip the logging overhead measurement")
+    run_parser.add_argument("--skip-instrumentation", action="store_true", help="Skip the instrumentation overhead measurement")
+    run_parser.set_defaults(func=command_run)
+
+    layout_parser = subparsers.add_parser("layout", help="Column layout speed and reading-order accuracy, with and without profile reuse")
+    layout_parser.add_argument("--corpus", default="bench_corpus")
+    layout_parser.add_argument("--profile", choices=sorted(CORPUS_PROFILES), default="quick")
+    layout_parser.add_argument("--results", default="benchmark_layout.json")
+    layout_parser.add_argument("--repeat", type=int, default=3, help="Keep the best of N runs per case")
+    layout_parser.set_defaults(func=command_layout)
+
+    normalize_parser = subparsers.add_parser("normalize", help="Text normalization throughput and how well it repairs hyphenated, ligated text")
+    normalize_parser.add_argument("--corpus", default="bench_corpus")
+    normalize_parser.add_argument("--profile", choices=sorted(CORPUS_PROFILES), default="quick")
+    normalize_parser.add_argument("--results", default="benchmark_normalize.json")
+    normalize_parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    normalize_parser.add_argument("--repeat", type=int, default=3, help="Keep the best of N runs per case")
+    normalize_parser.set_defaults(func=command_normalize)
+
+    compression_parser = subparsers.add_parser("compression", help="Output size ratio and throughput of gzip/zstd, per file and as solid archives")
+    compression_parser.add_argument("--corpus", default="bench_corpus")
+    compression_parser.add_argument("--profile", choices=sorted(CORPUS_PROFILES), default="quick")
+    compression_parser.add_argument("--results", default="benchmark_compression.json")
+    compression_parser.add_argument("--modes", nargs="+", choices=MODES, default=["Layout-preserved"])
+    compression_parser.add_argument("--repeat", type=int, default=3, help="Keep the best of N runs per case")
+    compression_parser.set_defaults(func=command_compression)
+
+    statistics_parser = subparsers.add_parser("statistics", help="Corpus statistics counted during extraction vs. a second pass over the outputs")
+    statistics_parser.add_argument("--corpus", default="bench_corpus")
+    statistics_parser.add_argument("--profile", choices=sorted(CORPUS_PROFILES), default="quick")
+    statistics_parser.add_argument("--results", default="benchmark_statistics.json")
+    statistics_parser.add_argument("--modes", nargs="+", choices=MODES, default=["Column-aware"])
+    statistics_parser.add_argument("--ngrams", type=int, nargs="+", default=[1, 2], help="N-gram lengths to count")
+    statistics_parser.add_argument("--repeat", type=int, default=3, help="Keep the best of N runs per case")
+    statistics_parser.set_defaults(func=command_statistics)
+
+    near_duplicates_parser = subparsers.add_parser("near-duplicates", help="MinHash signature cost and LSH index build/query cost, recall and false positives")
+    near_duplicates_parser.add_argument("--results", default="benchmark_near_duplicates.json")
+    near_duplicates_parser.add_argument("--documents", type=int, default=100000, help="Documents ingested into the index")
+    near_duplicates_parser.add_argument("--thresholds", type=float, nargs="+", default=[0.8], help="Similarity thresholds to test")
+    near_duplicates_parser.add_argument("--duplicate-rate", type=float, default=0.1, help="Share of documents planted as near-duplicates")
+    near_duplicates_parser.add_argument("--queries", type=int, default=10000, help="Lookups timed against the full index")
+    near_duplicates_parser.add_argument("--sample-words", type=int, default=1500, help="Words in the first pages a signature is computed over")
+    near_duplicates_parser.add_argument("--signature-samples", type=int, default=200)
+    near_duplicates_parser.set_defaults(func=command_near_duplicates)
+
+    soak_parser = subparsers.add_parser("soak", help="RSS growth over a long session, with and without the memory governor")
+    soak_parser.add_argument("--corpus", default="bench_corpus")
+    soak_parser.add_argument("--profile", choices=sorted(CORPUS_PROFILES), default="quick")
+    soak_parser.add_argument("--results", default="benchmark_soak.json")
+    soak_parser.add_argument("--mode", choices=MODES, default="Column-aware")
+    soak_parser.add_argument("--hours", type=float, default=24.0, help="Duration of each of the two runs")
+    soak_parser.set_defaults(func=command_soak)
+
+    scheduler_parser = subparsers.add_parser("scheduler", help="Mean time to result of a batch in file order, shortest first, and with a boosted document")
+    scheduler_parser.add_argument("--corpus", default="bench_corpus")
+    scheduler_parser.add_argument("--profile", choices=sorted(CORPUS_PROFILES), default="quick")
+    scheduler_parser.add_argument("--results", default="benchmark_scheduler.json")
+    scheduler_parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    scheduler_parser.set_defaults(func=command_scheduler)
+
+    pipeline_parser = subparsers.add_parser("pipeline", help="Batch throughput from and to a simulated network share, sequential vs. read-ahead and parallel writes")
+    pipeline_parser.add_argument("--corpus", default="bench_corpus")
+    pipeline_parser.add_argument("--profile", choices=sorted(CORPUS_PROFILES), default="quick")
+    pipeline_parser.add_argument("--results", default="benchmark_pipeline.json")
+    pipeline_parser.add_argument("--modes", nargs="+", choices=MODES, default=["Column-aware"])
+    pipeline_parser.add_argument(
+        "--shares", nargs="+", type=str, default=["local", "5:100", "30:12"],
+        help="local, or LATENCY_MS:MB_PER_SEC of a simulated share the corpus is read from and outputs written to"
+    )
+    pipeline_parser.add_argument("--prefetch", type=int, default=pdf_convert.ExtractionPipeline.DEFAULTS["prefetch"])
+    pipeline_parser.add_argument("--readers", type=int, default=pdf_convert.ExtractionPipeline.DEFAULTS["readers"])
+    pipeline_parser.add_argument("--writers", type=int, default=pdf_convert.ExtractionPipeline.DEFAULTS["writers"])
+    pipeline_parser.add_argument("--repeat", type=int, default=3)
+    pipeline_parser.set_defaults(func=command_pipeline)
+
+    incremental_parser = subparsers.add_parser("incremental", help="Re-extraction time after correcting a fraction of each document's pages")
+    incremental_parser.add_argument("--corpus", default="bench_corpus")
+    incremental_parser.add_argument("--profile", choices=sorted(CORPUS_PROFILES), default="quick")
+    incremental_parser.add_argument("--results", default="benchmark_incremental.json")
+    incremental_parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    incremental_parser.add_argument("--fractions", type=float, nargs="+", default=[0.01, 0.1, 0.5], help="Fractions of pages to correct")
+    incremental_parser.set_defaults(func=command_incremental)
+
+    service_parser = subparsers.add_parser("service", help="Throughput and latency of the HTTP service under a local load generator")
+    service_parser.add_argument("--corpus", default="bench_corpus")
+    service_parser.add_argument("--profile", choices=sorted(CORPUS_PROFILES), default="quick")
+    service_parser.add_argument("--results", default="benchmark_service.json")
+    service_parser.add_argument("--documents", nargs="+", help="Only submit these corpus documents (names without .pdf)")
+    service_parser.add_argument("--mode", choices=MODES, default="Column-aware")
+    service_parser.add_argument("--jobs", type=int, default=100, help="Jobs per concurrency level")
+    service_parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16], help="Concurrent clients")
+    service_parser.add_argument("--workers", type=int, default=2)
+    service_parser.add_argument("--max-queue", type=int, default=8)
+    service_parser.set_defaults(func=command_service)
+
+    compare_parser = subparsers.add_parser("compare", help="Flag slowdowns between two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=10.0, help="Allowed slowdown in percent")
+    compare_parser.set_defaults(func=command_compare)
+
+    args = parser.parse_args()
+    return args.func(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
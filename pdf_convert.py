@@ -1,43 +1,162 @@
 import sys
 import os
+import json
+import time
+import threading
+import queue
+import atexit
+import multiprocessing
+import argparse
+import signal
+import hashlib
+import re
+import bisect
+import heapq
+import random
+import sqlite3
+import math
+import unicodedata
+import gzip
+import tarfile
+import io
+import mmap
+import gc
+import ctypes
+import asyncio
+import uuid
+import csv
+import zlib
+from array import array
+from urllib.parse import urlsplit
+from contextlib import contextmanager
+from itertools import accumulate
+from collections import deque, OrderedDict, Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import fitz
 from html.parser import HTMLParser
 from collections import defaultdict
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QPushButton, QLabel, QFileDialog,
     QTextEdit, QVBoxLayout, QHBoxLayout, QWidget, QProgressBar, QMessageBox,
-    QComboBox, QScrollArea, QSplitter, QToolBar, QListWidget, QListWidgetItem,
-    QGroupBox, QStatusBar, QTabWidget, QLineEdit, QDialog, QSizePolicy
+    QComboBox, QScrollArea, QSplitter, QToolBar, QListView, QAbstractItemView,
+    QGroupBox, QStatusBar, QTabWidget, QLineEdit, QDialog, QSizePolicy,
+    QPlainTextEdit, QSpinBox
+)
+from PySide6.QtCore import (
+    Qt, QThread, Signal, QPropertyAnimation, QSize, QObject, QTimer,
+    QFileSystemWatcher, QCoreApplication, QAbstractListModel, QModelIndex
 )
-from PySide6.QtCore import Qt, QThread, Signal, QPropertyAnimation, QSize
 from PySide6.QtGui import (
     QPixmap, QImage, QIcon, QTextCursor, QAction, QKeySequence,
-    QShortcut, QColor, QPainter
+    QShortcut, QColor, QPainter, QFont
 )
 from docx import Document
 import logging
+import logging.handlers
+
+LOG_FILE = "pdf_extractor.log"
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+LOG_FORMAT = '%(asctime)s - %(processName)s - %(levelname)s - %(module)s:%(lineno)d - %(message)s'
+
+# Page kinds from the cheap pre-classification done before extraction
+PAGE_TEXT = "text"
+PAGE_IMAGE = "image"
+PAGE_EMPTY = "empty"
+PAGE_OCR = "ocr"  # image-only page whose text came from OCR
+
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# Worker processes are spawned rather than forked so they never inherit Qt or thread state
+MP_CONTEXT = multiprocessing.get_context("spawn")
+
+_log_handlers = []
+_log_listeners = []
+_log_queue = None
+_log_settings = None
+_worker_log_queue = None
+
+def start_log_listener(log_queue):
+    listener = logging.handlers.QueueListener(log_queue, *_log_handlers, respect_handler_level=True)
+    listener.start()
+    _log_listeners.append(listener)
+
+def setup_logging(log_file=LOG_FILE, max_bytes=LOG_MAX_BYTES, backup_count=LOG_BACKUP_COUNT, console_level=logging.INFO):
+    """Configures the logging system.
 
-def setup_logging():
-    """Configures the logging system."""
+    Records are put on a queue by the calling thread and formatted and written
+    by a background listener, so logging never does file I/O on the extraction path.
+    Calling it again with the same arguments does nothing; other arguments replace the handlers.
+    """
+    global _log_queue, _log_settings
+    settings = (os.path.abspath(log_file), max_bytes, backup_count, console_level)
+    if settings == _log_settings and _log_listeners:
+        return
+    _log_settings = settings
 
-    log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(module)s:%(lineno)d - %(message)s')
-    log_file = "pdf_extractor.log"  # Name of the log file
+    log_formatter = logging.Formatter(LOG_FORMAT)
 
-    # File handler (writes logs to a file)
-    file_handler = logging.FileHandler(log_file, mode='w')  # 'w' mode overwrites the log file each time
+    # File handler (size-capped, rotating); the previous session is kept as the first backup
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True
+    )
+    if os.path.exists(log_file) and os.path.getsize(log_file) > 0:
+        file_handler.doRollover()
     file_handler.setFormatter(log_formatter)
     file_handler.setLevel(logging.DEBUG)  # Log everything to the file
 
-    # Console handler (prints logs to the console) — Optional
+    # Console handler (prints logs to the console)
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(log_formatter)
-    console_handler.setLevel(logging.INFO) # Log INFO and above to the console
+    console_handler.setLevel(console_level)
+
+    # Stopping the running listeners writes out what they have queued with the old handlers
+    shutdown_logging()
+    for handler in _log_handlers:
+        handler.close()
+    _log_handlers[:] = [file_handler, console_handler]
+    if _log_queue is None:
+        _log_queue = queue.SimpleQueue()
+        atexit.register(shutdown_logging)
+    start_log_listener(_log_queue)
+    if _worker_log_queue is not None:
+        start_log_listener(_worker_log_queue)
 
     # Root logger configuration
     root_logger = logging.getLogger()
-    root_logger.addHandler(file_handler)
-    root_logger.addHandler(console_handler) # Add console handler if you want console output
-    root_logger.setLevel(logging.DEBUG) # Set the lowest level to DEBUG to capture everything
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
+    root_logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+    root_logger.setLevel(logging.DEBUG)  # Set the lowest level to DEBUG to capture everything
+
+def get_worker_log_queue():
+    """Returns the queue worker processes log into, starting its listener on first use."""
+    global _worker_log_queue
+    if _worker_log_queue is None:
+        _worker_log_queue = MP_CONTEXT.Queue()
+        start_log_listener(_worker_log_queue)
+    return _worker_log_queue
+
+def configure_worker_logging(log_queue, level=logging.DEBUG):
+    """Routes every record of a worker process to the parent's log listener."""
+    root_logger = logging.getLogger()
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
+    if log_queue is not None:
+        root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    root_logger.setLevel(level)
+
+def shutdown_logging():
+    """Flushes pending records and stops the background log writers."""
+    while _log_listeners:
+        listener = _log_listeners.pop()
+        try:
+            listener.stop()
+        except Exception:
+            pass
+    for handler in _log_handlers:
+        handler.flush()
 
 # Utility function to get resource paths
 def resource_path(relative_path):
@@ -186,7 +305,7 @@ class ThemeManager:
                 background-color: {self.custom_colors['primary']};
                 color: {self.custom_colors['text']};
             }}
-            QListWidget {{
+            QListWidget, QListView {{
                 background-color: {self.custom_colors['widget_background']};
                 color: {self.custom_colors['text']};
                 border: 1px solid {self.custom_colors['border']};
@@ -404,6 +523,242 @@ class HelpDialog(QDialog):
         layout.addWidget(close_btn, alignment=Qt.AlignRight)
         self.setLayout(layout)
 
+# MemoryGovernor class for keeping long runs flat: trims MuPDF's store between documents, enforces a ceiling, paces worker recycling
+class MemoryGovernor:
+    DEFAULTS = {"trim_mb": 32, "ceiling_mb": None, "recycle_documents": 100, "recycle_mb": None}
+    CHECK_PAGES = 16  # pages between RSS checks against the ceiling
+    _libc = None
+
+    def __init__(self, trim_mb=32, ceiling_mb=None, recycle_documents=100, recycle_mb=None):
+        self.trim_mb = trim_mb  # growth since the last trim that triggers the next one
+        self.ceiling_mb = ceiling_mb  # memory a single document may add to the process
+        self.recycle_documents = recycle_documents  # documents per worker before its pool is replaced
+        self.recycle_mb = recycle_mb  # worker RSS that gets its pool replaced early
+        self.floor_mb = None
+        self.document_start_mb = None
+        self.pool_documents = 0
+        self.stats = {"trims": 0, "freed_mb": 0.0, "peak_mb": 0.0, "recycles": 0}
+
+    def settings(self):
+        return {
+            "trim_mb": self.trim_mb,
+            "ceiling_mb": self.ceiling_mb,
+            "recycle_documents": self.recycle_documents,
+            "recycle_mb": self.recycle_mb
+        }
+
+    @staticmethod
+    def rss_mb():
+        """Current resident set size of this process in MB, or None where it cannot be read cheaply."""
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+        except (OSError, ValueError, AttributeError):
+            pass
+        try:
+            import psutil
+            return psutil.Process().memory_info().rss / (1024 * 1024)
+        except Exception:
+            return None
+
+    @classmethod
+    def release_heap(cls):
+        # Freed heap pages stay mapped in glibc's arenas until malloc_trim hands them back
+        if not sys.platform.startswith("linux"):
+            return
+        try:
+            if cls._libc is None:
+                cls._libc = ctypes.CDLL("libc.so.6")
+            cls._libc.malloc_trim(0)
+        except (OSError, AttributeError):
+            cls._libc = False
+
+    def trim(self):
+        before = self.rss_mb()
+        fitz.TOOLS.store_shrink(100)
+        gc.collect()
+        self.release_heap()
+        after = self.rss_mb()
+        self.stats["trims"] += 1
+        if before is not None and after is not None:
+            self.stats["freed_mb"] += max(0.0, before - after)
+        self.floor_mb = after
+        return after
+
+    def after_document(self):
+        """Called between documents: empties MuPDF's store once the process has grown trim_mb since the last trim."""
+        rss = self.rss_mb()
+        if rss is None:
+            self.trim()
+            return None
+        self.stats["peak_mb"] = max(self.stats["peak_mb"], rss)
+        if self.floor_mb is None or rss - self.floor_mb >= self.trim_mb:
+            rss = self.trim()
+        return rss
+
+    def begin_document(self):
+        self.document_start_mb = self.rss_mb() if self.ceiling_mb is not None else None
+
+    def check(self, pdf_path, position):
+        """Called while a document is extracted; raises MemoryError once it grew the process past the ceiling."""
+        if self.document_start_mb is None or position % self.CHECK_PAGES:
+            return
+        rss = self.rss_mb()
+        if rss is None or rss - self.document_start_mb <= self.ceiling_mb:
+            return
+        # Cached fonts and images may be all that is in the way
+        rss = self.trim()
+        if rss is not None and rss - self.document_start_mb > self.ceiling_mb:
+            raise MemoryError(
+                f"{os.path.basename(pdf_path)} exceeded the memory ceiling of {self.ceiling_mb:.0f} MB "
+                f"at page {position + 1} (+{rss - self.document_start_mb:.0f} MB)"
+            )
+
+    def worker_finished(self, worker_rss_mb, workers):
+        """Counts a document a worker pool finished; returns why the pool should be replaced, or None."""
+        self.pool_documents += 1
+        reason = None
+        if self.recycle_mb is not None and worker_rss_mb is not None and worker_rss_mb >= self.recycle_mb:
+            reason = f"a worker reached {worker_rss_mb:.0f} MB"
+        elif self.recycle_documents and self.pool_documents >= self.recycle_documents * workers:
+            reason = f"its workers ran {self.pool_documents} document(s)"
+        if reason is not None:
+            self.pool_documents = 0
+            self.stats["recycles"] += 1
+        return reason
+
+# DocumentPool class for sharing open PDF documents between the preview, extraction and OCR instead of reopening them
+class DocumentPool:
+    def __init__(self, max_documents=8, use_mmap=False):
+        self.max_documents = max_documents  # idle documents kept open for reuse
+        self.use_mmap = use_mmap
+        self.lock = threading.Lock()
+        self.handles = OrderedDict()  # id(doc) -> handle, least recently released first
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def acquire(self, pdf_path, prefetched=None):
+        """Returns an open document for pdf_path that only the calling thread uses until it is released.
+
+        prefetched is a (signature, data) pair read ahead by the pipeline; a new handle opens from the bytes
+        instead of the file as long as the file did not change since.
+        """
+        path = os.path.abspath(pdf_path)
+        stat = os.stat(path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        thread_id = threading.get_ident()
+        stale = []
+        with self.lock:
+            idle = None
+            for handle in self.handles.values():
+                if handle["path"] != path:
+                    continue
+                if handle["signature"] != signature:
+                    # The file changed since it was opened
+                    if handle["owner"] is None:
+                        stale.append(handle)
+                elif handle["owner"] == thread_id:
+                    handle["refs"] += 1
+                    self.stats["hits"] += 1
+                    return handle["doc"]
+                elif handle["owner"] is None:
+                    idle = handle
+            for handle in stale:
+                del self.handles[id(handle["doc"])]
+            if idle is not None:
+                idle["owner"] = thread_id
+                idle["refs"] = 1
+                self.stats["hits"] += 1
+                return idle["doc"]
+            self.stats["misses"] += 1
+        for handle in stale:
+            self.close_handle(handle)
+        # Opening, and repairing a damaged xref, can be slow, so it happens outside the lock
+        data = prefetched[1] if prefetched is not None and prefetched[0] == signature else None
+        handle = self.open_handle(path, signature, data)
+        handle["owner"] = thread_id
+        with self.lock:
+            self.handles[id(handle["doc"])] = handle
+        return handle["doc"]
+
+    def release(self, doc):
+        with self.lock:
+            handle = self.handles.get(id(doc))
+            if handle is None:
+                return
+            handle["refs"] -= 1
+            if handle["refs"] > 0:
+                return
+            handle["owner"] = None
+            self.handles.move_to_end(id(doc))
+            evicted = []
+            if handle["in_memory"]:
+                # Holds the whole file in memory, so it is not worth keeping for reuse
+                evicted.append(self.handles.pop(id(doc)))
+            idle = [key for key, entry in self.handles.items() if entry["owner"] is None]
+            for key in idle[:max(0, len(idle) - self.max_documents)]:
+                evicted.append(self.handles.pop(key))
+            self.stats["evictions"] += len(evicted)
+        for handle in evicted:
+            self.close_handle(handle)
+
+    @contextmanager
+    def document(self, pdf_path):
+        doc = self.acquire(pdf_path)
+        try:
+            yield doc
+        finally:
+            self.release(doc)
+
+    def discard(self, pdf_path=None):
+        """Closes idle documents for pdf_path, or all idle documents."""
+        path = os.path.abspath(pdf_path) if pdf_path else None
+        with self.lock:
+            keys = [
+                key for key, handle in self.handles.items()
+                if handle["owner"] is None and (path is None or handle["path"] == path)
+            ]
+            closing = [self.handles.pop(key) for key in keys]
+        for handle in closing:
+            self.close_handle(handle)
+
+    def open_handle(self, path, signature, data=None):
+        handle = {"path": path, "signature": signature, "refs": 1, "owner": None, "buffer": None, "in_memory": False}
+        if data:
+            try:
+                # Already in memory; the document keeps a reference to the bytes until it is closed on release
+                handle["doc"] = fitz.open(stream=data, filetype="pdf")
+                handle["in_memory"] = True
+            except Exception:
+                # Opened again from the file, so the error names it
+                handle["doc"] = fitz.open(path)
+        elif self.use_mmap and signature[0] > 0:
+            # Zero-copy: MuPDF reads straight from the mapped file
+            with open(path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            view = memoryview(mapped)
+            try:
+                handle["doc"] = fitz.open(stream=view, filetype="pdf")
+            except Exception:
+                view.release()
+                mapped.close()
+                raise
+            handle["buffer"] = (view, mapped)
+        else:
+            handle["doc"] = fitz.open(path)
+        return handle
+
+    def close_handle(self, handle):
+        try:
+            handle["doc"].close()
+            if handle["buffer"] is not None:
+                view, mapped = handle["buffer"]
+                view.release()
+                mapped.close()
+        except Exception as e:
+            logging.warning(f"Error closing {handle['path']}: {str(e)}")
+
+DOCUMENT_POOL = DocumentPool()
+
 class PreviewWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -489,8 +844,9 @@ class PreviewWidget(QWidget):
     def set_document(self, pdf_path):
         try:
             if self.current_doc:
-                self.current_doc.close()
-            self.current_doc = fitz.open(pdf_path)
+                DOCUMENT_POOL.release(self.current_doc)
+                self.current_doc = None
+            self.current_doc = DOCUMENT_POOL.acquire(pdf_path)
             self.total_pages = self.current_doc.page_count
             self.current_page = 0
             self.update_navigation()
@@ -565,30 +921,1295 @@ class PreviewWidget(QWidget):
             self.load_current_page()
         super().resizeEvent(event)
 
-# ExtractionThread class for handling PDF extraction in a separate thread
-class ExtractionThread(QThread):
-    progress = Signal(int, str)
-    finished = Signal(str)
-    error = Signal(str)
-    preview_ready = Signal(object)
-    toast = Signal(str)
-    extracted_text = Signal(str, str)
+# PerformanceRecorder class for low-overhead per-stage, per-page and per-document timing
+class PerformanceRecorder:
+    HISTOGRAM_BUCKETS = 32  # log2 buckets of the stage duration in microseconds
+
+    class StageTimer:
+        __slots__ = ("recorder", "name", "start")
+
+        def __init__(self, recorder, name):
+            self.recorder = recorder
+            self.name = name
+            self.start = 0
+
+        def __enter__(self):
+            self.start = time.perf_counter_ns()
+            return self
+
+        def __exit__(self, exc_type, exc_value, traceback):
+            self.recorder.record(self.name, self.start, time.perf_counter_ns() - self.start)
+            return False
+
+    class NullTimer:
+        __slots__ = ()
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, exc_type, exc_value, traceback):
+            return False
+
+    NULL_TIMER = NullTimer()
+
+    def __init__(self, enabled=True, max_events=200000):
+        self.enabled = enabled
+        self.max_events = max_events
+        # Output writer threads record their stage too, and the GUI exports while a batch runs
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.stage_counts = defaultdict(int)
+        self.stage_totals = defaultdict(int)
+        self.stage_histograms = defaultdict(lambda: [0] * self.HISTOGRAM_BUCKETS)
+        self.events = []
+        self.dropped_events = 0
+        self.documents = []
+        self.page_kinds = defaultdict(int)
+        self.current_document = None
+        self.current_page = None
+        self.batch_start = time.perf_counter_ns()
+        self.batch_end = None
+        self.pipeline = None  # PipelineMonitor.utilization() of the batch, when it ran as a pipeline
+
+    def stage(self, name):
+        if not self.enabled:
+            return self.NULL_TIMER
+        return self.StageTimer(self, name)
+
+    def record(self, name, start_ns, duration_ns):
+        with self.lock:
+            self.add_event(name, self.current_document, self.current_page, start_ns, duration_ns)
+
+    def record_for(self, document, name, start_ns, duration_ns):
+        """Records a stage another thread ran for document, such as writing its output after extraction moved on."""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.add_event(name, document, None, start_ns, duration_ns)
+
+    def add_event(self, name, document, page_num, start_ns, duration_ns):
+        self.stage_counts[name] += 1
+        self.stage_totals[name] += duration_ns
+        bucket = min((duration_ns // 1000).bit_length(), self.HISTOGRAM_BUCKETS - 1)
+        self.stage_histograms[name][bucket] += 1
+        if document is not None:
+            document["stages"][name] = document["stages"].get(name, 0) + duration_ns
+        if len(self.events) < self.max_events:
+            doc_index = document["index"] if document is not None else -1
+            self.events.append((name, doc_index, page_num, start_ns, duration_ns, threading.get_ident()))
+        else:
+            self.dropped_events += 1
+
+    def begin_document(self, pdf_path):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.current_document = {
+                "index": len(self.documents),
+                "path": pdf_path,
+                "pages": 0,
+                "start_ns": time.perf_counter_ns(),
+                "duration_ns": 0,
+                "first_text_ns": None,
+                "stages": {},
+                "page_kinds": {}
+            }
+            self.documents.append(self.current_document)
+        self.current_page = None
+
+    def begin_page(self, page_num):
+        self.current_page = page_num
+
+    def count_page(self, kind):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.page_kinds[kind] += 1
+            document = self.current_document
+            if document is not None:
+                document["page_kinds"][kind] = document["page_kinds"].get(kind, 0) + 1
+
+    def first_text(self):
+        """Marks the moment the current document's first page of text was handed to the caller."""
+        document = self.current_document
+        if document is not None and document["first_text_ns"] is None:
+            document["first_text_ns"] = time.perf_counter_ns() - document["start_ns"]
+
+    def time_to_first_text(self):
+        """(median ms, slowest ms, slowest path) over documents that produced text, or None."""
+        timed = sorted((doc["first_text_ns"], doc["path"]) for doc in self.documents if doc["first_text_ns"] is not None)
+        if not timed:
+            return None
+        return timed[len(timed) // 2][0] / 1e6, timed[-1][0] / 1e6, timed[-1][1]
+
+    def end_document(self, page_count):
+        document = self.current_document
+        if document is None:
+            return
+        with self.lock:
+            document["pages"] = page_count
+            document["duration_ns"] = time.perf_counter_ns() - document["start_ns"]
+        self.current_document = None
+        self.current_page = None
+
+    def end_batch(self):
+        self.batch_end = time.perf_counter_ns()
+
+    def percentile_ms(self, name, fraction):
+        histogram = self.stage_histograms.get(name)
+        count = self.stage_counts.get(name, 0)
+        if not histogram or not count:
+            return 0.0
+        threshold = fraction * count
+        seen = 0
+        for bucket, bucket_count in enumerate(histogram):
+            seen += bucket_count
+            if seen >= threshold:
+                # Upper bound of the bucket: durations below 2**bucket microseconds
+                return (1 << bucket) / 1000.0
+        return (1 << (self.HISTOGRAM_BUCKETS - 1)) / 1000.0
+
+    def to_dict(self):
+        end = self.batch_end or time.perf_counter_ns()
+        return {
+            "batch_duration_s": (end - self.batch_start) / 1e9,
+            "total_pages": sum(doc["pages"] for doc in self.documents),
+            "page_kinds": dict(self.page_kinds),
+            "dropped_events": self.dropped_events,
+            "pipeline": self.pipeline,
+            "stages": {
+                name: {
+                    "count": self.stage_counts[name],
+                    "total_ms": self.stage_totals[name] / 1e6,
+                    "mean_ms": self.stage_totals[name] / self.stage_counts[name] / 1e6,
+                    "p50_ms": self.percentile_ms(name, 0.5),
+                    "p95_ms": self.percentile_ms(name, 0.95),
+                    "histogram_us_log2": list(self.stage_histograms[name])
+                }
+                for name in self.stage_counts
+            },
+            "documents": [
+                {
+                    "path": doc["path"],
+                    "pages": doc["pages"],
+                    "duration_ms": doc["duration_ns"] / 1e6,
+                    "first_text_ms": doc["first_text_ns"] / 1e6 if doc["first_text_ns"] is not None else None,
+                    "page_kinds": dict(doc["page_kinds"]),
+                    "stages_ms": {name: value / 1e6 for name, value in doc["stages"].items()}
+                }
+                for doc in self.documents
+            ],
+            "pages": [
+                {
+                    "stage": name,
+                    "document": doc_index,
+                    "page": page_num,
+                    "start_ms": (start - self.batch_start) / 1e6,
+                    "duration_ms": duration / 1e6
+                }
+                for name, doc_index, page_num, start, duration, _ in self.events
+            ]
+        }
+
+    def snapshot(self):
+        """A copy taken under the lock, for reading the recorder while a batch still records into it."""
+        copy = PerformanceRecorder(self.enabled, self.max_events)
+        with self.lock:
+            copy.stage_counts.update(self.stage_counts)
+            copy.stage_totals.update(self.stage_totals)
+            copy.stage_histograms.update((name, list(histogram)) for name, histogram in self.stage_histograms.items())
+            copy.events = list(self.events)
+            copy.dropped_events = self.dropped_events
+            copy.documents = [
+                dict(doc, stages=dict(doc["stages"]), page_kinds=dict(doc["page_kinds"])) for doc in self.documents
+            ]
+            copy.page_kinds.update(self.page_kinds)
+            copy.batch_start = self.batch_start
+            copy.batch_end = self.batch_end
+            copy.pipeline = self.pipeline
+        return copy
+
+    def export_json(self, file_path):
+        data = self.snapshot().to_dict()
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1)
+
+    def export_chrome_trace(self, file_path):
+        recorder = self.snapshot()
+        pid = os.getpid()
+        trace_events = []
+        for index, doc in enumerate(recorder.documents):
+            trace_events.append({
+                "name": os.path.basename(doc["path"]),
+                "cat": "document",
+                "ph": "X",
+                "ts": (doc["start_ns"] - recorder.batch_start) / 1000.0,
+                "dur": doc["duration_ns"] / 1000.0,
+                "pid": pid,
+                "tid": 0,
+                "args": {"path": doc["path"], "pages": doc["pages"]}
+            })
+            if doc["first_text_ns"] is not None:
+                trace_events.append({
+                    "name": "first text",
+                    "cat": "document",
+                    "ph": "i",
+                    "s": "p",
+                    "ts": (doc["start_ns"] + doc["first_text_ns"] - recorder.batch_start) / 1000.0,
+                    "pid": pid,
+                    "tid": 0
+                })
+        for name, doc_index, page_num, start, duration, tid in recorder.events:
+            trace_events.append({
+                "name": name,
+                "cat": "stage",
+                "ph": "X",
+                "ts": (start - recorder.batch_start) / 1000.0,
+                "dur": duration / 1000.0,
+                "pid": pid,
+                "tid": tid,
+                "args": {"document": doc_index, "page": page_num}
+            })
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, f)
+
+    def summary(self):
+        if not self.enabled:
+            return "Performance instrumentation is disabled."
+        data = self.to_dict()
+        duration = data["batch_duration_s"]
+        pages = data["total_pages"]
+        rate = pages / duration if duration > 0 else 0.0
+        lines = [
+            f"Batch: {len(self.documents)} document(s), {pages} page(s) in {duration:.2f} s ({rate:.1f} pages/s)",
+            format_page_kinds(self.page_kinds),
+            f"{'Stage':<16}{'Count':>8}{'Total (s)':>12}{'Mean (ms)':>12}{'p50 (ms)':>11}{'p95 (ms)':>11}"
+        ]
+        first_text = self.time_to_first_text()
+        if first_text is not None:
+            lines.insert(2, f"Time to first text: {first_text[0]:.0f} ms median, {first_text[1]:.0f} ms slowest ({os.path.basename(first_text[2])})")
+        for name, stats in sorted(data["stages"].items(), key=lambda item: -item[1]["total_ms"]):
+            lines.append(
+                f"{name:<16}{stats['count']:>8}{stats['total_ms'] / 1000:>12.3f}"
+                f"{stats['mean_ms']:>12.2f}{stats['p50_ms']:>11.2f}{stats['p95_ms']:>11.2f}"
+            )
+        if self.pipeline is not None:
+            lines.append(format_pipeline_utilization(self.pipeline))
+        if self.dropped_events:
+            lines.append(f"({self.dropped_events} per-page events not kept in the trace)")
+        return "\n".join(lines)
+
+def format_pipeline_utilization(pipeline):
+    """One line per pipeline stage: how its threads split the batch between working, waiting for input and waiting on the next stage."""
+    lines = [f"{'Pipeline':<16}{'Threads':>8}{'Items':>8}{'Busy':>8}{'Starved':>9}{'Blocked':>9}"]
+    for name, stage in pipeline["stages"].items():
+        if not stage["workers"]:
+            lines.append(f"{name:<16}{'off':>8}")
+            continue
+        lines.append(
+            f"{name:<16}{stage['workers']:>8}{stage['items']:>8}"
+            f"{stage['busy']:>8.0%}{stage['starved']:>9.0%}{stage['blocked']:>9.0%}"
+        )
+    return "\n".join(lines)
+
+def format_page_kinds(page_kinds):
+    """Describes how many pages had a text layer and how many were skipped."""
+    description = (
+        f"Pages: {page_kinds.get(PAGE_TEXT, 0)} with text, {page_kinds.get(PAGE_IMAGE, 0)} image-only, "
+        f"{page_kinds.get(PAGE_EMPTY, 0)} empty (image-only and empty pages skipped)"
+    )
+    if page_kinds.get(PAGE_OCR):
+        description += f", {page_kinds[PAGE_OCR]} image-only read with OCR"
+    return description
+
+def ocr_with_pymupdf(page, language, dpi):
+    textpage = page.get_textpage_ocr(language=language, dpi=dpi, full=True)
+    return page.get_text("text", textpage=textpage)
+
+def ocr_with_pytesseract(page, language, dpi):
+    # Optional dependencies, only needed when this engine is chosen
+    import pytesseract
+    from PIL import Image
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+    image = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+    return pytesseract.image_to_string(image, lang=language)
+
+OCR_ENGINES = {
+    "tesseract": ocr_with_pymupdf,
+    "pytesseract": ocr_with_pytesseract
+}
+
+def check_ocr_engine(engine_name):
+    """Raises an exception explaining why the OCR engine cannot run here."""
+    if engine_name not in OCR_ENGINES:
+        raise ValueError(f"Unknown OCR engine '{engine_name}'; choose one of {', '.join(OCR_ENGINES)}")
+    try:
+        if engine_name == "tesseract":
+            fitz.get_tessdata()
+        elif engine_name == "pytesseract":
+            import pytesseract
+            import PIL
+            pytesseract.get_tesseract_version()
+    except Exception as e:
+        raise Exception(f"OCR engine '{engine_name}' is not available: {str(e)}")
+
+def ocr_page(engine_name, pdf_path, page_num, language, dpi):
+    """OCRs one page; the entry point of OCR worker processes. Returns (page_num, text, start_ns, duration_ns)."""
+    start = time.perf_counter_ns()
+    # The pool keeps the document open, since its pages usually arrive one after another
+    with DOCUMENT_POOL.document(pdf_path) as doc:
+        text = OCR_ENGINES[engine_name](doc.load_page(page_num), language, dpi)
+    return page_num, text.strip(), start, time.perf_counter_ns() - start
+
+# OCRPool class for running OCR in its own bounded pool so it cannot starve text extraction
+class OCRPool:
+    DEFAULTS = {"engine": "tesseract", "language": "eng", "dpi": 300, "workers": 1}
+
+    def __init__(self, engine="tesseract", language="eng", dpi=300, workers=1, max_pending=None):
+        check_ocr_engine(engine)
+        self.engine = engine
+        self.language = language
+        self.dpi = dpi
+        self.executor = None
+        if workers > 0:
+            self.executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=MP_CONTEXT,
+                initializer=configure_worker_logging,
+                initargs=(get_worker_log_queue(),)
+            )
+        self.max_pending = max_pending or 2 * max(workers, 1)
+        self.pending = deque()
+        self.completed = []
+
+    def submit(self, pdf_path, page_num):
+        """Queues a page, waiting for the oldest page first when max_pending pages are in flight."""
+        if self.executor is None:
+            self.completed.append(self.run_inline(pdf_path, page_num))
+            return
+        while len(self.pending) >= self.max_pending:
+            self.completed.append(self.result_of(*self.pending.popleft()))
+        future = self.executor.submit(ocr_page, self.engine, pdf_path, page_num, self.language, self.dpi)
+        self.pending.append((pdf_path, page_num, future))
+
+    def run_inline(self, pdf_path, page_num):
+        try:
+            return ocr_page(self.engine, pdf_path, page_num, self.language, self.dpi)
+        except Exception as e:
+            logging.warning(f"OCR failed for page {page_num + 1} of {pdf_path}: {str(e)}")
+            return page_num, None, time.perf_counter_ns(), 0
+
+    def result_of(self, pdf_path, page_num, future):
+        try:
+            return future.result()
+        except Exception as e:
+            logging.warning(f"OCR failed for page {page_num + 1} of {pdf_path}: {str(e)}")
+            return page_num, None, time.perf_counter_ns(), 0
+
+    def drain(self):
+        """Waits for every queued page and returns all results since the last drain; failed pages have text None."""
+        while self.pending:
+            self.completed.append(self.result_of(*self.pending.popleft()))
+        results, self.completed = self.completed, []
+        return results
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+def write_atomically(file_path, write):
+    """Calls write(temp_path) next to file_path and renames the result into place, so a crash never leaves a truncated output."""
+    folder = os.path.dirname(file_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    temp_path = os.path.join(folder, f".{os.path.basename(file_path)}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        write(temp_path)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+def common_folder(paths):
+    """Deepest folder containing all paths (folders count as themselves); the root for mirrored output."""
+    folders = [os.path.abspath(path) if os.path.isdir(path) else os.path.dirname(os.path.abspath(path)) for path in paths]
+    try:
+        return os.path.commonpath(folders) if folders else None
+    except ValueError:
+        # Different drives have no common folder
+        return None
+
+def format_page_header(page_num):
+    return f"\n--- Page {page_num + 1} ---\n\n"
+
+def format_page_texts(page_texts):
+    """Joins (page_num, text) pairs into the document text written to the output file."""
+    return "".join(f"{format_page_header(page_num)}{text}\n\n" for page_num, text in page_texts)
+
+# PageSelection class for choosing which pages of a document get extracted
+class PageSelection:
+    MODES = {
+        "all": "All pages",
+        "ranges": "Page ranges",
+        "first": "First N pages",
+        "every": "Every k-th page",
+        "random": "Random k pages"
+    }
+    RANGE_PATTERN = re.compile(r"^(-?\d+)?\s*-\s*(-?\d+)?$")
+
+    def __init__(self, mode="all", value="", seed=0):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown page selection mode: {mode}")
+        self.mode = mode
+        self.value = str(value).strip()
+        self.seed = seed
+        # Parse eagerly so invalid input is reported before any document is opened
+        if mode == "ranges":
+            self.ranges = self.parse_ranges(self.value)
+        elif mode != "all":
+            try:
+                self.count = int(self.value)
+            except ValueError:
+                raise ValueError(f"{self.MODES[mode]} needs a whole number, got '{self.value}'")
+            if self.count < 1:
+                raise ValueError(f"{self.MODES[mode]} needs a number of at least 1")
+
+    @classmethod
+    def from_label(cls, label, value="", seed=0):
+        for mode, mode_label in cls.MODES.items():
+            if mode_label == label:
+                return cls(mode, value, seed)
+        raise ValueError(f"Unknown page selection mode: {label}")
+
+    @classmethod
+    def parse_ranges(cls, spec):
+        """Parses "1-5,10,-3" into (start, end) pairs; negative numbers count back from the last page."""
+        ranges = []
+        for token in spec.split(","):
+            token = token.strip()
+            if not token:
+                continue
+            try:
+                number = int(token)
+                if number == 0:
+                    raise ValueError
+                ranges.append((number, number))
+                continue
+            except ValueError:
+                pass
+            match = cls.RANGE_PATTERN.match(token)
+            if not match or "0" in (match.group(1), match.group(2)):
+                raise ValueError(f"Invalid page range '{token}'; use e.g. 1-5,10,-3")
+            start = int(match.group(1)) if match.group(1) else 1
+            end = int(match.group(2)) if match.group(2) else -1
+            # Only counted from the same end can a range be told reversed before the document is opened
+            if (start > 0) == (end > 0) and start > end:
+                raise ValueError(f"Page range '{token}' is reversed; use {end}-{start}")
+            ranges.append((start, end))
+        if not ranges:
+            raise ValueError("No pages given; use e.g. 1-5,10,-3")
+        return ranges
+
+    def is_full(self):
+        return self.mode == "all"
+
+    def pages(self, page_count):
+        """Returns the sorted 0-based page numbers selected in a document of page_count pages."""
+        if self.mode == "all":
+            return list(range(page_count))
+        if self.mode == "first":
+            return list(range(min(self.count, page_count)))
+        if self.mode == "every":
+            return list(range(0, page_count, self.count))
+        if self.mode == "random":
+            # A fixed seed picks the same sample on every run so cached pages are reused
+            return sorted(random.Random(self.seed).sample(range(page_count), min(self.count, page_count)))
+        selected = set()
+        for start, end in self.ranges:
+            start = start - 1 if start > 0 else page_count + start
+            end = end - 1 if end > 0 else page_count + end
+            selected.update(range(max(start, 0), min(end, page_count - 1) + 1))
+        return sorted(selected)
+
+    def describe(self):
+        if self.mode == "all":
+            return self.MODES["all"]
+        return f"{self.MODES[self.mode]}: {self.value}"
+
+# PageCache class for reusing extracted page text across runs and page selections
+class PageCache:
+    FILE_NAME = ".pdf_extractor_cache.sqlite"
+    SCHEMA_VERSION = 4
+    REFERENCE = re.compile(r"\b(\d+) \d+ R\b")
+    UPWARD = re.compile(r"/(Parent|P) \d+ \d+ R\b")  # back into the page tree, which would pull in every page
+
+    def __init__(self, cache_path):
+        self.connection = sqlite3.connect(cache_path, timeout=30)
+        # WAL lets watch-folder workers read while another process writes
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            if self.connection.execute("PRAGMA user_version").fetchone()[0] != self.SCHEMA_VERSION:
+                # Cached pages are cheap to rebuild, so older layouts are simply dropped
+                self.connection.execute("DROP TABLE IF EXISTS pages")
+                self.connection.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "path TEXT, signature TEXT, variant TEXT, page INTEGER, text TEXT, kind TEXT, fingerprint TEXT, "
+                "PRIMARY KEY (path, variant, page))"
+            )
+
+    @staticmethod
+    def signature(pdf_path):
+        stat_result = os.stat(pdf_path)
+        return f"{stat_result.st_size}:{stat_result.st_mtime_ns}"
+
+    @staticmethod
+    def fingerprint(page, shared=None):
+        """Hashes everything a page's text depends on: its geometry, content streams and every object its resources reach.
+
+        shared maps xrefs to digests of fonts and XObjects already hashed for other pages of the document.
+        """
+        doc = page.parent
+        shared = {} if shared is None else shared
+        xref_count = doc.xref_length()
+
+        def update_references(digest, source):
+            # Encodings, widths, descendant fonts, font programs and nested form resources all sit behind references
+            for xref in map(int, PageCache.REFERENCE.findall(PageCache.UPWARD.sub("", source))):
+                if 0 < xref < xref_count:
+                    digest.update(object_digest(xref))
+
+        def object_digest(xref):
+            if xref not in shared:
+                # A reference back to an object being hashed counts as its number
+                shared[xref] = xref.to_bytes(4, "little")
+                source = doc.xref_object(xref, compressed=True)
+                digest = hashlib.blake2b(source.encode("utf-8", "replace"), digest_size=16)
+                if doc.xref_is_stream(xref):
+                    digest.update(doc.xref_stream_raw(xref) or b"")
+                update_references(digest, source)
+                shared[xref] = digest.digest()
+            return shared[xref]
+
+        # Resources missing from the page are inherited from the nearest page tree node that has them
+        node = page.xref
+        kind, resources = doc.xref_get_key(node, "Resources")
+        for _ in range(64):
+            parent = doc.xref_get_key(node, "Parent")
+            if kind != "null" or parent[0] != "xref":
+                break
+            node = int(parent[1].split()[0])
+            kind, resources = doc.xref_get_key(node, "Resources")
+
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{page.rotation}:{tuple(page.mediabox)}:{tuple(page.cropbox)}".encode("ascii"))
+        for xref in page.get_contents():
+            digest.update(doc.xref_stream_raw(xref) or b"")
+        digest.update(resources.encode("utf-8", "replace"))
+        update_references(digest, resources)
+        return digest.hexdigest()
+
+    def load(self, pdf_path, variant):
+        """Returns page -> (text, kind, signature, fingerprint) for every page cached for the file and variant."""
+        rows = self.connection.execute(
+            "SELECT page, text, kind, signature, fingerprint FROM pages WHERE path = ? AND variant = ?",
+            (pdf_path, variant)
+        )
+        return {page_num: (text, kind, signature, fingerprint) for page_num, text, kind, signature, fingerprint in rows}
+
+    def store(self, pdf_path, signature, variant, page_texts, revalidated=(), page_count=None):
+        """Caches (page, text, kind, fingerprint) rows and marks revalidated pages as current for this signature."""
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO pages (path, signature, variant, page, text, kind, fingerprint) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(pdf_path, signature, variant, page_num, text, kind, fingerprint) for page_num, text, kind, fingerprint in page_texts]
+            )
+            self.connection.executemany(
+                "UPDATE pages SET signature = ? WHERE path = ? AND variant = ? AND page = ?",
+                [(signature, pdf_path, variant, page_num) for page_num in revalidated]
+            )
+            if page_count is not None:
+                # Pages of an older, longer version of the file can never match again
+                self.connection.execute("DELETE FROM pages WHERE path = ? AND page >= ?", (pdf_path, page_count))
+
+    def close(self):
+        self.connection.close()
+
+# BoilerplateFilter class for spotting running headers, footers and page numbers across the pages of a document
+class BoilerplateFilter:
+    DIGITS = re.compile(r"\d+")
+    SPACES = re.compile(r"\s+")
+    # Page-number shapes, matched against band lines after digits became "#"; they all count as one line,
+    # so "iv" and "v" repeat like "#" does, and are stripped once that line was seen on two pages
+    DEFAULT_PATTERNS = (
+        r"^(page\s*)?#+(\s*(of|/)\s*#+)?$",
+        r"^[-\u2013\u2014\s]*#+[-\u2013\u2014\s]*$",
+        r"^(?=[ivxlc])(x[cl]|l?x{0,3})(i[xv]|v?i{0,3})$"
+    )
+    PAGE_NUMBER = "<page number>"
+
+    def __init__(self, band=0.08, min_pages=3, warmup_pages=8, max_keys=4096, patterns=DEFAULT_PATTERNS):
+        self.band = band  # height of the header and footer bands, as a fraction of the page height
+        self.min_pages = min_pages
+        self.warmup_pages = warmup_pages
+        self.max_keys = max_keys
+        self.patterns = [re.compile(pattern) for pattern in patterns]
+        self.reset()
+
+    def reset(self):
+        self.counts = {}
+        self.pages_seen = 0
+        self.stripped_lines = 0
+
+    def normalize(self, text):
+        return self.SPACES.sub(" ", self.DIGITS.sub("#", text)).strip().lower()
+
+    def band_key(self, top, page_height, text):
+        """Returns (band slot, normalized text) for lines in the header or footer band, otherwise None."""
+        position = top / page_height if page_height else 0.5
+        if self.band < position < 1 - self.band:
+            return None
+        normalized = self.normalize(text)
+        if not normalized:
+            return None
+        if any(pattern.match(normalized) for pattern in self.patterns):
+            normalized = self.PAGE_NUMBER
+        # Slots of 1% of the page height; lookups also check the neighbouring slots to absorb jitter
+        return int(position * 100), normalized
+
+    def candidates(self, parser, page_height):
+        """Returns (line index, key) for every header or footer band line of a parsed page."""
+        result = []
+        for index, (top, _, _) in enumerate(parser.lines):
+            position = top / page_height if page_height else 0.5
+            if self.band < position < 1 - self.band:
+                continue
+            key = self.band_key(top, page_height, parser.line_text(index))
+            if key is not None:
+                result.append((index, key))
+        return result
+
+    def observe(self, candidates):
+        self.pages_seen += 1
+        for key in {key for _, key in candidates}:
+            self.counts[key] = self.counts.get(key, 0) + 1
+        if len(self.counts) > self.max_keys:
+            # Keep memory bounded on long documents by forgetting lines seen only once
+            self.counts = {key: count for key, count in self.counts.items() if count > 1}
+
+    def ready(self):
+        """True once enough pages were seen to decide on boilerplate without holding pages back."""
+        return self.pages_seen >= self.warmup_pages
+
+    def is_boilerplate(self, key):
+        slot, normalized = key
+        counts = self.counts
+        seen = counts.get((slot - 1, normalized), 0) + counts.get(key, 0) + counts.get((slot + 1, normalized), 0)
+        return seen >= (2 if normalized == self.PAGE_NUMBER else self.min_pages)
+
+    def boilerplate_lines(self, candidates):
+        lines = [index for index, key in candidates if self.is_boilerplate(key)]
+        self.stripped_lines += len(lines)
+        return lines
+
+# TextNormalizer class for the optional cleanup of each extracted page before it is written
+class TextNormalizer:
+    DEFAULTS = {"dehyphenate": True, "whitespace": True, "unicode": True}
+    LIGATURES = {
+        "\ufb00": "ff", "\ufb01": "fi", "\ufb02": "fl", "\ufb03": "ffi",
+        "\ufb04": "ffl", "\ufb05": "st", "\ufb06": "st"
+    }
+    LIGATURE_CHARS = re.compile("[\ufb00-\ufb06]")
+    # A hyphen after a letter at a line end (a space in Column-aware output), continued in lower case;
+    # "pre- and post-war" style constructions are left alone. Leading with the hyphen keeps the scan fast
+    HYPHEN_BREAK = re.compile(r"[-\u00ad](?<=[^\W\d_].)(?: *\n *| +)(?!(?:and|or|nor|to|und|oder|et|ou)\b)(?=[^\W\d_])(?![A-Z])")
+    # Runs of spaces and single tabs or exotic spaces become one plain space
+    SPACES = re.compile(r"[ \t\u00a0\u2000-\u200a\u202f\u205f\u3000]{2,}|[\t\u00a0\u2000-\u200a\u202f\u205f\u3000]")
+    ZERO_WIDTH = re.compile("[\u200b\ufeff]")
+    LINE_EDGES = re.compile(r" *\n *")
+    BLANK_LINES = re.compile(r"\n{3,}")
+
+    def __init__(self, dehyphenate=True, whitespace=True, unicode=True):
+        self.dehyphenate = dehyphenate
+        self.whitespace = whitespace
+        self.unicode = unicode
+
+    def settings(self):
+        return {"dehyphenate": self.dehyphenate, "whitespace": self.whitespace, "unicode": self.unicode}
+
+    def variant(self):
+        return "".join(flag for flag, enabled in zip("dwu", (self.dehyphenate, self.whitespace, self.unicode)) if enabled)
+
+    def normalize(self, text):
+        """Compiled regex passes only; each step skips pages it cannot change."""
+        if self.unicode and not text.isascii():
+            text = self.LIGATURE_CHARS.sub(lambda match: self.LIGATURES[match.group()], text)
+            if not unicodedata.is_normalized("NFC", text):
+                text = unicodedata.normalize("NFC", text)
+        if self.dehyphenate and ("-" in text or "\u00ad" in text):
+            text = self.HYPHEN_BREAK.sub("", text).replace("\u00ad", "")
+        if self.whitespace:
+            if not text.isascii():
+                text = self.SPACES.sub(" ", self.ZERO_WIDTH.sub("", text))
+            elif "  " in text or "\t" in text:
+                text = self.SPACES.sub(" ", text)
+            if " \n" in text or "\n " in text:
+                text = self.LINE_EDGES.sub("\n", text)
+            if "\n\n\n" in text:
+                text = self.BLANK_LINES.sub("\n\n", text)
+            text = text.strip()
+        return text
+
+# CorpusStatistics class for counting tokens and n-grams while pages are extracted, so no second pass over the outputs is needed
+class CorpusStatistics:
+    DEFAULTS = {"ngram": 2, "lowercase": True}
+    FOLDER = "corpus_statistics"
+    TOKEN_PATTERN = re.compile(r"\w+(?:['\u2019]\w+)*")
+    ID_BITS = 32  # n-grams are counted under one int packing their token ids
+    ID_SHIFT = 1 << ID_BITS
+
+    def __init__(self, ngram=2, lowercase=True):
+        if ngram < 1 or ngram * self.ID_BITS > 128:
+            raise ValueError("n-gram length must be between 1 and 4")
+        self.ngram = ngram
+        self.lowercase = lowercase
+        self.token_ids = {}
+        self.tokens = []
+        self.counts = array("q")
+        self.document_frequency = array("q")
+        self.ngram_counts = Counter()
+        self.documents = []  # (pdf_path, tokens, types)
+        # Per-document tables wait here unless they are spooled to disk as each document finishes
+        self.document_tables = []
+        self.spool = None
+        self.spool_path = None
+        # Counts of the document being extracted; they join the batch's totals only once it finishes
+        self.document_counts = None
+        self.document_ngrams = None
+
+    def settings(self):
+        return {"ngram": self.ngram, "lowercase": self.lowercase}
+
+    def intern(self, token):
+        token_id = self.token_ids.get(token)
+        if token_id is None:
+            token_id = self.token_ids[token] = len(self.tokens)
+            self.tokens.append(token)
+            self.counts.append(0)
+            self.document_frequency.append(0)
+        return token_id
+
+    def pack(self, token_ids):
+        key = 0
+        for token_id in token_ids:
+            key = key << self.ID_BITS | token_id
+        return key
+
+    def unpack(self, key):
+        mask = (1 << self.ID_BITS) - 1
+        return [key >> (self.ID_BITS * shift) & mask for shift in range(self.ngram - 1, -1, -1)]
+
+    def begin_document(self):
+        """Starts a document, dropping whatever a failed or abandoned one counted."""
+        self.document_counts = Counter()
+        self.document_ngrams = Counter()
+
+    def add_page(self, text):
+        """Counting runs in C through Counter.update and map; only unseen tokens go through intern()."""
+        if self.lowercase:
+            text = text.lower()
+        tokens = self.TOKEN_PATTERN.findall(text)
+        for token in set(tokens).difference(self.token_ids):
+            self.intern(token)
+        token_ids = list(map(self.token_ids.__getitem__, tokens))
+        self.document_counts.update(token_ids)
+        # N-grams do not run across page boundaries
+        keys = token_ids
+        for shift in range(1, self.ngram):
+            keys = list(map(int.__or__, map(self.ID_SHIFT.__mul__, keys), token_ids[shift:]))
+        if self.ngram > 1:
+            self.document_ngrams.update(keys)
+
+    def end_document(self, pdf_path):
+        counts, self.document_counts = self.document_counts, None
+        ngrams, self.document_ngrams = self.document_ngrams, None
+        self.ngram_counts.update(ngrams)
+        self.record(pdf_path, counts)
+
+    def record(self, pdf_path, counts):
+        total = 0
+        for token_id, count in counts.items():
+            self.counts[token_id] += count
+            self.document_frequency[token_id] += 1
+            total += count
+        self.documents.append((pdf_path, total, len(counts)))
+        if self.spool is None:
+            self.document_tables.append((pdf_path, dict(counts)))
+            return
+        writer = csv.writer(self.spool, delimiter="\t", lineterminator="\n")
+        writer.writerows(
+            (pdf_path, self.tokens[token_id], count)
+            for token_id, count in sorted(counts.items(), key=lambda item: -item[1])
+        )
+
+    def state(self):
+        """Everything counted so far, picklable so worker processes can hand it to the batch's instance."""
+        return {
+            "settings": self.settings(),
+            "tokens": self.tokens,
+            "counts": self.counts,
+            "document_frequency": self.document_frequency,
+            "ngrams": dict(self.ngram_counts),
+            "documents": self.documents,
+            "document_tables": self.document_tables
+        }
+
+    def merge(self, state):
+        if state["settings"] != self.settings():
+            raise ValueError("Cannot merge statistics counted with different settings")
+        remap = [self.intern(token) for token in state["tokens"]]
+        for old_id, (count, frequency) in enumerate(zip(state["counts"], state["document_frequency"])):
+            self.counts[remap[old_id]] += count
+            self.document_frequency[remap[old_id]] += frequency
+        for key, count in state["ngrams"].items():
+            self.ngram_counts[self.pack(remap[token_id] for token_id in self.unpack(key))] += count
+        self.documents.extend(state["documents"])
+        if self.spool is None:
+            self.document_tables.extend(
+                (pdf_path, {remap[token_id]: count for token_id, count in table.items()})
+                for pdf_path, table in state["document_tables"]
+            )
+            return
+        writer = csv.writer(self.spool, delimiter="\t", lineterminator="\n")
+        for pdf_path, table in state["document_tables"]:
+            writer.writerows(
+                (pdf_path, state["tokens"][token_id], count)
+                for token_id, count in sorted(table.items(), key=lambda item: -item[1])
+            )
+
+    def open_spool(self, folder):
+        """Streams per-document tables to folder as documents finish, so a long batch does not hold them all."""
+        os.makedirs(folder, exist_ok=True)
+        self.spool_path = os.path.join(folder, "document_tokens.tsv")
+        self.spool = open(f"{self.spool_path}.{os.getpid()}.tmp", "w", encoding="utf-8", newline="")
+        self.spool.write("document\ttoken\tcount\n")
+
+    def write(self, folder):
+        """Writes the frequency tables of the batch into folder; returns the summary logged for it."""
+        os.makedirs(folder, exist_ok=True)
+
+        def table(file_name, header, rows):
+            def write_rows(temp_path):
+                with open(temp_path, "w", encoding="utf-8", newline="") as f:
+                    writer = csv.writer(f, delimiter="\t", lineterminator="\n")
+                    writer.writerow(header)
+                    writer.writerows(rows)
+            write_atomically(os.path.join(folder, file_name), write_rows)
+
+        order = sorted(range(len(self.tokens)), key=lambda token_id: (-self.counts[token_id], self.tokens[token_id]))
+        table(
+            "tokens.tsv", ("token", "count", "documents"),
+            ((self.tokens[token_id], self.counts[token_id], self.document_frequency[token_id]) for token_id in order)
+        )
+        if self.ngram > 1:
+            table(
+                f"{self.ngram}grams.tsv", ("ngram", "count"),
+                (
+                    (" ".join(self.tokens[token_id] for token_id in self.unpack(key)), count)
+                    for key, count in sorted(self.ngram_counts.items(), key=lambda item: -item[1])
+                )
+            )
+        table(
+            "documents.tsv", ("document", "tokens", "types", "type_token_ratio"),
+            ((pdf_path, total, types, f"{types / total:.4f}" if total else "0") for pdf_path, total, types in self.documents)
+        )
+        if self.spool is not None:
+            self.spool.close()
+            os.replace(self.spool.name, self.spool_path)
+            self.spool = None
+        else:
+            table(
+                "document_tokens.tsv", ("document", "token", "count"),
+                (
+                    (pdf_path, self.tokens[token_id], count)
+                    for pdf_path, counts in self.document_tables
+                    for token_id, count in sorted(counts.items(), key=lambda item: -item[1])
+                )
+            )
+        total = sum(self.counts)
+        return (
+            f"{len(self.documents)} document(s), {total} tokens, {len(self.tokens)} types "
+            f"(type/token ratio {len(self.tokens) / total if total else 0:.4f}), {len(self.ngram_counts)} distinct {self.ngram}-grams"
+        )
+
+    def close(self):
+        """Drops an unfinished spool, e.g. when the batch failed before write()."""
+        if self.spool is not None:
+            self.spool.close()
+            os.remove(self.spool.name)
+            self.spool = None
+
+# ColumnLayout class for learning column gutters once per document template and reusing them on later pages
+class ColumnLayout:
+    DEFAULTS = {"min_gutter": 0.02, "max_columns": 3, "spanning_lines": 0.05, "reuse": True, "max_profiles": 4}
+
+    def __init__(self, min_gutter=0.02, max_columns=3, spanning_lines=0.05, reuse=True, max_profiles=4):
+        self.min_gutter = min_gutter  # narrowest gutter, as a fraction of the page width
+        self.max_columns = max(1, max_columns)
+        self.spanning_lines = spanning_lines  # fraction of lines allowed to run across a gutter (titles, footers)
+        self.reuse = reuse
+        self.max_profiles = max_profiles
+        self.profiles = {}
+        self.stats = defaultdict(int)
+
+    def settings(self):
+        return {
+            "min_gutter": self.min_gutter,
+            "max_columns": self.max_columns,
+            "spanning_lines": self.spanning_lines,
+            "reuse": self.reuse,
+            "max_profiles": self.max_profiles
+        }
+
+    def reset(self):
+        """Forgets the learned profiles; called at the start of every document."""
+        self.profiles = {}
+        self.stats = defaultdict(int)
+
+    @staticmethod
+    def line_spans(blocks):
+        spans = []
+        for block in blocks:
+            if "lines" in block:
+                spans.extend((line["bbox"][0], line["bbox"][2]) for line in block["lines"])
+            elif "bbox" in block:
+                spans.append((block["bbox"][0], block["bbox"][2]))
+        return spans
+
+    def analyze(self, spans, page_width):
+        """Finds gutters as x-ranges covered by at most a few lines; returns them as (left, right) pairs."""
+        width = int(page_width) + 2
+        changes = [0] * (width + 1)
+        for x0, x1 in spans:
+            start = min(max(int(x0), 0), width)
+            end = min(max(int(math.ceil(x1)), start), width)
+            changes[start] += 1
+            changes[end] -= 1
+        coverage = list(accumulate(changes))
+        allowed = int(len(spans) * self.spanning_lines)
+        covered = [x for x, count in enumerate(coverage) if count > allowed]
+        if not covered:
+            return []
+        gutters = []
+        run_start = None
+        for x in range(covered[0], covered[-1] + 1):
+            if coverage[x] <= allowed:
+                if run_start is None:
+                    run_start = x
+            elif run_start is not None:
+                if x - run_start >= self.min_gutter * page_width:
+                    gutters.append((run_start, x))
+                run_start = None
+        # Keep the widest gutters when a page suggests more columns than allowed
+        gutters = sorted(gutters, key=lambda gutter: gutter[0] - gutter[1])[:self.max_columns - 1]
+        return sorted(gutters)
+
+    def fits(self, gutters, spans):
+        """Cheap check that a page has the same columns as a learned profile."""
+        boundaries = [(left + right) / 2 for left, right in gutters]
+        columns = [[] for _ in range(len(gutters) + 1)]
+        crossing = 0
+        for x0, x1 in spans:
+            column = bisect.bisect_right(boundaries, (x0 + x1) / 2)
+            # A line reaching past the gutters on both sides of its column runs across a gutter
+            if (column > 0 and x0 < gutters[column - 1][0]) or (column < len(gutters) and x1 > gutters[column][1]):
+                crossing += 1
+            columns[column].append((x0, x1))
+        if crossing > len(spans) * self.spanning_lines:
+            return False
+        # A column holding only narrow lines may hide a gutter the profile does not know about
+        for column in columns:
+            if len(column) < 4:
+                continue
+            extent = max(x1 for _, x1 in column) - min(x0 for x0, _ in column)
+            wide = sum(1 for x0, x1 in column if x1 - x0 >= extent * 0.5)
+            if wide < len(column) * 0.25:
+                return False
+        return True
+
+    def gutters_for(self, page, blocks):
+        """Returns (gutters, spans) for a page, reusing a learned profile when the page fits one."""
+        spans = self.line_spans(blocks)
+        page_width = page.rect.width
+        # First pages (titles, abstracts) often differ from body pages, so they get their own profiles
+        template = (page.number == 0, round(page_width), round(page.rect.height))
+        candidates = self.profiles.setdefault(template, [])
+        if self.reuse:
+            for index, gutters in enumerate(candidates):
+                if self.fits(gutters, spans):
+                    if index:
+                        candidates.insert(0, candidates.pop(index))
+                    self.stats["reused"] += 1
+                    return gutters, spans
+        gutters = self.analyze(spans, page_width)
+        self.stats["analyzed"] += 1
+        if gutters not in candidates:
+            candidates.insert(0, gutters)
+            del candidates[self.max_profiles:]
+        return gutters, spans
+
+def check_compression(method):
+    """Raises an exception explaining why the compression method cannot run here."""
+    if method not in OutputWriter.EXTENSIONS:
+        raise ValueError(f"Unknown compression '{method}'; choose one of {', '.join(OutputWriter.EXTENSIONS)}")
+    if method == "zstd":
+        try:
+            import zstandard
+        except Exception as e:
+            raise Exception(f"zstd compression needs the zstandard package: {str(e)}")
+
+def open_compressed(file_path, method, level):
+    """Opens a binary stream that compresses everything written to it into file_path."""
+    if method == "gzip":
+        return gzip.open(file_path, "wb", compresslevel=level if level is not None else 6)
+    import zstandard
+    return zstandard.ZstdCompressor(level=level if level is not None else 3).stream_writer(
+        open(file_path, "wb"), closefd=True
+    )
+
+# OutputWriter class for compressing and writing outputs on a background thread while extraction continues
+class OutputWriter:
+    EXTENSIONS = {"gzip": ".gz", "zstd": ".zst"}
+    DEFAULTS = {"method": None, "level": None, "archive": False}
+
+    def __init__(self, method=None, level=None, archive=False, archive_path=None, max_pending=4, writers=1, recorder=None):
+        self.method = method
+        self.level = level
+        self.archive = archive
+        self.archive_path = archive_path
+        self.tar = None
+        self.tar_temp_path = None
+        # Bounded, so extraction never runs more than a few documents ahead of the disk
+        self.jobs = queue.Queue(maxsize=max_pending)
+        # A solid archive is one stream, so only separate files are written in parallel
+        self.writers = 1 if archive and method else max(1, writers)
+        self.threads = []
+        self.lock = threading.Lock()
+        self.monitor = None  # PipelineMonitor told how busy the writers are, when the batch runs as a pipeline
+        self.recorder = recorder  # gets each write as the "write" stage of the document it belongs to
+        self.on_written = None  # on_written(pdf_path, file_path, error) on the writer thread, error None on success
+        self.errors = []  # (pdf_path, file_path, message) of failed writes
+        self.stats = {"files": 0, "raw_bytes": 0, "written_bytes": 0, "seconds": 0.0}
+
+    def submit(self, pdf_path, file_path, payload, document=None):
+        """Queues text, or a write(temp_path) callable for binary formats, for file_path.
+
+        document is the recorder's entry for pdf_path, which the write is timed against.
+        """
+        if not self.threads:
+            for number in range(self.writers):
+                thread = threading.Thread(target=self.run, name=f"OutputWriter-{number + 1}", daemon=True)
+                thread.start()
+                self.threads.append(thread)
+        if self.monitor is None:
+            self.jobs.put((pdf_path, file_path, payload, document))
+            return
+        start = time.perf_counter()
+        self.jobs.put((pdf_path, file_path, payload, document))
+        # Backpressure: extraction waited for a free slot in the write queue
+        self.monitor.add("extract", blocked=time.perf_counter() - start)
+
+    def run(self):
+        while True:
+            waited = time.perf_counter()
+            job = self.jobs.get()
+            start = time.perf_counter()
+            try:
+                if job is None:
+                    if self.monitor is not None:
+                        self.monitor.add("write", starved=start - waited)
+                    return
+                pdf_path, file_path, payload, document = job
+                start_ns = time.perf_counter_ns()
+                error = None
+                try:
+                    self.write(file_path, payload)
+                except Exception as e:
+                    error = str(e)
+                    logging.error(f"Error writing {file_path}: {error}")
+                    self.errors.append((pdf_path, file_path, error))
+                duration_ns = time.perf_counter_ns() - start_ns
+                with self.lock:
+                    self.stats["seconds"] += duration_ns / 1e9
+                if self.recorder is not None and document is not None:
+                    self.recorder.record_for(document, "write", start_ns, duration_ns)
+                if self.monitor is not None:
+                    self.monitor.add("write", busy=time.perf_counter() - start, starved=start - waited, items=1)
+                if self.on_written is not None:
+                    self.on_written(pdf_path, file_path, error)
+            finally:
+                self.jobs.task_done()
+
+    def write(self, file_path, payload):
+        if callable(payload):
+            write_atomically(file_path, payload)
+            size = os.path.getsize(file_path)
+            self.count(size, size)
+        else:
+            data = payload.encode("utf-8")
+            if self.archive and self.method:
+                with self.lock:
+                    self.add_to_archive(file_path, data)
+                self.count(len(data), 0)
+            else:
+                def write_data(temp_path):
+                    with (open_compressed(temp_path, self.method, self.level) if self.method else open(temp_path, "wb", buffering=WRITE_BUFFER_SIZE)) as f:
+                        f.write(data)
+                write_atomically(file_path, write_data)
+                self.count(len(data), os.path.getsize(file_path))
+
+    def count(self, raw_bytes, written_bytes):
+        with self.lock:
+            stats = self.stats
+            stats["raw_bytes"] += raw_bytes
+            stats["written_bytes"] += written_bytes
+            stats["files"] += 1
+
+    def add_to_archive(self, file_path, data):
+        if self.tar is None:
+            folder = os.path.dirname(self.archive_path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            self.tar_temp_path = os.path.join(folder, f".{os.path.basename(self.archive_path)}.{os.getpid()}.tmp")
+            self.tar_stream = open_compressed(self.tar_temp_path, self.method, self.level)
+            self.tar = tarfile.open(fileobj=self.tar_stream, mode="w|")
+        info = tarfile.TarInfo(os.path.relpath(file_path, os.path.dirname(self.archive_path)).replace(os.sep, "/"))
+        info.size = len(data)
+        info.mtime = int(time.time())
+        self.tar.addfile(info, io.BytesIO(data))
+
+    def flush(self):
+        """Waits for queued writes; returns and forgets the failed ones."""
+        if self.threads:
+            self.jobs.join()
+        errors, self.errors = self.errors, []
+        return errors
+
+    def close(self):
+        """Flushes, finishes the batch archive and stops the threads; returns failed writes."""
+        errors = self.flush()
+        for thread in self.threads:
+            self.jobs.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+        if self.tar is not None:
+            try:
+                self.tar.close()
+                self.tar_stream.close()
+                os.replace(self.tar_temp_path, self.archive_path)
+                self.stats["written_bytes"] += os.path.getsize(self.archive_path)
+            except Exception as e:
+                logging.error(f"Error writing {self.archive_path}: {str(e)}")
+                errors.append((None, self.archive_path, str(e)))
+            self.tar = None
+        return errors
+
+# OutputNaming class for mapping each PDF to its output file, without an engine for checks such as the watch folder's
+class OutputNaming:
+    def __init__(self, output_path, output_format, output_layout="flat", input_root=None, compression=None):
+        self.output_path = output_path
+        self.output_format = output_format
+        self.output_layout = output_layout
+        self.input_root = os.path.abspath(input_root) if input_root else None
+        compression = compression or OutputWriter.DEFAULTS
+        self.archive = bool(compression["archive"] and compression["method"])
+        # Archives hold the plain names
+        self.suffix = OutputWriter.EXTENSIONS[compression["method"]] if compression["method"] and not self.archive else ""
+
+    @classmethod
+    def from_settings(cls, settings):
+        """From the engine settings watch and service mode hand to their workers."""
+        return cls(
+            settings["output_path"], settings["output_format"], settings.get("output_layout", "flat"),
+            settings.get("input_root"), settings.get("compression")
+        )
+
+    def output_file_for(self, pdf_path):
+        base_name = os.path.splitext(os.path.basename(pdf_path))[0]
+        extension = ExtractionEngine.FORMAT_EXTENSIONS[self.output_format]
+        if self.output_format != "DOCX":
+            # DOCX files are zip archives already
+            extension += self.suffix
+        if self.output_layout == "mirror":
+            return os.path.join(self.output_path, self.mirrored_folder(pdf_path), base_name + extension)
+        if self.output_layout == "sharded":
+            # 256 hashed subfolders keep directories small; the hash suffix keeps equal names apart
+            digest = hashlib.sha1(os.path.abspath(pdf_path).encode("utf-8", "surrogatepass")).hexdigest()
+            return os.path.join(self.output_path, digest[:2], f"{base_name}-{digest[2:10]}{extension}")
+        return os.path.join(self.output_path, base_name + extension)
+
+    def mirrored_folder(self, pdf_path):
+        """Folder of pdf_path relative to the input root; files outside it mirror their absolute folder."""
+        folder = os.path.dirname(os.path.abspath(pdf_path))
+        if self.input_root:
+            relative = os.path.relpath(folder, self.input_root) if os.path.splitdrive(folder)[0] == os.path.splitdrive(self.input_root)[0] else os.pardir
+            if relative != os.pardir and not relative.startswith(os.pardir + os.sep):
+                return "" if relative == os.curdir else relative
+        return os.path.splitdrive(folder)[1].lstrip("\\/")
+
+    def is_up_to_date(self, pdf_path, page_selection=None):
+        if (page_selection is not None and not page_selection.is_full()) or self.archive:
+            return False
+        try:
+            return os.path.getmtime(self.output_file_for(pdf_path)) >= os.path.getmtime(pdf_path)
+        except OSError:
+            return False
+
+# ExtractionEngine class for Qt-independent extraction shared by the GUI, headless runs and benchmarks
+class ExtractionEngine:
+    FORMAT_EXTENSIONS = {"TXT": ".txt", "HTML": ".html", "Markdown": ".md", "DOCX": ".docx"}
+    OUTPUT_LAYOUTS = {
+        "flat": "Flat",
+        "mirror": "Mirror input folders",
+        "sharded": "Sharded subfolders"
+    }
 
     class SpecialCharParser(HTMLParser):
+        TOP_PATTERN = re.compile(r"top:(-?[\d.]+)pt")
+
         def __init__(self):
             super().__init__()
             self.text = []
             self.in_sup = False
             self.in_sub = False
+            self.lines = []  # (top, first piece, end piece) of every <p> line
+            self.line_start = None
+            self.line_top = 0.0
 
         def handle_starttag(self, tag, attrs):
-            if tag == 'sup':
+            if tag == 'p':
+                self.line_start = len(self.text)
+                match = self.TOP_PATTERN.search(dict(attrs).get('style') or "")
+                self.line_top = float(match.group(1)) if match else 0.0
+            elif tag == 'sup':
                 self.in_sup = True
             elif tag == 'sub':
                 self.in_sub = True
 
         def handle_endtag(self, tag):
-            if tag == 'sup':
+            if tag == 'p' and self.line_start is not None:
+                self.lines.append((self.line_top, self.line_start, len(self.text)))
+                self.line_start = None
+            elif tag == 'sup':
                 self.in_sup = False
             elif tag == 'sub':
                 self.in_sub = False
@@ -603,122 +2224,286 @@ class ExtractionThread(QThread):
             else:
                 self.text.append(data)
 
-        def get_text(self):
-            return ''.join(self.text)
+        def line_text(self, index):
+            _, start, end = self.lines[index]
+            return ''.join(self.text[start:end])
 
-    def __init__(self, pdf_paths, output_path, extraction_mode, output_format):
-        super().__init__()
-        self.pdf_paths = pdf_paths
+        def get_text(self, skip_lines=()):
+            if not skip_lines:
+                return ''.join(self.text)
+            pieces = list(self.text)
+            for index in skip_lines:
+                _, start, end = self.lines[index]
+                pieces[start:end] = [""] * (end - start)
+                # Drop the line break after a removed line as well
+                if end < len(pieces) and pieces[end] == "\n":
+                    pieces[end] = ""
+            return ''.join(pieces)
+
+    def __init__(self, output_path, extraction_mode, output_format, recorder=None, page_selection=None, use_cache=True, ocr=None, layout=None, strip_boilerplate=False, normalize=None, output_layout="flat", input_root=None, compression=None, document_pool=None, use_mmap=None, memory=None, timeout=None, statistics=None, near_duplicates=None, writers=1):
+        if output_layout not in self.OUTPUT_LAYOUTS:
+            raise ValueError(f"Unknown output layout '{output_layout}'")
+        self.compression = dict(OutputWriter.DEFAULTS, **compression) if compression else None
+        if self.compression:
+            check_compression(self.compression["method"])
         self.output_path = output_path
         self.extraction_mode = extraction_mode
         self.output_format = output_format
+        self.recorder = recorder if recorder is not None else PerformanceRecorder()
+        self.page_selection = page_selection if page_selection is not None else PageSelection()
+        self.use_cache = use_cache
+        self.ocr = dict(OCRPool.DEFAULTS, **ocr) if ocr else None
+        self.ocr_pool = OCRPool(**self.ocr) if self.ocr else None
+        self.layout = ColumnLayout(**(layout or {}))
+        self.boilerplate = BoilerplateFilter() if strip_boilerplate else None
+        self.normalizer = TextNormalizer(**normalize) if normalize is not None else None
+        self.output_layout = output_layout
+        self.input_root = os.path.abspath(input_root) if input_root else None
+        self.naming = OutputNaming(output_path, output_format, output_layout, input_root, self.compression)
+        self.written_outputs = {}  # output file -> source PDF, to flag name clashes in flat layouts
+        self.writers = writers  # output writer threads; worker processes write one document at a time and keep one
+        self.writer = self.create_writer()
+        self.document_pool = document_pool if document_pool is not None else DOCUMENT_POOL
+        if use_mmap is not None:
+            # Worker processes get the setting of the process that owns the batch; the pool is theirs alone
+            self.document_pool.use_mmap = use_mmap
+        self.memory = MemoryGovernor(**(memory or {}))
+        self.timeout = timeout  # seconds a document may take, checked between pages
+        self.statistics = CorpusStatistics(**dict(CorpusStatistics.DEFAULTS, **statistics)) if statistics is not None else None
+        self.near_duplicates = (
+            NearDuplicateIndex(**dict(NearDuplicateIndex.DEFAULTS, **near_duplicates)) if near_duplicates is not None else None
+        )
 
-    def analyze_layout(self, page):
-        blocks = page.get_text("dict")
-        if not isinstance(blocks, dict) or "blocks" not in blocks:
-            return {"columns": 1, "boundaries": []}
-        blocks = blocks["blocks"]
-        page_width = page.rect.width
-        x_positions = []
-        for block in blocks:
-            if isinstance(block, dict) and "bbox" in block:
-                bbox = block["bbox"]
-                if len(bbox) >= 4:
-                    x_positions.extend([bbox[0], bbox[2]])
-        if not x_positions:
-            return {"columns": 1, "boundaries": []}
-        x_positions = sorted(set(x_positions))
-        gaps = []
-        for i in range(len(x_positions) - 1):
-            gap = x_positions[i + 1] - x_positions[i]
-            if gap > page_width * 0.08:
-                gaps.append((gap, x_positions[i]))
-        significant_gaps = [g for g in gaps if g[0] > page_width * 0.08]
+    def settings(self):
         return {
-            "columns": len(significant_gaps) + 1,
-            "boundaries": sorted([g[1] for g in significant_gaps])
+            "output_path": self.output_path,
+            "extraction_mode": self.extraction_mode,
+            "output_format": self.output_format,
+            "page_selection": self.page_selection,
+            "use_cache": self.use_cache,
+            "ocr": self.ocr,
+            "layout": self.layout.settings(),
+            "strip_boilerplate": self.boilerplate is not None,
+            "normalize": self.normalizer.settings() if self.normalizer is not None else None,
+            "output_layout": self.output_layout,
+            "input_root": self.input_root,
+            "compression": self.compression,
+            "use_mmap": self.document_pool.use_mmap,
+            "memory": self.memory.settings(),
+            "timeout": self.timeout,
+            "statistics": self.statistics.settings() if self.statistics is not None else None,
+            "near_duplicates": self.near_duplicates.settings() if self.near_duplicates is not None else None
         }
 
-    def extract_with_columns(self, page):
+    def create_writer(self):
+        compression = self.compression or OutputWriter.DEFAULTS
+        archive_path = None
+        if compression["archive"]:
+            # One solid archive per batch
+            archive_path = os.path.join(
+                self.output_path,
+                f"outputs-{time.strftime('%Y%m%d-%H%M%S')}.tar{OutputWriter.EXTENSIONS[compression['method']]}"
+            )
+        return OutputWriter(
+            compression["method"], compression["level"], compression["archive"], archive_path,
+            writers=self.writers, recorder=self.recorder
+        )
+
+    def flush(self):
+        """Waits for queued output writes; returns (pdf_path, file_path, message) for each failed one."""
+        return self.writer.flush()
+
+    def check_near_duplicate(self, pdf_path, texts, pages_left):
+        """Returns (original, similarity) for a near-duplicate; raises NearDuplicateFound to stop it when its remaining pages are skipped or deferred."""
+        index = self.near_duplicates
+        with self.recorder.stage("near_duplicates"):
+            signature = index.signature(texts)
+            match = index.check(pdf_path, signature) if signature is not None else None
+        if match is None:
+            return None
+        original, similarity = match
+        logging.info(f"{pdf_path} is a near-duplicate of {original} ({similarity:.0%} similar)")
+        if pages_left and index.action != "flag":
+            raise NearDuplicateFound(pdf_path, original, similarity)
+        return match
+
+    def statistics_folder(self):
+        return os.path.join(self.output_path, CorpusStatistics.FOLDER)
+
+    def begin_statistics(self):
+        """Called by batch runners before the first document; watch and service mode keep no statistics."""
+        if self.statistics is not None:
+            self.statistics.open_spool(self.statistics_folder())
+
+    def write_statistics(self):
+        """Writes the batch's frequency tables; returns the summary, or None when statistics are off."""
+        if self.statistics is None:
+            return None
         try:
-            html_text = page.get_text("html")
-            blocks = page.get_text("dict", sort=True)
-            self.analyze_layout(page)
-            parser = self.SpecialCharParser()
-            parser.feed(html_text)
-            special_chars_text = parser.get_text()
-            columns = defaultdict(list)
-            page_width = page.rect.width
-            page_height = page.rect.height
-            x_coordinates = []
-            for block in blocks["blocks"]:
-                if "bbox" in block:
-                    x_coordinates.extend([block["bbox"][0], block["bbox"][2]])
-            if x_coordinates:
-                x_coordinates.sort()
-                gaps = []
-                for i in range(len(x_coordinates) - 1):
-                    gap = x_coordinates[i + 1] - x_coordinates[i]
-                    if gap > page_width * 0.05:
-                        gaps.append((gap, (x_coordinates[i] + x_coordinates[i + 1]) / 2))
-                gaps.sort(reverse=True)
-                significant_gaps = [g for g in gaps if g[0] > page_width * 0.05]
-                column_boundaries = sorted([g[1] for g in significant_gaps[:2]])
-                for block in blocks["blocks"]:
-                    if "bbox" not in block or "lines" not in block:
-                        continue
-                    bbox = block["bbox"]
-                    block_center = (bbox[0] + bbox[2]) / 2
-                    col_idx = 0
-                    for boundary in column_boundaries:
-                        if block_center > boundary:
-                            col_idx += 1
-                    columns[col_idx].append((bbox[1], block))
-                final_text = ""
-                for col_idx in sorted(columns.keys()):
-                    col_blocks = sorted(columns[col_idx], key=lambda x: x[0])
-                    column_text = ""
-                    last_y = None
-                    for y_pos, block in col_blocks:
-                        if last_y is not None:
-                            gap = y_pos - last_y
-                            if gap > page_height * 0.02:
-                                column_text += "\n"
-                            if gap > page_height * 0.05:
-                                column_text += "\n"
-                        block_text = ""
-                        for line in block["lines"]:
-                            line_text = " ".join(span.get("text", "") for span in line.get("spans", []))
-                            if line_text.strip():
-                                block_text += line_text.strip() + " "
-                        column_text += block_text.strip() + "\n"
-                        last_y = y_pos + block["bbox"][3] - block["bbox"][1]
-                    if column_text.strip():
-                        if final_text:
-                            final_text += "\n\n"
-                        final_text += column_text.strip()
-                final_text = self.merge_special_characters(final_text, special_chars_text)
-                return final_text
-            return special_chars_text
+            return self.statistics.write(self.statistics_folder())
+        finally:
+            self.statistics.close()
+
+    def close(self):
+        """Finishes pending writes and stops the helper pools; returns failed writes like flush()."""
+        if self.ocr_pool is not None:
+            self.ocr_pool.shutdown()
+        return self.writer.close()
+
+    def cache_variant(self):
+        """Identifies the extraction settings that change page text, so cached pages are never mixed."""
+        variant = self.extraction_mode
+        if self.extraction_mode == "Column-aware":
+            layout = self.layout
+            variant += f":{layout.min_gutter}:{layout.max_columns}:{layout.spanning_lines}"
+        if self.boilerplate is not None:
+            variant += ":strip"
+        if self.normalizer is not None:
+            variant += f":norm-{self.normalizer.variant()}"
+        if self.ocr is not None:
+            # OCR'd pages depend on the engine, language and resolution; without OCR they stay empty
+            variant += f":ocr-{self.ocr['engine']}-{self.ocr['language']}-{self.ocr['dpi']}"
+        return variant
+
+    def open_page_cache(self):
+        if not self.use_cache:
+            return None
+        try:
+            return PageCache(os.path.join(self.output_path, PageCache.FILE_NAME))
         except Exception as e:
-            return f"Error in column extraction: {str(e)}"
+            logging.warning(f"Page cache unavailable, extracting without it: {str(e)}")
+            return None
 
-    def extract_with_layout(self, page):
+    def extract_with_columns(self, page, textpage=None):
+        """Runs the expensive Column-aware steps; finish_columns() turns the draft into text."""
+        draft = {"page": page, "parser": None, "blocks": None, "gutters": None, "error": None}
         try:
-            html_text = page.get_text("html")
-            parser = self.SpecialCharParser()
-            parser.feed(html_text)
-            text = parser.get_text()
-            text = text.replace('\u200b', '')
-            text = text.strip()
-            return text
+            recorder = self.recorder
+            with recorder.stage("get_text_html"):
+                html_text = page.get_text("html", textpage=textpage)
+            with recorder.stage("get_text_dict"):
+                blocks = page.get_text("dict", sort=True, textpage=textpage)["blocks"]
+            with recorder.stage("html_parse"):
+                parser = self.SpecialCharParser()
+                parser.feed(html_text)
+            draft["parser"] = parser
+            if any("bbox" in block for block in blocks):
+                with recorder.stage("layout_analysis"):
+                    draft["gutters"], _ = self.layout.gutters_for(page, blocks)
+                draft["blocks"] = blocks
         except Exception as e:
-            return f"Error extracting text with layout: {str(e)}"
+            # Raised by finish_page, so the document fails and DocumentRunner can retry it in another mode
+            draft["error"] = f"Error in column extraction on page {page.number + 1}: {str(e)}"
+        return draft
 
-    def merge_special_characters(self, column_text, special_text):
-        if not column_text.strip():
-            return special_text
-        if not special_text.strip():
+    def finish_columns(self, draft, skip_lines=()):
+        try:
+            recorder = self.recorder
+            parser = draft["parser"]
+            special_chars_text = parser.get_text(skip_lines)
+            blocks = draft["blocks"]
+            if blocks is None:
+                return special_chars_text
+            page = draft["page"]
+            if skip_lines:
+                blocks = self.remove_lines(blocks, {self.boilerplate.normalize(parser.line_text(index)) for index in skip_lines}, page.rect.height)
+            with recorder.stage("column_assembly"):
+                final_text = self.assemble_columns(page, blocks, draft["gutters"])
+            with recorder.stage("merge"):
+                return self.merge_special_characters(final_text, special_chars_text)
+        except Exception as e:
+            raise PageExtractionError(f"Error in column extraction on page {draft['page'].number + 1}: {str(e)}") from e
+
+    def remove_lines(self, blocks, texts, page_height):
+        """Drops lines in the header and footer bands whose normalized text is in texts."""
+        band = self.boilerplate.band * page_height
+        kept_blocks = []
+        for block in blocks:
+            if "lines" in block:
+                lines = [
+                    line for line in block["lines"]
+                    if band < line["bbox"][1] < page_height - band
+                    or self.boilerplate.normalize(" ".join(span.get("text", "") for span in line.get("spans", []))) not in texts
+                ]
+                if not lines:
+                    continue
+                if len(lines) != len(block["lines"]):
+                    block = dict(block, lines=lines)
+            kept_blocks.append(block)
+        return kept_blocks
+
+    def assemble_columns(self, page, blocks, gutters):
+        # Blocks running across a gutter (titles, abstracts, footers) are read before or after the columns
+        heading = []
+        trailing = []
+        columns = defaultdict(list)
+        boundaries = [(left + right) / 2 for left, right in gutters]
+        column_blocks = [block for block in blocks if "lines" in block]
+        spanning = {
+            id(block) for block in column_blocks
+            if any(block["bbox"][0] < left and block["bbox"][2] > right for left, right in gutters)
+        }
+        column_top = min(
+            (block["bbox"][1] for block in column_blocks if id(block) not in spanning),
+            default=float("inf")
+        )
+        for block in column_blocks:
+            bbox = block["bbox"]
+            if id(block) in spanning:
+                (heading if bbox[1] < column_top else trailing).append((bbox[1], block))
+                continue
+            block_center = (bbox[0] + bbox[2]) / 2
+            columns[bisect.bisect_right(boundaries, block_center)].append((bbox[1], block))
+        sections = [heading] + [columns[col_idx] for col_idx in sorted(columns)] + [trailing]
+        page_height = page.rect.height
+        final_text = ""
+        for section in sections:
+            column_text = ""
+            last_y = None
+            for y_pos, block in sorted(section, key=lambda x: x[0]):
+                if last_y is not None:
+                    gap = y_pos - last_y
+                    if gap > page_height * 0.02:
+                        column_text += "\n"
+                    if gap > page_height * 0.05:
+                        column_text += "\n"
+                block_text = ""
+                for line in block["lines"]:
+                    line_text = " ".join(span.get("text", "") for span in line.get("spans", []))
+                    if line_text.strip():
+                        block_text += line_text.strip() + " "
+                column_text += block_text.strip() + "\n"
+                last_y = y_pos + block["bbox"][3] - block["bbox"][1]
+            if column_text.strip():
+                if final_text:
+                    final_text += "\n\n"
+                final_text += column_text.strip()
+        return final_text
+
+    def extract_with_layout(self, page, textpage=None):
+        """Runs the expensive Layout-preserved steps; finish_layout() turns the draft into text."""
+        draft = {"page": page, "parser": None, "error": None}
+        try:
+            with self.recorder.stage("get_text_html"):
+                html_text = page.get_text("html", textpage=textpage)
+            with self.recorder.stage("html_parse"):
+                parser = self.SpecialCharParser()
+                parser.feed(html_text)
+            draft["parser"] = parser
+        except Exception as e:
+            draft["error"] = f"Error extracting text with layout on page {page.number + 1}: {str(e)}"
+        return draft
+
+    def finish_layout(self, draft, skip_lines=()):
+        text = draft["parser"].get_text(skip_lines)
+        text = text.replace('\u200b', '')
+        text = text.strip()
+        return text
+
+    def merge_special_characters(self, column_text, special_text):
+        if not column_text.strip():
+            return special_text
+        if not special_text.strip():
             return column_text
         words_special = special_text.split()
         words_column = column_text.split()
@@ -736,16 +2521,11 @@ class ExtractionThread(QThread):
         merged.extend(words_column[i:])
         return ' '.join(merged)
 
-    def save_as_format(self, text, output_path, pdf_path):
+    def save_as_format(self, text, pdf_path):
         try:
-            base_name = os.path.splitext(os.path.basename(pdf_path))[0]
-            if self.output_format == "TXT":
-                file_path = os.path.join(output_path, f"{base_name}.txt")
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(text)
-            elif self.output_format == "HTML":
-                file_path = os.path.join(output_path, f"{base_name}.html")
-                html_content = f"""
+            file_path = self.output_file_for(pdf_path)
+            if self.output_format == "HTML":
+                text = f"""
                 <!DOCTYPE html>
                 <html>
                 <head>
@@ -768,50 +2548,907 @@ class ExtractionThread(QThread):
                 </body>
                 </html>
                 """
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(html_content)
-            elif self.output_format == "Markdown":
-                file_path = os.path.join(output_path, f"{base_name}.md")
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(text)
-            elif self.output_format == "DOCX":
-                file_path = os.path.join(output_path, f"{base_name}.docx")
-                document = Document()
-                for line in text.split('\n'):
-                    document.add_paragraph(line)
-                document.save(file_path)
+            if self.output_format == "DOCX":
+                def write_docx(temp_path):
+                    document = Document()
+                    for line in text.split('\n'):
+                        document.add_paragraph(line)
+                    document.save(temp_path)
+                self.writer.submit(pdf_path, file_path, write_docx, self.recorder.current_document)
+            else:
+                self.writer.submit(pdf_path, file_path, text, self.recorder.current_document)
+            previous_source = self.written_outputs.setdefault(file_path, pdf_path)
+            if previous_source != pdf_path:
+                logging.warning(f"{pdf_path} overwrote the output of {previous_source} ({file_path}); use the mirror or sharded output layout to keep both")
+                self.written_outputs[file_path] = pdf_path
+            if self.writer.archive and self.output_format != "DOCX":
+                return self.writer.archive_path
             return file_path
         except Exception as e:
             raise Exception(f"Error saving file: {str(e)}")
 
+    def output_file_for(self, pdf_path):
+        return self.naming.output_file_for(pdf_path)
+
+    def is_up_to_date(self, pdf_path):
+        return self.naming.is_up_to_date(pdf_path, self.page_selection)
+
+    def classify_page(self, page):
+        """Cheaply checks for a text layer; returns (kind, character count, reusable TextPage or None)."""
+        with self.recorder.stage("classify"):
+            # Text needs a font, so pages without font resources cannot have a text layer
+            if page.get_fonts():
+                # HTML and dict output use the same flags, so one TextPage serves both
+                textpage = page.get_textpage(flags=fitz.TEXTFLAGS_DICT)
+                char_count = len(textpage.extractText().strip())
+                if char_count:
+                    return PAGE_TEXT, char_count, textpage
+            if page.get_images():
+                return PAGE_IMAGE, 0, None
+            return PAGE_EMPTY, 0, None
+
+    def extract_page(self, page):
+        """Returns (draft, page kind); image-only and empty pages skip the extraction pipeline and get no draft."""
+        kind, char_count, textpage = self.classify_page(page)
+        if kind != PAGE_TEXT:
+            return None, kind
+        if self.extraction_mode == "Column-aware":
+            return self.extract_with_columns(page, textpage), kind
+        return self.extract_with_layout(page, textpage), kind
+
+    def finish_page(self, draft, skip_lines=()):
+        """Builds the text of an extracted page, leaving out the given parser lines; raises PageExtractionError for a failed page."""
+        if draft is None:
+            return ""
+        if draft["error"] is not None:
+            raise PageExtractionError(draft["error"])
+        if self.extraction_mode == "Column-aware":
+            text = self.finish_columns(draft, skip_lines)
+        else:
+            text = self.finish_layout(draft, skip_lines)
+        if self.normalizer is not None and text:
+            with self.recorder.stage("normalize"):
+                text = self.normalizer.normalize(text)
+        return text
+
+    def prime_boilerplate(self, doc, selected_pages, cached_texts):
+        """Shows the boilerplate filter some cached pages when too few pages will be extracted for it to warm up."""
+        boilerplate = self.boilerplate
+        extracting = sum(1 for page_num in selected_pages if page_num not in cached_texts)
+        missing = boilerplate.warmup_pages - extracting
+        if extracting == 0 or missing <= 0:
+            return
+        with self.recorder.stage("boilerplate"):
+            for page_num in [page_num for page_num in selected_pages if page_num in cached_texts][:missing]:
+                page = doc.load_page(page_num)
+                draft, kind = self.extract_page(page)
+                if draft is not None and draft["parser"] is not None:
+                    boilerplate.observe(boilerplate.candidates(draft["parser"], page.rect.height))
+
+    def process_document(self, pdf_path, on_open=None, on_page=None, prefetched=None):
+        recorder = self.recorder
+        recorder.begin_document(pdf_path)
+        self.layout.reset()
+        boilerplate = self.boilerplate
+        if boilerplate is not None:
+            boilerplate.reset()
+        self.memory.begin_document()
+        statistics = self.statistics
+        if statistics is not None:
+            statistics.begin_document()
+        deadline = time.monotonic() + self.timeout if self.timeout else None
+        with recorder.stage("open"):
+            doc = self.document_pool.acquire(pdf_path, prefetched)
+        cache = self.open_page_cache()
+        try:
+            if on_open is not None:
+                on_open(doc)
+            total_pages = doc.page_count
+            selected_pages = self.page_selection.pages(total_pages)
+            cached_texts = {}
+            # Pages cached for an older version of the file, reused once their fingerprint shows they did not change
+            stale_pages = {}
+            revalidated = []
+            fingerprints = {}
+            shared_digests = {}
+            if cache is not None:
+                with recorder.stage("cache"):
+                    signature = PageCache.signature(pdf_path)
+                    for page_num, (text, kind, cached_signature, fingerprint) in cache.load(pdf_path, self.cache_variant()).items():
+                        if cached_signature == signature:
+                            cached_texts[page_num] = (text, kind)
+                        elif fingerprint is not None:
+                            stale_pages[page_num] = (text, kind, fingerprint)
+                if stale_pages:
+                    with recorder.stage("fingerprint"):
+                        for page_num in selected_pages:
+                            stale = stale_pages.get(page_num)
+                            if stale is None or page_num in cached_texts:
+                                continue
+                            fingerprint = PageCache.fingerprint(doc.load_page(page_num), shared_digests)
+                            fingerprints[page_num] = fingerprint
+                            if fingerprint == stale[2]:
+                                cached_texts[page_num] = stale[:2]
+                                revalidated.append(page_num)
+                    logging.info(
+                        f"{pdf_path} changed since it was cached: reusing {len(revalidated)} of "
+                        f"{len(fingerprints)} fingerprinted pages"
+                    )
+                if boilerplate is not None and cached_texts:
+                    self.prime_boilerplate(doc, selected_pages, cached_texts)
+            page_texts = []
+            new_texts = []
+            page_kinds = defaultdict(int)
+            # Pages wait here until the boilerplate filter has seen its warm-up window, then stream straight through
+            pending = deque()
+            # Pages finished before the filter saw enough of the document, e.g. in a short sample; not cached
+            provisional = set()
+            # First pages of text, compared against the documents already extracted once there are enough of them
+            sample = [] if self.near_duplicates is not None else None
+            duplicate_of = None
+
+            def emit(position, page_num, kind, text, draft, candidates):
+                nonlocal sample, duplicate_of
+                recorder.begin_page(page_num)
+                if text is None:
+                    skip_lines = boilerplate.boilerplate_lines(candidates) if candidates else ()
+                    # Raises for a failed page, so error text never reaches new_texts and the page cache
+                    text = self.finish_page(draft, skip_lines)
+                    if kind != PAGE_IMAGE or self.ocr_pool is None:
+                        new_texts.append((page_num, text, kind))
+                    if boilerplate is not None and not boilerplate.ready() and boilerplate.pages_seen < total_pages:
+                        provisional.add(page_num)
+                if kind == PAGE_IMAGE and self.ocr_pool is not None:
+                    # Counted and cached once its OCR text arrives
+                    self.ocr_pool.submit(pdf_path, page_num)
+                else:
+                    page_kinds[kind] += 1
+                    recorder.count_page(kind)
+                if text.strip():
+                    page_texts.append((page_num, text))
+                    recorder.first_text()
+                    if statistics is not None:
+                        with recorder.stage("statistics"):
+                            statistics.add_page(text)
+                    if sample is not None:
+                        sample.append(text)
+                        if len(sample) >= self.near_duplicates.sample_pages:
+                            duplicate_of = self.check_near_duplicate(pdf_path, sample, position + 1 < len(selected_pages))
+                            sample = None
+                logging.debug("Extracted page %d/%d of %s (%d chars)", page_num + 1, total_pages, pdf_path, len(text))
+                if on_page is not None:
+                    on_page(position + 1, len(selected_pages), page_num, text)
+
+            def collect_ocr():
+                recorder.begin_page(None)
+                with recorder.stage("ocr_wait"):
+                    ocr_results = self.ocr_pool.drain()
+                for page_num, text, start_ns, duration_ns in ocr_results:
+                    recorder.begin_page(page_num)
+                    # A failed page stays image-only, so the next OCR run retries it
+                    kind = PAGE_OCR if text is not None else PAGE_IMAGE
+                    if self.normalizer is not None and text:
+                        text = self.normalizer.normalize(text)
+                    if recorder.enabled and text is not None:
+                        recorder.record("ocr", start_ns, duration_ns)
+                    recorder.count_page(kind)
+                    page_kinds[kind] += 1
+                    new_texts.append((page_num, text or "", kind))
+                    if text:
+                        page_texts.append((page_num, text))
+                        if statistics is not None:
+                            with recorder.stage("statistics"):
+                                statistics.add_page(text)
+                if ocr_results:
+                    page_texts.sort(key=lambda item: item[0])
+
+            def store_pages():
+                recorder.begin_page(None)
+                if cache is not None and (new_texts or revalidated):
+                    with recorder.stage("cache"):
+                        cache.store(
+                            pdf_path, signature, self.cache_variant(),
+                            [
+                                (page_num, text, kind, fingerprints.get(page_num))
+                                for page_num, text, kind in new_texts if page_num not in provisional
+                            ],
+                            revalidated, total_pages
+                        )
+
+            for position, page_num in enumerate(selected_pages):
+                self.memory.check(pdf_path, position)
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TimeoutError(
+                        f"{os.path.basename(pdf_path)} took longer than {self.timeout:.0f} s (stopped at page {page_num + 1})"
+                    )
+                recorder.begin_page(page_num)
+                cached = cached_texts.get(page_num)
+                draft = None
+                candidates = None
+                if cached is not None:
+                    text, kind = cached
+                else:
+                    text = None
+                    with recorder.stage("load_page"):
+                        page = doc.load_page(page_num)
+                    draft, kind = self.extract_page(page)
+                    if cache is not None and page_num not in fingerprints:
+                        with recorder.stage("fingerprint"):
+                            fingerprints[page_num] = PageCache.fingerprint(page, shared_digests)
+                    if boilerplate is not None and draft is not None and draft["parser"] is not None:
+                        with recorder.stage("boilerplate"):
+                            candidates = boilerplate.candidates(draft["parser"], page.rect.height)
+                            boilerplate.observe(candidates)
+                pending.append((position, page_num, kind, text, draft, candidates))
+                if boilerplate is None or boilerplate.ready():
+                    while pending:
+                        emit(*pending.popleft())
+            while pending:
+                emit(*pending.popleft())
+            if sample:
+                # Shorter than the sample: indexed, and only flagged since there is nothing left to skip
+                duplicate_of = self.check_near_duplicate(pdf_path, sample, False)
+            if self.ocr_pool is not None:
+                collect_ocr()
+            store_pages()
+            # Formatting and queueing; the write itself is timed on the writer thread
+            with recorder.stage("write_queue"):
+                output_file = self.save_as_format(format_page_texts(page_texts), pdf_path)
+            if statistics is not None:
+                # Only documents that made it to the output are counted
+                statistics.end_document(pdf_path)
+            recorder.end_document(len(selected_pages))
+            return {
+                "pdf_path": pdf_path,
+                "output_file": output_file,
+                "page_count": total_pages,
+                "selected_pages": len(selected_pages),
+                "cached_pages": len(selected_pages) - len(new_texts),
+                "revalidated_pages": len(revalidated),
+                "page_kinds": dict(page_kinds),
+                "layout_profiles": dict(self.layout.stats),
+                "boilerplate_lines": boilerplate.stripped_lines if boilerplate is not None else 0,
+                "near_duplicate": duplicate_of,
+                "page_texts": page_texts
+            }
+        except NearDuplicateFound:
+            # The pages extracted for the comparison are cached, so the deferred run, or a later full one, starts from them
+            if self.ocr_pool is not None:
+                collect_ocr()
+            store_pages()
+            raise
+        finally:
+            if cache is not None:
+                cache.close()
+            self.document_pool.release(doc)
+            with recorder.stage("memory"):
+                self.memory.after_document()
+
+# ExtractionScheduler class for ordering a batch: shortest document first, with priorities and interactive boosts
+class ExtractionScheduler:
+    POLICIES = ("sjf", "fifo")
+    BOOST = 1000  # above any priority set programmatically, so the document the user waits on runs next
+    BYTES_PER_PAGE = 16 * 1024  # rough size of a text page, to order documents whose pages are not counted yet
+
+    def __init__(self, pdf_paths, policy="sjf"):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown scheduling policy '{policy}'")
+        self.policy = policy
+        self.order = list(pdf_paths)
+        self.positions = {path: position for position, path in reversed(list(enumerate(self.order)))}
+        self.costs = {}
+        self.priorities = {}
+        self.pending = set(self.order)
+        self.boosts = 0
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.results = {}  # path -> (time to result, extraction seconds)
+        # Set once the batch is over, so the background page count does not keep opening files
+        self.stopped = threading.Event()
+        self.rebuild()
+
+    def estimate(self, page_selection=None, background=True):
+        """Orders documents by file size at once, then by their (selected) page count as it is read in the background;
+        the cost shortest-job-first orders by."""
+        if self.policy != "sjf":
+            return
+        costs = {}
+        for path in self.order:
+            try:
+                costs[path] = self.selected_pages(max(1, os.path.getsize(path) // self.BYTES_PER_PAGE), page_selection)
+            except OSError:
+                costs[path] = 0
+        with self.lock:
+            self.costs = costs
+            self.rebuild()
+        if background:
+            # Counting pages means opening every file, which would hold back the first document of a large batch
+            threading.Thread(target=self.count_pages, args=(page_selection,), name="PageCounter", daemon=True).start()
+        else:
+            self.count_pages(page_selection)
+
+    @staticmethod
+    def selected_pages(page_count, page_selection):
+        return len(page_selection.pages(page_count)) if page_selection is not None else page_count
+
+    def count_pages(self, page_selection):
+        for path in self.order:
+            if self.stopped.is_set():
+                return
+            if path not in self.pending:
+                continue
+            try:
+                # Through the pool, so the document is already parsed when its turn comes
+                with DOCUMENT_POOL.document(path) as doc:
+                    cost = self.selected_pages(doc.page_count, page_selection)
+            except Exception as e:
+                # Unreadable files go first, so they fail in seconds rather than after the whole batch
+                logging.warning(f"Could not count pages of {path}: {str(e)}")
+                cost = 0
+            with self.lock:
+                if path in self.pending and self.costs.get(path) != cost:
+                    self.costs[path] = cost
+                    # The old heap entry goes stale and is skipped when popped
+                    heapq.heappush(self.heap, self.entry(path))
+
+    def stop(self):
+        """Ends the background page count after the document it is counting; call when the batch finishes, fails or is cancelled."""
+        self.stopped.set()
+
+    def entry(self, path):
+        cost = self.costs.get(path, 0) if self.policy == "sjf" else 0
+        return (-self.priorities.get(path, 0), cost, self.positions[path], path)
+
+    def rebuild(self):
+        self.heap = [self.entry(path) for path in self.pending]
+        heapq.heapify(self.heap)
+
+    def set_priority(self, path, priority):
+        """Raises or lowers a queued document; returns False once it has already started."""
+        with self.lock:
+            if path not in self.pending:
+                return False
+            self.priorities[path] = priority
+            # The old heap entry goes stale and is skipped when popped
+            heapq.heappush(self.heap, self.entry(path))
+            return True
+
+    def boost(self, path):
+        """Moves a queued document to the front; the most recently boosted one goes first."""
+        self.boosts += 1
+        return self.set_priority(path, self.BOOST + self.boosts)
+
+    def next(self):
+        with self.lock:
+            while self.heap:
+                entry = heapq.heappop(self.heap)
+                path = entry[3]
+                if path in self.pending and entry == self.entry(path):
+                    self.pending.discard(path)
+                    return path
+            return None
+
+    def complete(self, path, seconds):
+        self.results[path] = (time.perf_counter() - self.started, seconds)
+
+    def summary(self):
+        """Mean time to result of this run, next to what running the batch in file order would have given."""
+        if not self.results:
+            return None
+        waits = [result[0] for result in self.results.values()]
+        # Replays the measured extraction times in file order
+        in_order = list(accumulate(self.results[path][1] for path in self.order if path in self.results))
+        return {
+            "policy": self.policy,
+            "documents": len(waits),
+            "mean_time_to_result": sum(waits) / len(waits),
+            "file_order_mean_time_to_result": sum(in_order) / len(in_order)
+        }
+
+def isolated_worker(connection, log_queue):
+    """Entry point of the DocumentRunner worker process: extracts documents sent over the pipe until told to stop."""
+    configure_worker_logging(log_queue)
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        settings, pdf_path = message
+
+        def on_page(done, total_pages, page_num, text):
+            connection.send(("page", (done, total_pages, page_num, text)))
+
+        def check_near_duplicate(pdf_path, signature):
+            connection.send(("near_duplicate", (pdf_path, signature)))
+            return connection.recv()
+
+        try:
+            connection.send(("result", extract_document(settings, pdf_path, on_page, check_near_duplicate)))
+        except NearDuplicateFound as e:
+            connection.send(("duplicate", (e.original, e.similarity)))
+        except Exception as e:
+            connection.send(("error", f"{type(e).__name__}: {str(e)}"))
+
+# DocumentRunner class for extracting each document as an isolated unit: a time limit, a killable worker, a simpler retry
+class DocumentRunner:
+    FALLBACK_MODES = {"Column-aware": "Layout-preserved"}
+    DEFAULT_TIMEOUT = 600  # seconds, the GUI's limit for a document
+    KILL_GRACE = 10  # seconds past the time limit before a worker stuck inside MuPDF is killed
+    REPORT_NAME = "extraction_failures.json"
+
+    def __init__(self, engine, isolate=False, retry=True):
+        self.engine = engine
+        self.isolate = isolate
+        self.retry = retry
+        self.worker = None  # (process, connection) when documents run out of process
+        self.governor = MemoryGovernor(**engine.memory.settings())
+        self.failures = []
+
+    def modes(self):
+        fallback = self.FALLBACK_MODES.get(self.engine.extraction_mode) if self.retry else None
+        return [self.engine.extraction_mode] + ([fallback] if fallback else [])
+
+    def run(self, pdf_path, on_open=None, on_page=None, prefetched=None):
+        """Returns the document's result, or None once every attempt failed; failures are recorded, never raised.
+
+        NearDuplicateFound is passed on to the caller.
+        """
+        attempts = []
+        for mode in self.modes():
+            start = time.perf_counter()
+            try:
+                if self.isolate:
+                    result = self.run_isolated(pdf_path, mode, on_page)
+                else:
+                    result = self.run_inline(pdf_path, mode, on_open, on_page, prefetched)
+            except NearDuplicateFound:
+                # Not a failure; the caller skips or defers the document
+                raise
+            except Exception as e:
+                # Errors from the worker process arrive already labelled with their type
+                error = str(e) if isinstance(e, ChildProcessError) else f"{type(e).__name__}: {str(e)}"
+                attempts.append({"mode": mode, "error": error, "seconds": round(time.perf_counter() - start, 3)})
+                logging.warning(f"{mode} extraction failed for {pdf_path}: {error}")
+                continue
+            if attempts:
+                logging.info(f"Extracted {pdf_path} in {mode} mode after {attempts[-1]['mode']} failed")
+            result["mode"] = mode
+            result["failed_attempts"] = attempts
+            return result
+        self.failures.append({"pdf_path": pdf_path, "time": time.strftime("%Y-%m-%d %H:%M:%S"), "attempts": attempts})
+        return None
+
+    def run_inline(self, pdf_path, mode, on_open, on_page, prefetched=None):
+        engine = self.engine
+        original_mode = engine.extraction_mode
+        engine.extraction_mode = mode
+        try:
+            return engine.process_document(pdf_path, on_open, on_page, prefetched)
+        except Exception:
+            engine.recorder.end_document(0)
+            raise
+        finally:
+            engine.extraction_mode = original_mode
+
+    def start_worker(self):
+        parent_connection, child_connection = MP_CONTEXT.Pipe()
+        process = MP_CONTEXT.Process(
+            target=isolated_worker, args=(child_connection, get_worker_log_queue()), name="DocumentWorker", daemon=True
+        )
+        process.start()
+        child_connection.close()
+        self.worker = (process, parent_connection)
+
+    def stop_worker(self, kill=False):
+        if self.worker is None:
+            return
+        process, connection = self.worker
+        self.worker = None
+        try:
+            if kill:
+                process.kill()
+            else:
+                connection.send(None)
+        except (OSError, ValueError):
+            pass
+        process.join(timeout=5)
+        if process.is_alive():
+            process.kill()
+            process.join()
+        connection.close()
+
+    def run_isolated(self, pdf_path, mode, on_page):
+        """Runs the document in the worker process (no preview: opening a hostile file here could hang the caller too)."""
+        if self.worker is None:
+            self.start_worker()
+        process, connection = self.worker
+        settings = dict(self.engine.settings(), extraction_mode=mode)
+        timeout = self.engine.timeout
+        deadline = time.monotonic() + timeout + self.KILL_GRACE if timeout else None
+        connection.send((settings, pdf_path))
+        while True:
+            wait = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                ready = connection.poll(wait)
+                message = connection.recv() if ready else None
+            except (EOFError, OSError):
+                code = process.exitcode if process.exitcode is not None else process.join(1) or process.exitcode
+                self.stop_worker(kill=True)
+                raise ChildProcessError(f"WorkerDied: the worker process exited with code {code}")
+            if message is None:
+                self.stop_worker(kill=True)
+                raise TimeoutError(f"{os.path.basename(pdf_path)} hung for more than {timeout + self.KILL_GRACE:.0f} s; worker killed")
+            kind, payload = message
+            if kind == "page":
+                if on_page is not None:
+                    on_page(*payload)
+            elif kind == "near_duplicate":
+                connection.send(self.engine.near_duplicates.check(*payload))
+            elif kind == "duplicate":
+                raise NearDuplicateFound(pdf_path, *payload)
+            elif kind == "error":
+                raise ChildProcessError(payload)
+            else:
+                statistics = payload.pop("statistics", None)
+                if statistics is not None and self.engine.statistics is not None:
+                    self.engine.statistics.merge(statistics)
+                reason = self.governor.worker_finished(payload.get("rss_mb"), 1)
+                if reason:
+                    logging.info(f"Replacing the document worker: {reason}")
+                    self.stop_worker()
+                return payload
+
+    def write_report(self, output_path):
+        """Writes the batch's failures next to its outputs; returns the report path, or None when nothing failed."""
+        report_path = os.path.join(output_path, self.REPORT_NAME)
+        if not self.failures:
+            # A report from an earlier batch would be mistaken for this one
+            if os.path.exists(report_path):
+                os.remove(report_path)
+            return None
+
+        def write(temp_path):
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"failures": self.failures}, f, indent=1)
+
+        os.makedirs(output_path, exist_ok=True)
+        write_atomically(report_path, write)
+        return report_path
+
+    def close(self):
+        self.stop_worker()
+
+# PipelineMonitor class for measuring how each pipeline stage spent the batch: working, starved for input or blocked
+class PipelineMonitor:
+    STAGES = ("read", "extract", "write")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = {name: {"workers": 1, "items": 0, "busy": 0.0, "starved": 0.0, "blocked": 0.0} for name in self.STAGES}
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def add(self, stage, busy=0.0, starved=0.0, blocked=0.0, items=0):
+        with self.lock:
+            counters = self.stages[stage]
+            counters["busy"] += busy
+            counters["starved"] += starved
+            counters["blocked"] += blocked
+            counters["items"] += items
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    def utilization(self):
+        """Each stage's seconds as a share of the time its threads were there for."""
+        seconds = (self.finished or time.perf_counter()) - self.started
+        stages = {}
+        with self.lock:
+            for name, counters in self.stages.items():
+                capacity = max(seconds * counters["workers"], 1e-9)
+                stages[name] = {
+                    "workers": counters["workers"],
+                    "items": counters["items"],
+                    "busy": min(counters["busy"] / capacity, 1.0),
+                    "starved": min(counters["starved"] / capacity, 1.0),
+                    "blocked": min(counters["blocked"] / capacity, 1.0)
+                }
+        return {"seconds": seconds, "stages": stages}
+
+# ExtractionPipeline class for overlapping document reads, extraction and output writes through bounded queues
+class ExtractionPipeline:
+    DEFAULTS = {"prefetch": 4, "readers": 2, "writers": 2}
+    MAX_DOCUMENT_MB = 64  # larger files are opened from disk when their turn comes rather than held in memory
+
+    def __init__(self, runner, scheduler, prefetch=4, readers=2, writers=2):
+        self.runner = runner
+        self.scheduler = scheduler
+        self.prefetch = prefetch
+        self.readers = readers if prefetch else 0
+        # Isolated documents are opened by the worker process, and memory-mapped ones straight from the file,
+        # so for them reading ahead only warms the file cache
+        self.keep_data = not runner.isolate and not runner.engine.document_pool.use_mmap
+        # Documents are numbered in scheduler order as readers take them, and handed out in that order
+        # whichever read finishes first; at most `prefetch` of them are taken and not yet handed out
+        self.condition = threading.Condition()
+        self.ready = {}  # sequence number -> (pdf_path, prefetched)
+        self.issued = 0
+        self.taken = 0
+        self.exhausted = None  # sequence number at which the scheduler ran dry
+        self.stopping = False
+        self.threads = []
+        self.monitor = PipelineMonitor()
+        self.monitor.stages["read"]["workers"] = self.readers
+        self.monitor.stages["write"]["workers"] = runner.engine.writer.writers
+        runner.engine.writer.monitor = self.monitor
+
+    def start(self):
+        self.monitor.started = time.perf_counter()
+        for number in range(self.readers):
+            thread = threading.Thread(target=self.read_ahead, name=f"DocumentReader-{number + 1}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def read_ahead(self):
+        condition = self.condition
+        while True:
+            start = time.perf_counter()
+            with condition:
+                # Backpressure: wait while extraction has enough documents in hand
+                while not self.stopping and self.exhausted is None and self.issued - self.taken >= self.prefetch:
+                    condition.wait()
+                if self.stopping or self.exhausted is not None:
+                    return
+                blocked = time.perf_counter() - start
+                pdf_path = self.scheduler.next()
+                sequence = self.issued
+                if pdf_path is None:
+                    self.exhausted = sequence
+                    condition.notify_all()
+                    return
+                self.issued += 1
+            start = time.perf_counter()
+            try:
+                prefetched = self.read(pdf_path)
+            except Exception as e:
+                # Opened from disk instead; a hole in the sequence would stall the batch
+                logging.debug(f"Could not read {pdf_path} ahead: {str(e)}")
+                prefetched = None
+            self.monitor.add("read", busy=time.perf_counter() - start, blocked=blocked, items=1)
+            with condition:
+                self.ready[sequence] = (pdf_path, prefetched)
+                condition.notify_all()
+
+    def read(self, pdf_path):
+        """Returns (signature, data) for DocumentPool.acquire, or None to open the file from disk."""
+        try:
+            with open(pdf_path, "rb") as f:
+                stat = os.fstat(f.fileno())
+                if stat.st_size > self.MAX_DOCUMENT_MB * 1024 * 1024:
+                    return None
+                if not self.keep_data:
+                    while f.read(WRITE_BUFFER_SIZE):
+                        pass
+                    return None
+                data = f.read()
+        except OSError as e:
+            # Reported with the rest of the document's failure when extraction opens it
+            logging.debug(f"Could not read {pdf_path} ahead: {str(e)}")
+            return None
+        return (stat.st_size, stat.st_mtime_ns), data
+
+    def next(self):
+        """(pdf_path, prefetched) of the next document in scheduler order, or (None, None) once there are none left."""
+        if not self.readers:
+            return self.scheduler.next(), None
+        start = time.perf_counter()
+        with self.condition:
+            while self.taken not in self.ready and (self.exhausted is None or self.taken < self.exhausted):
+                self.condition.wait()
+            item = self.ready.pop(self.taken, None)
+            if item is not None:
+                self.taken += 1
+                self.condition.notify_all()
+        self.monitor.add("extract", starved=time.perf_counter() - start)
+        return item if item is not None else (None, None)
+
+    def run(self, pdf_path, on_open=None, on_page=None, prefetched=None):
+        """DocumentRunner.run, timed as the extract stage less the time it waited on the write queue."""
+        counters = self.monitor.stages["extract"]
+        blocked = counters["blocked"]
+        start = time.perf_counter()
+        try:
+            return self.runner.run(pdf_path, on_open, on_page, prefetched)
+        finally:
+            self.monitor.add("extract", busy=time.perf_counter() - start - (counters["blocked"] - blocked), items=1)
+
+    def close(self):
+        """Stops the readers and hands the batch's utilization to the recorder; call after the engine closed its writer."""
+        with self.condition:
+            self.stopping = True
+            self.ready.clear()
+            self.condition.notify_all()
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+        self.monitor.finish()
+        self.runner.engine.writer.monitor = None
+        self.runner.engine.recorder.pipeline = self.monitor.utilization()
+        return self.runner.engine.recorder.pipeline
+
+# ExtractionThread class for handling PDF extraction in a separate thread
+class ExtractionThread(QThread):
+    progress = Signal(int, str)
+    finished = Signal(str)
+    error = Signal(str)
+    preview_ready = Signal(object)
+    toast = Signal(str)
+    extracted_pages = Signal(str, object)
+    page_streamed = Signal(str, int, str)
+    document_status = Signal(str, str, object, object, str)
+    performance_summary = Signal(str)
+    failures_reported = Signal(int, str)
+    batch_finished = Signal()
+
+    def __init__(self, pdf_paths, output_path, extraction_mode, output_format, recorder=None, page_selection=None, use_cache=True, ocr=None, strip_boilerplate=False, normalize=None, output_layout="flat", compression=None, scheduling="sjf", timeout=None, isolate=False, retry=True, statistics=None, near_duplicates=None, pipeline=None):
+        super().__init__()
+        self.pdf_paths = pdf_paths
+        self.scheduler = ExtractionScheduler(pdf_paths, scheduling)
+        pipeline = dict(ExtractionPipeline.DEFAULTS, **(pipeline or {}))
+        self.engine = ExtractionEngine(
+            output_path, extraction_mode, output_format, recorder, page_selection, use_cache, ocr,
+            strip_boilerplate=strip_boilerplate, normalize=normalize,
+            output_layout=output_layout, input_root=common_folder(pdf_paths), compression=compression, timeout=timeout,
+            statistics=statistics, near_duplicates=near_duplicates, writers=pipeline["writers"]
+        )
+        self.recorder = self.engine.recorder
+        self.runner = DocumentRunner(self.engine, isolate, retry)
+        self.pipeline = ExtractionPipeline(self.runner, self.scheduler, **pipeline)
+        # A document is done once its output is on disk, which the writer threads report after extraction moved on
+        self.output_lock = threading.Lock()
+        self.awaiting_output = {}  # pdf_path -> (result, start) until its write finishes
+        self.written = {}  # pdf_path -> (file_path, error) for writes that finished before run() got to wait for them
+        self.engine.writer.on_written = self.output_written
+
     def run(self):
+        recorder = self.recorder
+        recorder.reset()
+        scheduler = self.scheduler
         try:
-            total_pdfs = len(self.pdf_paths)
-            for idx, pdf_path in enumerate(self.pdf_paths):
+            self.engine.begin_statistics()
+            total_pdfs = len(scheduler.order)
+            self.progress.emit(0, f"Counting pages of {total_pdfs} document(s)")
+            scheduler.estimate(self.engine.page_selection)
+            deferred = deque()
+            idx = 0  # documents finished so far
+            self.pipeline.start()
+            while True:
+                pdf_path, prefetched = self.pipeline.next()
+                if pdf_path is None:
+                    if not deferred:
+                        break
+                    # Near-duplicates come last, once every distinct document has its result
+                    pdf_path, prefetched = deferred.popleft(), None
                 self.progress.emit(int((idx / total_pdfs) * 100), f"Processing {os.path.basename(pdf_path)} ({idx + 1}/{total_pdfs})")
-                doc = fitz.open(pdf_path)
-                self.generate_preview(doc, pdf_path)
-                total_pages = doc.page_count
-                extracted_text = ""
-                for page_num in range(total_pages):
-                    page = doc.load_page(page_num)
-                    if self.extraction_mode == "Column-aware":
-                        text = self.extract_with_columns(page)
-                    else:
-                        text = self.extract_with_layout(page)
-                    if text is None:
-                        text = ""
+
+                def on_open(doc, pdf_path=pdf_path):
+                    with recorder.stage("preview"):
+                        self.generate_preview(doc, pdf_path)
+
+                def on_page(done, total_pages, page_num, text, idx=min(idx, total_pdfs - 1), pdf_path=pdf_path):
                     if text.strip():
-                        extracted_text += f"\n--- Page {page_num + 1} ---\n\n{text}\n\n"
-                    progress_percent = int(((idx + (page_num + 1)/total_pages) / total_pdfs) * 100)
-                    self.progress.emit(progress_percent, f"Processed page {page_num + 1} of {total_pages}")
-                output_file = self.save_as_format(extracted_text, self.output_path, pdf_path)
-                self.finished.emit(output_file)
-                self.extracted_text.emit(pdf_path, extracted_text)
-                self.toast.emit(f"Extraction complete for {os.path.basename(pdf_path)}")
-                doc.close()
+                        self.page_streamed.emit(pdf_path, page_num, text)
+                    progress_percent = int(((idx + done/total_pages) / total_pdfs) * 100)
+                    self.progress.emit(progress_percent, f"Processed page {page_num + 1} ({done} of {total_pages})")
+
+                self.document_status.emit(pdf_path, DocumentModel.RUNNING, None, None, "")
+                start = time.perf_counter()
+                try:
+                    result = self.pipeline.run(pdf_path, on_open, on_page, prefetched)
+                except NearDuplicateFound as e:
+                    if self.engine.near_duplicates.action == "defer":
+                        deferred.append(pdf_path)
+                        self.document_status.emit(pdf_path, DocumentModel.DUPLICATE, None, None, f"{str(e)}; deferred to the end of the batch")
+                    else:
+                        idx += 1
+                        scheduler.complete(pdf_path, time.perf_counter() - start)
+                        self.document_status.emit(pdf_path, DocumentModel.DUPLICATE, None, None, f"{str(e)}; skipped")
+                    continue
+                idx += 1
+                scheduler.complete(pdf_path, time.perf_counter() - start)
+                if result is None:
+                    # Recorded for the failure report; the rest of the batch carries on
+                    self.document_status.emit(pdf_path, DocumentModel.FAILED, None, None, self.runner.failures[-1]["attempts"][-1]["error"])
+                    continue
+                self.extracted_pages.emit(pdf_path, result["page_texts"])
+                if result["cached_pages"]:
+                    logging.info(f"Reused {result['cached_pages']} cached page(s) for {pdf_path}")
+                if result["boilerplate_lines"]:
+                    logging.info(f"Stripped {result['boilerplate_lines']} header/footer line(s) from {pdf_path}")
+                logging.info(f"{os.path.basename(pdf_path)}: {format_page_kinds(result['page_kinds'])}")
+                if self.runner.isolate:
+                    # The worker process wrote the output before it returned
+                    self.announce(pdf_path, result, start, result["output_file"], None)
+                else:
+                    self.expect_output(pdf_path, result, start)
         except Exception as e:
             self.error.emit(str(e))
+        finally:
+            scheduler.stop()
+            # Outputs are written in the background; report the ones that failed once they are all done
+            for pdf_path, file_path, message in self.engine.close():
+                # Failed document outputs were reported by output_written; this is the batch archive
+                if pdf_path is None:
+                    self.error.emit(f"Error saving file {file_path}: {message}")
+            self.pipeline.close()
+            self.runner.close()
+            try:
+                statistics_summary = self.engine.write_statistics()
+                if statistics_summary is not None:
+                    logging.info(f"Corpus statistics written to {self.engine.statistics_folder()}: {statistics_summary}")
+                    self.toast.emit("Corpus statistics written")
+            except Exception as e:
+                self.error.emit(f"Error writing corpus statistics: {str(e)}")
+            try:
+                report_path = self.runner.write_report(self.engine.output_path)
+            except Exception as e:
+                report_path = None
+                logging.error(f"Error writing failure report: {str(e)}")
+            if self.runner.failures:
+                logging.warning(f"{len(self.runner.failures)} document(s) failed" + (f"; see {report_path}" if report_path else ""))
+                self.failures_reported.emit(len(self.runner.failures), report_path or "")
+            near_duplicates = self.engine.near_duplicates
+            if near_duplicates is not None:
+                try:
+                    duplicates_path = near_duplicates.write_report(self.engine.output_path)
+                    if duplicates_path:
+                        logging.info(f"{len(near_duplicates.flagged)} near-duplicate document(s) listed in {duplicates_path}")
+                        self.toast.emit(f"{len(near_duplicates.flagged)} near-duplicate document(s) found")
+                except Exception as e:
+                    logging.error(f"Error writing near-duplicate report: {str(e)}")
+            recorder.end_document(0)
+            recorder.end_batch()
+            log_schedule_summary(scheduler)
+            if recorder.enabled:
+                self.performance_summary.emit(recorder.summary())
+            self.batch_finished.emit()
+
+    def expect_output(self, pdf_path, result, start):
+        with self.output_lock:
+            if pdf_path not in self.written:
+                self.awaiting_output[pdf_path] = (result, start)
+                return
+            file_path, error = self.written.pop(pdf_path)
+        self.announce(pdf_path, result, start, file_path, error)
+
+    def output_written(self, pdf_path, file_path, error):
+        """Called on a writer thread once a document's output is on disk, or failed to get there."""
+        with self.output_lock:
+            waiting = self.awaiting_output.pop(pdf_path, None)
+            if waiting is None:
+                self.written[pdf_path] = (file_path, error)
+                return
+        self.announce(pdf_path, *waiting, file_path, error)
+
+    def announce(self, pdf_path, result, start, file_path, error):
+        if error is not None:
+            self.document_status.emit(pdf_path, DocumentModel.FAILED, None, None, f"Error saving file: {error}")
+            self.error.emit(f"Error saving file {file_path}: {error}")
+            return
+        self.document_status.emit(pdf_path, DocumentModel.DONE, result["page_count"], time.perf_counter() - start, "")
+        if result["failed_attempts"]:
+            self.toast.emit(f"{os.path.basename(pdf_path)} extracted in {result['mode']} mode instead")
+        self.finished.emit(result["output_file"])
+        self.toast.emit(f"Extraction complete for {os.path.basename(pdf_path)}")
+
+    def boost(self, pdf_path):
+        """Called from the GUI thread; returns True if the document was still waiting.
+
+        It goes next to the readers, behind the few documents already read ahead.
+        """
+        return self.scheduler.boost(pdf_path)
 
     def generate_preview(self, doc, pdf_path):
         try:
@@ -823,20 +3460,1359 @@ class ExtractionThread(QThread):
         except Exception as e:
             self.error.emit(f"Error generating preview for {pdf_path}: {str(e)}")
 
+def log_schedule_summary(scheduler):
+    summary = scheduler.summary()
+    if summary is not None and summary["documents"] > 1:
+        logging.info(
+            f"Mean time to result over {summary['documents']} document(s): {summary['mean_time_to_result']:.2f} s "
+            f"({summary['policy']}), {summary['file_order_mean_time_to_result']:.2f} s in file order"
+        )
+
+def worker_engine_settings(settings):
+    """Engine settings as worker processes run them; watch and service mode normalize theirs once up front,
+    so their own checks see the same output names as the workers."""
+    if settings.get("ocr"):
+        # Already inside a bounded worker pool, so OCR runs inline rather than in a nested pool
+        settings = dict(settings, ocr=dict(settings["ocr"], workers=0))
+    if settings.get("compression"):
+        # A watched folder has no batch end to close a solid archive at, so documents are compressed one by one
+        settings = dict(settings, compression=dict(settings["compression"], archive=False))
+    return settings
+
+# The memory governor of a worker process, kept across its documents so trims follow the process's growth
+_worker_governor = None
+
+def worker_governor(memory):
+    global _worker_governor
+    memory = dict(MemoryGovernor.DEFAULTS, **(memory or {}))
+    if _worker_governor is None or _worker_governor.settings() != memory:
+        _worker_governor = MemoryGovernor(**memory)
+    return _worker_governor
+
+def extract_document(settings, pdf_path, on_page=None, near_duplicate_check=None):
+    """Runs one document through a fresh engine; the entry point of worker processes."""
+    recorder = PerformanceRecorder()
+    settings = worker_engine_settings(settings)
+    engine = ExtractionEngine(recorder=recorder, **settings)
+    engine.memory = worker_governor(settings.get("memory"))
+    if near_duplicate_check is not None and engine.near_duplicates is not None:
+        # The index lives in the process that owns the batch
+        engine.near_duplicates.check = near_duplicate_check
+    try:
+        result = engine.process_document(pdf_path, on_page=on_page)
+    finally:
+        errors = engine.close()
+        # Watched files are extracted once, so there is nothing to gain from keeping them open
+        engine.document_pool.discard(pdf_path)
+    if errors:
+        raise Exception(f"Error saving file: {errors[0][2]}")
+    recorder.end_batch()
+    result["seconds"] = recorder.documents[-1]["duration_ns"] / 1e9
+    # The parent recycles worker pools that grow too large
+    result["rss_mb"] = MemoryGovernor.rss_mb()
+    if engine.statistics is not None:
+        # Merged into the batch's statistics by DocumentRunner
+        result["statistics"] = engine.statistics.state()
+    return result
+
+_job_events = None
+
+def configure_service_worker(log_queue, event_queue):
+    """Initializer of service worker processes: logging, plus the queue pages are streamed back on."""
+    global _job_events
+    configure_worker_logging(log_queue)
+    _job_events = event_queue
+
+def extract_job(settings, pdf_path, job_id):
+    """Runs one service job in a worker process, sending every page back as soon as it is extracted."""
+    streamed = set()
+
+    def on_page(done, total_pages, page_num, text):
+        _job_events.put((job_id, "page", (done, total_pages, page_num, text)))
+        if text.strip():
+            streamed.add(page_num)
+
+    result = extract_document(settings, pdf_path, on_page)
+    # Only OCR text arrives after the page loop; the result follows the pages on the same queue, so it is never early
+    result["page_texts"] = [(page_num, text) for page_num, text in result["page_texts"] if page_num not in streamed]
+    _job_events.put((job_id, "result", result))
+    return job_id
+
+def scan_pdf_files(paths, recursive=True):
+    """Yields the PDF files among paths, descending into folders with os.scandir."""
+    for path in paths:
+        if not os.path.isdir(path):
+            if path.lower().endswith('.pdf'):
+                yield path
+            continue
+        stack = [path]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    entries = sorted(entries, key=lambda entry: entry.name)
+            except OSError as e:
+                logging.warning(f"Could not scan {directory}: {str(e)}")
+                continue
+            subdirectories = []
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            subdirectories.append(entry.path)
+                    elif entry.name.lower().endswith('.pdf'):
+                        yield entry.path
+                except OSError:
+                    continue
+            # Reversed so subfolders are visited in name order
+            stack.extend(reversed(subdirectories))
+
+# PDFDeduplicator class for detecting byte-identical PDFs under different paths
+class PDFDeduplicator:
+    HASH_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self):
+        self.paths_by_size = defaultdict(list)
+        self.digests = {}
+
+    def digest(self, pdf_path):
+        digest = self.digests.get(pdf_path)
+        if digest is None:
+            hasher = hashlib.blake2b(digest_size=20)
+            with open(pdf_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(self.HASH_CHUNK_SIZE), b""):
+                    hasher.update(chunk)
+            digest = self.digests[pdf_path] = hasher.digest()
+        return digest
+
+    def is_duplicate(self, pdf_path):
+        """Registers pdf_path and returns the already known identical file, if any.
+
+        Files are only hashed when another file of exactly the same size exists,
+        so a typical import costs one stat() per file.
+        """
+        try:
+            size = os.path.getsize(pdf_path)
+            same_size = self.paths_by_size.get(size)
+            if same_size:
+                digest = self.digest(pdf_path)
+                for other_path in same_size:
+                    if self.digest(other_path) == digest:
+                        return other_path
+        except OSError as e:
+            logging.warning(f"Could not check {pdf_path} for duplicates: {str(e)}")
+            return None
+        self.paths_by_size[size].append(pdf_path)
+        return None
+
+# PageExtractionError exception for a page the current extraction mode could not turn into text
+class PageExtractionError(Exception):
+    pass
+
+# NearDuplicateFound exception for stopping a document whose first pages match one already extracted
+class NearDuplicateFound(Exception):
+    def __init__(self, pdf_path, original, similarity):
+        super().__init__(f"{os.path.basename(pdf_path)} is a near-duplicate of {os.path.basename(original)} ({similarity:.0%} similar)")
+        self.pdf_path = pdf_path
+        self.original = original
+        self.similarity = similarity
+
+# NearDuplicateIndex class for spotting reprints and near-identical versions of a document from its first pages
+class NearDuplicateIndex:
+    DEFAULTS = {"threshold": 0.8, "num_perm": 128, "shingle": 4, "sample_pages": 3, "action": "flag"}
+    ACTIONS = ("flag", "defer", "skip")
+    PRIME = (1 << 61) - 1
+    HASH_MASK = (1 << 32) - 1
+    DENSIFY_OFFSET = 0x9E3779B1  # keeps values borrowed by empty slots from matching real minima by chance
+    MIN_RECALL = 0.95  # chance that a pair exactly at the threshold shares a band
+    REPORT_NAME = "near_duplicates.json"
+
+    class BandTable:
+        """Open-addressing multimap from band hash to document id over two flat arrays.
+
+        About 24 bytes per entry, where a dict of Python ints takes about 100; this roughly halves
+        the resident size of an index over 100k documents.
+        """
+        __slots__ = ("keys", "ids", "mask", "size")
+
+        def __init__(self, capacity=1024):
+            self.keys = array("q", [0]) * capacity
+            self.ids = array("i", [-1]) * capacity
+            self.mask = capacity - 1
+            self.size = 0
+
+        def add(self, key, doc_id):
+            if (self.size + 1) * 2 > len(self.ids):
+                self.grow()
+            ids = self.ids
+            slot = key & self.mask
+            while ids[slot] != -1:
+                slot = (slot + 1) & self.mask
+            self.keys[slot] = key
+            ids[slot] = doc_id
+            self.size += 1
+
+        def find(self, key):
+            ids, keys, mask = self.ids, self.keys, self.mask
+            found = []
+            slot = key & mask
+            while ids[slot] != -1:
+                if keys[slot] == key:
+                    found.append(ids[slot])
+                slot = (slot + 1) & mask
+            return found
+
+        def grow(self):
+            entries = [(key, doc_id) for key, doc_id in zip(self.keys, self.ids) if doc_id != -1]
+            capacity = len(self.ids) * 2
+            self.keys = array("q", [0]) * capacity
+            self.ids = array("i", [-1]) * capacity
+            self.mask = capacity - 1
+            self.size = 0
+            for key, doc_id in entries:
+                self.add(key, doc_id)
+
+    def __init__(self, threshold=0.8, num_perm=128, shingle=4, sample_pages=3, action="flag", seed=1):
+        if not 0 < threshold <= 1:
+            raise ValueError("The similarity threshold must be between 0 and 1")
+        if action not in self.ACTIONS:
+            raise ValueError(f"Unknown near-duplicate action '{action}'")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle = shingle
+        self.sample_pages = sample_pages
+        self.action = action
+        self.seed = seed
+        rng = random.Random(seed)
+        self.hash_a = rng.randrange(1, self.PRIME)
+        self.hash_b = rng.randrange(self.PRIME)
+        self.bands, self.rows = self.band_layout(threshold, num_perm)
+        self.buckets = [self.BandTable() for _ in range(self.bands)]
+        self.signatures = array("I")  # num_perm values per indexed document, back to back
+        self.paths = []
+        self.path_ids = {}
+        self.flagged = {}  # pdf_path -> (original, similarity)
+
+    def settings(self):
+        return {
+            "threshold": self.threshold, "num_perm": self.num_perm, "shingle": self.shingle,
+            "sample_pages": self.sample_pages, "action": self.action, "seed": self.seed
+        }
+
+    @classmethod
+    def band_layout(cls, threshold, num_perm):
+        """The longest bands that still make a pair at the threshold a candidate with MIN_RECALL; longer bands mean fewer false candidates."""
+        for rows in range(num_perm, 0, -1):
+            bands = num_perm // rows
+            if 1 - (1 - threshold ** rows) ** bands >= cls.MIN_RECALL:
+                return bands, rows
+        return num_perm, 1
+
+    def signature(self, texts):
+        """MinHash of the word shingles of texts, or None when there are no words.
+
+        One-permutation MinHash: each shingle is hashed once and lands in one of num_perm slots that
+        keep their minimum, instead of num_perm hashes per shingle. Empty slots borrow the next filled
+        slot's minimum (rotation densification), so equal slots still estimate the Jaccard similarity.
+        """
+        words = CorpusStatistics.TOKEN_PATTERN.findall(" ".join(texts).lower())
+        if not words:
+            return None
+        size = min(self.shingle, len(words))
+        hashes = {zlib.crc32(" ".join(words[i:i + size]).encode("utf-8")) for i in range(len(words) - size + 1)}
+        a, b, prime, num_perm = self.hash_a, self.hash_b, self.PRIME, self.num_perm
+        minima = [None] * num_perm
+        for value in hashes:
+            slot, value = divmod((a * value + b) % prime, num_perm)[::-1]
+            current = minima[slot]
+            if current is None or value < current:
+                minima[slot] = value
+        if None in minima:
+            filled = list(minima)
+            for slot in range(num_perm):
+                if filled[slot] is None:
+                    distance = 1
+                    while filled[(slot + distance) % num_perm] is None:
+                        distance += 1
+                    minima[slot] = filled[(slot + distance) % num_perm] + distance * self.DENSIFY_OFFSET
+        mask = self.HASH_MASK
+        return array("I", [value & mask for value in minima])
+
+    def band_keys(self, signature):
+        rows = self.rows
+        return [hash(signature[band * rows:(band + 1) * rows].tobytes()) for band in range(self.bands)]
+
+    def similarity(self, signature, doc_id):
+        start = doc_id * self.num_perm
+        other = self.signatures[start:start + self.num_perm]
+        return sum(map(int.__eq__, signature, other)) / self.num_perm
+
+    def query(self, signature, exclude=None):
+        """Best indexed match with an estimated Jaccard similarity at or above the threshold, as (path, similarity)."""
+        candidates = set()
+        for bucket, key in zip(self.buckets, self.band_keys(signature)):
+            candidates.update(bucket.find(key))
+        best = None
+        for doc_id in candidates:
+            if self.paths[doc_id] == exclude:
+                continue
+            similarity = self.similarity(signature, doc_id)
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (self.paths[doc_id], similarity)
+        return best
+
+    def insert(self, pdf_path, signature):
+        doc_id = len(self.paths)
+        self.paths.append(pdf_path)
+        self.path_ids[pdf_path] = doc_id
+        self.signatures.extend(signature)
+        for bucket, key in zip(self.buckets, self.band_keys(signature)):
+            bucket.add(key, doc_id)
+
+    def check(self, pdf_path, signature):
+        """Returns (original, similarity) when pdf_path nearly duplicates an indexed document; otherwise indexes it."""
+        if pdf_path in self.flagged or pdf_path in self.path_ids:
+            # Seen before in this batch: a deferred document's second run, or a retry
+            return None
+        match = self.query(signature, exclude=pdf_path)
+        if match is not None:
+            self.flagged[pdf_path] = match
+            return match
+        self.insert(pdf_path, signature)
+        return None
+
+    def write_report(self, output_path):
+        """Lists the batch's near-duplicates next to its outputs; returns the report path, or None when there were none."""
+        report_path = os.path.join(output_path, self.REPORT_NAME)
+        if not self.flagged:
+            if os.path.exists(report_path):
+                os.remove(report_path)
+            return None
+        duplicates = [
+            {"pdf_path": pdf_path, "original": original, "similarity": round(similarity, 3)}
+            for pdf_path, (original, similarity) in self.flagged.items()
+        ]
+
+        def write(temp_path):
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"threshold": self.threshold, "action": self.action, "near_duplicates": duplicates}, f, indent=1)
+
+        os.makedirs(output_path, exist_ok=True)
+        write_atomically(report_path, write)
+        return report_path
+
+# FolderWatcher class for noticing new or changed PDFs in a folder
+class FolderWatcher(QObject):
+    pdf_ready = Signal(str)
+
+    # With native notifications the poll is only a safety net (e.g. network shares that never notify)
+    NOTIFICATION_POLL_SECONDS = 30.0
+
+    def __init__(self, folder, recursive=True, poll_interval=2.0, settle_seconds=1.0, use_notifications=True, parent=None):
+        super().__init__(parent)
+        self.folder = os.path.abspath(folder)
+        self.recursive = recursive
+        self.poll_interval = poll_interval
+        self.settle_seconds = settle_seconds
+        self.known = {}
+        self.pending = {}
+        self.watcher = None
+        if use_notifications:
+            self.watcher = QFileSystemWatcher(self)
+            self.watcher.directoryChanged.connect(self.scan_directory)
+        self.poll_timer = QTimer(self)
+        self.poll_timer.timeout.connect(self.scan_all)
+        self.settle_timer = QTimer(self)
+        self.settle_timer.setInterval(250)
+        self.settle_timer.timeout.connect(self.check_pending)
+
+    def start(self):
+        self.scan_all()
+        notifying = bool(self.watcher and self.watcher.directories())
+        if not notifying:
+            logging.info(f"Filesystem notifications unavailable for {self.folder}; polling every {self.poll_interval} s")
+        poll_seconds = max(self.poll_interval, self.NOTIFICATION_POLL_SECONDS) if notifying else self.poll_interval
+        self.poll_timer.start(int(poll_seconds * 1000))
+        self.settle_timer.start()
+
+    def stop(self):
+        self.poll_timer.stop()
+        self.settle_timer.stop()
+        if self.watcher and self.watcher.directories():
+            self.watcher.removePaths(self.watcher.directories())
+
+    def watch_directory(self, directory):
+        if self.watcher is not None and directory not in self.watcher.directories():
+            self.watcher.addPath(directory)
+
+    def scan_all(self):
+        stack = [self.folder]
+        while stack:
+            stack.extend(self.scan_entries(stack.pop()))
+
+    def scan_directory(self, directory):
+        # A notification for one directory only rescans that directory (and any new subfolders)
+        stack = [directory]
+        while stack:
+            stack.extend(self.scan_entries(stack.pop()))
+
+    def scan_entries(self, directory):
+        subdirectories = []
+        self.watch_directory(directory)
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        if self.recursive and (self.watcher is None or entry.path not in self.watcher.directories()):
+                            subdirectories.append(entry.path)
+                    elif entry.name.lower().endswith('.pdf'):
+                        self.consider(entry.path, entry.stat())
+        except OSError as e:
+            logging.warning(f"Could not scan {directory}: {str(e)}")
+        return subdirectories
+
+    def consider(self, pdf_path, stat_result):
+        signature = (stat_result.st_size, stat_result.st_mtime_ns)
+        if self.known.get(pdf_path) == signature:
+            return
+        pending = self.pending.get(pdf_path)
+        if pending is None or pending[0] != signature:
+            self.pending[pdf_path] = (signature, time.monotonic())
+
+    def check_pending(self):
+        now = time.monotonic()
+        for pdf_path, (signature, since) in list(self.pending.items()):
+            try:
+                stat_result = os.stat(pdf_path)
+            except OSError:
+                del self.pending[pdf_path]
+                continue
+            current = (stat_result.st_size, stat_result.st_mtime_ns)
+            if current != signature:
+                # Still being written: restart the settle period
+                self.pending[pdf_path] = (current, now)
+            elif now - since >= self.settle_seconds and self.is_complete(pdf_path):
+                del self.pending[pdf_path]
+                self.known[pdf_path] = signature
+                self.pdf_ready.emit(pdf_path)
+
+    @staticmethod
+    def is_complete(pdf_path):
+        # A fully written PDF ends with an %%EOF marker (possibly followed by a little whitespace)
+        try:
+            with open(pdf_path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                f.seek(max(0, f.tell() - 1024))
+                return b"%%EOF" in f.read()
+        except OSError:
+            return False
+
+# WatchFolderService class for queueing watched PDFs into a bounded pool of extraction workers
+class WatchFolderService(QObject):
+    document_started = Signal(str)
+    document_finished = Signal(object)
+    document_failed = Signal(str, str)
+    document_skipped = Signal(str)
+
+    def __init__(self, folder, engine_settings, max_workers=2, recursive=True, poll_interval=2.0,
+                 settle_seconds=1.0, use_notifications=True, parent=None):
+        super().__init__(parent)
+        self.engine_settings = worker_engine_settings(dict(engine_settings))
+        # Only the output names are needed here; the workers build the engines
+        self.naming = OutputNaming.from_settings(self.engine_settings)
+        self.page_selection = self.engine_settings.get("page_selection")
+        self.max_workers = max(1, max_workers)
+        self.backlog = deque()
+        self.in_flight = {}
+        self.crash_counts = {}
+        self.executor = None
+        self.governor = MemoryGovernor(**(self.engine_settings.get("memory") or {}))
+        self.watcher = FolderWatcher(folder, recursive, poll_interval, settle_seconds, use_notifications, self)
+        self.watcher.pdf_ready.connect(self.enqueue)
+        self.result_timer = QTimer(self)
+        self.result_timer.setInterval(100)
+        self.result_timer.timeout.connect(self.collect_results)
+
+    def start(self):
+        self.create_executor()
+        self.result_timer.start()
+        self.watcher.start()
+        logging.info(f"Watching {self.watcher.folder} with {self.max_workers} worker(s)")
+
+    def stop(self):
+        self.watcher.stop()
+        self.result_timer.stop()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        self.backlog.clear()
+        self.in_flight.clear()
+
+    def create_executor(self):
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=MP_CONTEXT,
+            initializer=configure_worker_logging,
+            initargs=(get_worker_log_queue(),)
+        )
+
+    def enqueue(self, pdf_path):
+        if pdf_path in self.backlog or pdf_path in self.in_flight.values():
+            return
+        if self.naming.is_up_to_date(pdf_path, self.page_selection):
+            logging.info(f"Skipping {pdf_path}: output is up to date")
+            self.document_skipped.emit(pdf_path)
+            return
+        self.backlog.append(pdf_path)
+        self.dispatch()
+
+    def dispatch(self):
+        while self.backlog and len(self.in_flight) < self.max_workers and self.executor is not None:
+            pdf_path = self.backlog.popleft()
+            future = self.executor.submit(extract_document, self.engine_settings, pdf_path)
+            self.in_flight[future] = pdf_path
+            self.document_started.emit(pdf_path)
+
+    def collect_results(self):
+        broken = False
+        recycle = None
+        for future in [f for f in self.in_flight if f.done()]:
+            pdf_path = self.in_flight.pop(future)
+            try:
+                result = future.result()
+                logging.info(f"Extracted {pdf_path} ({result['page_count']} pages, {result['seconds']:.2f} s)")
+                self.document_finished.emit(result)
+                recycle = self.governor.worker_finished(result.get("rss_mb"), self.max_workers) or recycle
+            except BrokenProcessPool as e:
+                # Every in-flight job fails with the pool; retry each once before blaming it
+                broken = True
+                self.crash_counts[pdf_path] = self.crash_counts.get(pdf_path, 0) + 1
+                if self.crash_counts[pdf_path] > 1:
+                    self.document_failed.emit(pdf_path, f"Worker process died: {str(e)}")
+                else:
+                    self.backlog.appendleft(pdf_path)
+            except Exception as e:
+                logging.error(f"Extraction failed for {pdf_path}: {str(e)}")
+                self.document_failed.emit(pdf_path, str(e))
+                if isinstance(e, MemoryError):
+                    # The worker that hit the ceiling is left bloated
+                    recycle = "a document hit the memory ceiling"
+        if broken and self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.create_executor()
+        elif recycle and self.executor is not None:
+            logging.info(f"Replacing the worker pool: {recycle}")
+            self.recycle_executor()
+        self.dispatch()
+
+    def recycle_executor(self):
+        # Jobs already running finish in the old pool, whose workers then exit
+        retired = self.executor
+        self.create_executor()
+        retired.shutdown(wait=False)
+
+# ExtractionService class for the local HTTP API: a job queue in front of a bounded worker pool, with per-page streaming
+class ExtractionService:
+    MAX_BODY = 64 * 1024
+    FINISHED = ("done", "failed", "cancelled")
+    REASONS = {
+        200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+        409: "Conflict", 413: "Payload Too Large", 429: "Too Many Requests", 503: "Service Unavailable"
+    }
+
+    def __init__(self, engine_settings, host="127.0.0.1", port=8765, max_workers=2, max_queue=64, max_finished=256):
+        self.engine_settings = worker_engine_settings(dict(engine_settings))
+        self.host = host
+        self.port = port
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max_queue  # queued jobs beyond this are refused with 429
+        self.max_finished = max_finished  # finished jobs whose results are kept for polling
+        self.jobs = OrderedDict()
+        self.queued = deque()
+        self.running = {}
+        self.finished = deque()
+        self.crash_counts = {}
+        self.job_seconds = deque(maxlen=50)
+        self.governor = MemoryGovernor(**(self.engine_settings.get("memory") or {}))
+        self.executor = None
+        self.events = None
+        self.loop = None
+        self.stopping = None
+
+    async def serve(self, on_ready=None):
+        self.loop = asyncio.get_running_loop()
+        self.stopping = asyncio.Event()
+        self.events = MP_CONTEXT.Queue()
+        self.create_executor()
+        event_thread = threading.Thread(target=self.read_events, name="ServiceEvents", daemon=True)
+        event_thread.start()
+        server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]
+        logging.info(f"Extraction service listening on http://{self.host}:{self.port} with {self.max_workers} worker(s)")
+        if on_ready is not None:
+            on_ready(self)
+        try:
+            async with server:
+                await self.stopping.wait()
+        finally:
+            while self.queued:
+                self.finish(self.queued.popleft(), "cancelled")
+            if self.running:
+                logging.info(f"Waiting for {len(self.running)} running job(s) to finish")
+            # Running jobs finish so their outputs are not left half written
+            await asyncio.to_thread(self.executor.shutdown, wait=True, cancel_futures=True)
+            self.events.put(None)
+            event_thread.join(timeout=5)
+            logging.info("Extraction service stopped")
+
+    def stop(self):
+        """Stops the service; safe to call from signal handlers and other threads."""
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.stopping.set)
+
+    def create_executor(self):
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=MP_CONTEXT,
+            initializer=configure_service_worker,
+            initargs=(get_worker_log_queue(), self.events)
+        )
+
+    def read_events(self):
+        # Worker processes report pages on a multiprocessing queue; hand them to the event loop in order
+        while True:
+            event = self.events.get()
+            if event is None:
+                return
+            self.loop.call_soon_threadsafe(self.handle_event, *event)
+
+    def submit(self, request):
+        path = request.get("path")
+        if not isinstance(path, str) or not os.path.isfile(path):
+            return 400, {"error": "'path' must name an existing PDF file"}
+        settings = dict(self.engine_settings)
+        try:
+            if "mode" in request:
+                if request["mode"] not in ("Column-aware", "Layout-preserved"):
+                    raise ValueError(f"Unknown mode '{request['mode']}'")
+                settings["extraction_mode"] = request["mode"]
+            if "format" in request:
+                if request["format"] not in ExtractionEngine.FORMAT_EXTENSIONS:
+                    raise ValueError(f"Unknown format '{request['format']}'")
+                settings["output_format"] = request["format"]
+            if request.get("pages"):
+                settings["page_selection"] = PageSelection("ranges", str(request["pages"]))
+            if "cache" in request:
+                settings["use_cache"] = bool(request["cache"])
+        except ValueError as e:
+            return 400, {"error": str(e)}
+        if self.stopping.is_set():
+            return 503, {"error": "The service is shutting down"}
+        if len(self.queued) >= self.max_queue:
+            return 429, {"error": f"The job queue is full ({self.max_queue} jobs)", "retry_after": self.retry_after()}
+        job = {
+            "id": uuid.uuid4().hex[:12],
+            "path": os.path.abspath(path),
+            "settings": settings,
+            "status": "queued",
+            "submitted": time.time(),
+            "started": None,
+            "finished": None,
+            "pages_done": 0,
+            "pages_total": None,
+            "pages": [],
+            "result": None,
+            "error": None,
+            "updated": asyncio.Event()
+        }
+        self.jobs[job["id"]] = job
+        self.queued.append(job)
+        self.dispatch()
+        return 202, self.job_status(job)
+
+    def retry_after(self):
+        """Seconds until a queue slot is likely to free up, from recent job durations."""
+        if not self.job_seconds:
+            return 1
+        return max(1, math.ceil(sum(self.job_seconds) / len(self.job_seconds) / self.max_workers))
+
+    def dispatch(self):
+        while self.queued and len(self.running) < self.max_workers and not self.stopping.is_set():
+            job = self.queued.popleft()
+            job["status"] = "running"
+            job["started"] = time.time()
+            future = self.executor.submit(extract_job, job["settings"], job["path"], job["id"])
+            self.running[future] = job
+            future.add_done_callback(self.future_done)
+            self.notify(job)
+
+    def future_done(self, future):
+        # Runs on the executor's thread
+        try:
+            self.loop.call_soon_threadsafe(self.job_returned, future)
+        except RuntimeError:
+            pass  # the loop has already closed during shutdown
+
+    def job_returned(self, future):
+        job = self.running.pop(future, None)
+        if job is None:
+            return
+        try:
+            future.result()
+        except BrokenProcessPool as e:
+            # The whole pool died; retry each of its jobs once before blaming the document
+            self.crash_counts[job["id"]] = self.crash_counts.get(job["id"], 0) + 1
+            if self.crash_counts[job["id"]] > 1:
+                self.finish(job, "failed", f"Worker process died: {str(e)}")
+            else:
+                job["status"] = "queued"
+                job["pages"] = []
+                self.queued.appendleft(job)
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                self.create_executor()
+        except Exception as e:
+            logging.error(f"Service job {job['id']} failed for {job['path']}: {str(e)}")
+            self.finish(job, "failed", str(e))
+            if isinstance(e, MemoryError):
+                # The worker that hit the ceiling is left bloated
+                self.recycle_executor("a job hit the memory ceiling")
+        self.dispatch()
+
+    def recycle_executor(self, reason):
+        if self.stopping.is_set():
+            return
+        logging.info(f"Replacing the worker pool: {reason}")
+        # Jobs already running finish in the old pool, whose workers then exit
+        retired = self.executor
+        self.create_executor()
+        retired.shutdown(wait=False)
+
+    def handle_event(self, job_id, kind, payload):
+        job = self.jobs.get(job_id)
+        if job is None or job["status"] in self.FINISHED:
+            return
+        if kind == "page":
+            done, total_pages, page_num, text = payload
+            job["pages_done"] = done
+            job["pages_total"] = total_pages
+            if text.strip():
+                job["pages"].append((page_num, text))
+            self.notify(job)
+        elif kind == "result":
+            job["pages"].extend(payload.pop("page_texts"))
+            job["result"] = payload
+            self.job_seconds.append(payload["seconds"])
+            logging.info(f"Service job {job_id} extracted {job['path']} ({payload['page_count']} pages, {payload['seconds']:.2f} s)")
+            self.finish(job, "done")
+            recycle = self.governor.worker_finished(payload.get("rss_mb"), self.max_workers)
+            if recycle:
+                self.recycle_executor(recycle)
+
+    def finish(self, job, status, error=None):
+        job["status"] = status
+        job["error"] = error
+        job["finished"] = time.time()
+        self.notify(job)
+        self.finished.append(job["id"])
+        while len(self.finished) > self.max_finished:
+            self.jobs.pop(self.finished.popleft(), None)
+
+    def notify(self, job):
+        # Wake every stream waiting on this job; later waiters get a fresh event
+        updated, job["updated"] = job["updated"], asyncio.Event()
+        updated.set()
+
+    def cancel(self, job):
+        if job["status"] != "queued":
+            return 409, {"error": f"Only queued jobs can be cancelled; this one is {job['status']}"}
+        self.queued.remove(job)
+        self.finish(job, "cancelled")
+        return 200, self.job_status(job)
+
+    def job_status(self, job):
+        status = {
+            "id": job["id"],
+            "path": job["path"],
+            "status": job["status"],
+            "pages_done": job["pages_done"],
+            "pages_total": job["pages_total"],
+            "status_url": f"/jobs/{job['id']}",
+            "pages_url": f"/jobs/{job['id']}/pages"
+        }
+        if job["status"] == "queued":
+            status["queue_position"] = self.queued.index(job) + 1 if job in self.queued else None
+        if job["started"] is not None:
+            status["queued_seconds"] = round(job["started"] - job["submitted"], 3)
+        if job["finished"] is not None:
+            status["seconds"] = round(job["finished"] - job["submitted"], 3)
+        if job["result"] is not None:
+            status["output_file"] = job["result"]["output_file"]
+            status["page_kinds"] = job["result"]["page_kinds"]
+            status["cached_pages"] = job["result"]["cached_pages"]
+        if job["error"] is not None:
+            status["error"] = job["error"]
+        return status
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                if length > self.MAX_BODY:
+                    await self.respond(writer, 413, {"error": "Request body too large"}, close=True)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                await self.route(method, urlsplit(target).path, body, writer, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        except Exception as e:
+            logging.error(f"Service request failed: {str(e)}")
+        finally:
+            writer.close()
+
+    async def route(self, method, path, body, writer, keep_alive):
+        parts = [part for part in path.split("/") if part]
+        if parts == ["health"]:
+            await self.respond(writer, 200, {
+                "status": "stopping" if self.stopping.is_set() else "ok",
+                "queued": len(self.queued),
+                "running": len(self.running),
+                "workers": self.max_workers,
+                "max_queue": self.max_queue
+            }, close=not keep_alive)
+            return
+        if parts == ["jobs"] and method == "POST":
+            try:
+                request = json.loads(body or b"{}")
+                if not isinstance(request, dict):
+                    raise ValueError("expected a JSON object")
+            except ValueError as e:
+                await self.respond(writer, 400, {"error": f"Invalid JSON: {str(e)}"}, close=not keep_alive)
+                return
+            status, payload = self.submit(request)
+            headers = {"Retry-After": str(payload["retry_after"])} if status == 429 else {}
+            await self.respond(writer, status, payload, headers, close=not keep_alive)
+            return
+        job = self.jobs.get(parts[1]) if len(parts) in (2, 3) and parts[0] == "jobs" else None
+        if job is None:
+            await self.respond(writer, 404, {"error": f"No such resource: {path}"}, close=not keep_alive)
+        elif len(parts) == 2 and method == "GET":
+            await self.respond(writer, 200, self.job_status(job), close=not keep_alive)
+        elif len(parts) == 2 and method == "DELETE":
+            await self.respond(writer, *self.cancel(job), close=not keep_alive)
+        elif len(parts) == 3 and parts[2] == "pages" and method == "GET":
+            await self.stream_pages(writer, job, keep_alive)
+        else:
+            await self.respond(writer, 405, {"error": f"{method} is not supported on {path}"}, close=not keep_alive)
+
+    async def respond(self, writer, status, payload, headers=None, close=False):
+        body = json.dumps(payload).encode("utf-8")
+        lines = [f"HTTP/1.1 {status} {self.REASONS[status]}", "Content-Type: application/json", f"Content-Length: {len(body)}"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        if close:
+            lines.append("Connection: close")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def stream_pages(self, writer, job, keep_alive):
+        """Streams the job's pages as NDJSON while it runs, ending with a line holding the final status."""
+        lines = ["HTTP/1.1 200 OK", "Content-Type: application/x-ndjson", "Transfer-Encoding: chunked"]
+        if not keep_alive:
+            lines.append("Connection: close")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        sent = 0
+        while True:
+            updated = job["updated"]
+            pages = job["pages"]
+            if sent < len(pages):
+                chunk = "".join(json.dumps({"page": page_num + 1, "text": text}) + "\n" for page_num, text in pages[sent:])
+                sent = len(pages)
+                await self.write_chunk(writer, chunk.encode("utf-8"))
+            if job["status"] in self.FINISHED:
+                break
+            await updated.wait()
+        await self.write_chunk(writer, (json.dumps(self.job_status(job)) + "\n").encode("utf-8"))
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def write_chunk(self, writer, data):
+        writer.write(f"{len(data):x}\r\n".encode("latin-1") + data + b"\r\n")
+        # Waits while a slow client's socket buffer is full
+        await writer.drain()
+
+# PagedTextViewer class for showing extracted text a few pages at a time
+class PagedTextViewer(QWidget):
+    WINDOW_PAGES = 6  # pages laid out at once; more are loaded as the view scrolls
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pages = []
+        self.page_numbers = []
+        self.window_start = 0
+        self.window_end = 0
+        self.window_lengths = []
+        self.highlights = []
+        self.sliding = False
+        self.setup_ui()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.editor = QPlainTextEdit()
+        self.editor.setReadOnly(True)
+        self.editor.verticalScrollBar().valueChanged.connect(self.on_scroll)
+        layout.addWidget(self.editor)
+
+        nav_layout = QHBoxLayout()
+        self.prev_page_btn = QPushButton()
+        self.prev_page_btn.setObjectName("pagePrevButton")
+        self.prev_page_btn.setFixedWidth(25)
+        self.prev_page_btn.setIcon(QIcon.fromTheme("go-previous"))
+        self.prev_page_btn.setToolTip("Previous page")
+        self.prev_page_btn.clicked.connect(lambda: self.step_page(-1))
+        self.page_spin = QSpinBox()
+        self.page_spin.setMinimum(1)
+        self.page_spin.setMaximum(1)
+        self.page_spin.setToolTip("Jump to a PDF page")
+        self.page_spin.editingFinished.connect(lambda: self.go_to_pdf_page(self.page_spin.value() - 1))
+        self.page_total = QLabel("of 0")
+        self.next_page_btn = QPushButton()
+        self.next_page_btn.setObjectName("pageNextButton")
+        self.next_page_btn.setFixedWidth(25)
+        self.next_page_btn.setIcon(QIcon.fromTheme("go-next"))
+        self.next_page_btn.setToolTip("Next page")
+        self.next_page_btn.clicked.connect(lambda: self.step_page(1))
+        nav_layout.addStretch()
+        nav_layout.addWidget(self.prev_page_btn)
+        nav_layout.addWidget(QLabel("Page"))
+        nav_layout.addWidget(self.page_spin)
+        nav_layout.addWidget(self.page_total)
+        nav_layout.addWidget(self.next_page_btn)
+        nav_layout.addStretch()
+        layout.addLayout(nav_layout)
+
+    @staticmethod
+    def text_length(text):
+        """Length of text in UTF-16 code units, the unit QTextDocument positions count in."""
+        return len(text.encode("utf-16-le")) // 2
+
+    def render_page(self, index):
+        page_num, text = self.pages[index]
+        return f"{format_page_header(page_num)}{text}\n\n"
+
+    def set_pages(self, page_texts):
+        self.pages = page_texts
+        self.page_numbers = [page_num for page_num, _ in page_texts]
+        self.highlights = []
+        last_page = self.page_numbers[-1] + 1 if self.page_numbers else 1
+        self.page_spin.setMaximum(last_page)
+        self.page_total.setText(f"of {last_page}")
+        self.show_page(0)
+
+    def append_pages(self, page_texts):
+        """Adds pages after the last one, for text that streams in while a document is extracted."""
+        if not self.pages:
+            self.set_pages(list(page_texts))
+            return
+        self.pages.extend(page_texts)
+        self.page_numbers.extend(page_num for page_num, _ in page_texts)
+        last_page = self.page_numbers[-1] + 1
+        self.page_spin.setMaximum(last_page)
+        self.page_total.setText(f"of {last_page}")
+        self.sliding = True
+        try:
+            # Only a window that is not full yet grows; later pages are laid out as the view scrolls to them
+            cursor = self.editor.textCursor()
+            cursor.movePosition(QTextCursor.End)
+            while self.window_end < len(self.pages) and self.window_end - self.window_start < self.WINDOW_PAGES:
+                chunk = self.render_page(self.window_end)
+                cursor.insertText(chunk)
+                self.window_lengths.append(self.text_length(chunk))
+                self.window_end += 1
+            self.apply_highlights()
+        finally:
+            self.sliding = False
+        self.update_page_indicator()
+
+    def show_page(self, index, offset=0):
+        """Lays out a window of pages around index and scrolls to offset within that page."""
+        self.sliding = True
+        try:
+            if not self.pages:
+                self.window_start = self.window_end = 0
+                self.window_lengths = []
+                self.editor.setPlainText("")
+                return
+            index = max(0, min(index, len(self.pages) - 1))
+            self.window_start = max(0, index - 1)
+            self.window_end = min(len(self.pages), self.window_start + self.WINDOW_PAGES)
+            chunks = [self.render_page(i) for i in range(self.window_start, self.window_end)]
+            self.window_lengths = [self.text_length(chunk) for chunk in chunks]
+            self.editor.setPlainText("".join(chunks))
+            self.apply_highlights()
+            cursor = self.editor.textCursor()
+            cursor.setPosition(min(self.page_position(index) + offset, self.editor.document().characterCount() - 1))
+            self.editor.setTextCursor(cursor)
+            self.scroll_cursor_to_top()
+        finally:
+            self.sliding = False
+        self.update_page_indicator()
+
+    def scroll_cursor_to_top(self):
+        scroll_bar = self.editor.verticalScrollBar()
+        scroll_bar.setValue(min(scroll_bar.maximum(), self.editor.textCursor().blockNumber()))
+
+    def page_position(self, index):
+        """Position of a page inside the laid-out window, in UTF-16 code units like every QTextDocument position."""
+        return sum(self.window_lengths[:index - self.window_start])
+
+    def page_at_position(self, position):
+        total = 0
+        for offset, length in enumerate(self.window_lengths):
+            total += length
+            if position < total:
+                return self.window_start + offset
+        return max(self.window_start, self.window_end - 1)
+
+    def current_page_index(self):
+        position = self.editor.cursorForPosition(self.editor.viewport().rect().topLeft()).position()
+        return self.page_at_position(position)
+
+    def update_page_indicator(self):
+        has_pages = bool(self.pages)
+        index = self.current_page_index() if has_pages else 0
+        self.page_spin.blockSignals(True)
+        self.page_spin.setValue(self.pages[index][0] + 1 if has_pages else 1)
+        self.page_spin.blockSignals(False)
+        self.prev_page_btn.setEnabled(has_pages and index > 0)
+        self.next_page_btn.setEnabled(has_pages and index < len(self.pages) - 1)
+
+    def step_page(self, step):
+        if self.pages:
+            self.show_page(self.current_page_index() + step)
+
+    def go_to_pdf_page(self, page_num):
+        if self.pages:
+            index = bisect.bisect_left(self.page_numbers, page_num)
+            self.show_page(min(index, len(self.pages) - 1))
+
+    def on_scroll(self, value):
+        if self.sliding or not self.pages:
+            return
+        scroll_bar = self.editor.verticalScrollBar()
+        self.sliding = True
+        try:
+            if value >= scroll_bar.maximum() - scroll_bar.pageStep() and self.window_end < len(self.pages):
+                self.slide_forward()
+            elif value <= scroll_bar.pageStep() and self.window_start > 0:
+                self.slide_backward()
+        finally:
+            self.sliding = False
+        self.update_page_indicator()
+
+    def slide_forward(self):
+        cursor = self.editor.textCursor()
+        cursor.movePosition(QTextCursor.End)
+        chunk = self.render_page(self.window_end)
+        cursor.insertText(chunk)
+        self.window_lengths.append(self.text_length(chunk))
+        self.window_end += 1
+        if self.window_end - self.window_start > self.WINDOW_PAGES:
+            self.drop_first_page()
+        self.apply_highlights()
+
+    def slide_backward(self):
+        scroll_bar = self.editor.verticalScrollBar()
+        chunk = self.render_page(self.window_start - 1)
+        blocks_before = self.editor.document().blockCount()
+        cursor = self.editor.textCursor()
+        cursor.movePosition(QTextCursor.Start)
+        cursor.insertText(chunk)
+        self.window_lengths.insert(0, self.text_length(chunk))
+        self.window_start -= 1
+        # Keep the same text under the viewport after growing the document above it
+        scroll_bar.setValue(scroll_bar.value() + self.editor.document().blockCount() - blocks_before)
+        if self.window_end - self.window_start > self.WINDOW_PAGES:
+            self.drop_last_page()
+        self.apply_highlights()
+
+    def drop_first_page(self):
+        scroll_bar = self.editor.verticalScrollBar()
+        blocks_before = self.editor.document().blockCount()
+        cursor = self.editor.textCursor()
+        cursor.setPosition(0)
+        cursor.setPosition(self.window_lengths[0], QTextCursor.KeepAnchor)
+        cursor.removeSelectedText()
+        self.window_lengths.pop(0)
+        self.window_start += 1
+        scroll_bar.setValue(scroll_bar.value() - (blocks_before - self.editor.document().blockCount()))
+
+    def drop_last_page(self):
+        cursor = self.editor.textCursor()
+        cursor.movePosition(QTextCursor.End)
+        cursor.setPosition(self.editor.document().characterCount() - 1 - self.window_lengths[-1], QTextCursor.KeepAnchor)
+        cursor.removeSelectedText()
+        self.window_lengths.pop()
+        self.window_end -= 1
+
+    def find_all(self, term):
+        """Returns (page index, start, end) for every case-insensitive match over all pages."""
+        pattern = re.compile(re.escape(term), re.IGNORECASE)
+        return [
+            (index, match.start(), match.end())
+            for index, (_, text) in enumerate(self.pages)
+            for match in pattern.finditer(text)
+        ]
+
+    def match_range(self, match):
+        index, start, end = match
+        page_num, text = self.pages[index]
+        # Match offsets count code points; characters outside the BMP take two positions in the document
+        base = self.page_position(index) + self.text_length(format_page_header(page_num))
+        return base + self.text_length(text[:start]), base + self.text_length(text[:end])
+
+    def set_highlights(self, matches):
+        self.highlights = matches
+        self.apply_highlights()
+
+    def apply_highlights(self):
+        highlight_format = QTextCursor().charFormat()
+        highlight_format.setBackground(QColor("#4DA6FF"))
+        selections = []
+        for match in self.highlights:
+            if not self.window_start <= match[0] < self.window_end:
+                continue
+            start, end = self.match_range(match)
+            selection = QTextEdit.ExtraSelection()
+            selection.format = highlight_format
+            selection.cursor = self.editor.textCursor()
+            selection.cursor.setPosition(start)
+            selection.cursor.setPosition(end, QTextCursor.KeepAnchor)
+            selections.append(selection)
+        self.editor.setExtraSelections(selections)
+
+    def select_match(self, match):
+        index, start, end = match
+        if not self.window_start <= index < self.window_end:
+            self.show_page(index, self.text_length(self.pages[index][1][:start]))
+        start_position, end_position = self.match_range(match)
+        cursor = self.editor.textCursor()
+        cursor.setPosition(start_position)
+        cursor.setPosition(end_position, QTextCursor.KeepAnchor)
+        self.editor.setTextCursor(cursor)
+        self.editor.ensureCursorVisible()
+        self.update_page_indicator()
+
+# DocumentRecord class for the per-document state shown in the file list
+class DocumentRecord:
+    __slots__ = ("doc_id", "path", "name", "status", "pages", "seconds", "error")
+
+    def __init__(self, doc_id, path):
+        self.doc_id = doc_id
+        self.path = path
+        self.name = os.path.basename(path)
+        self.status = DocumentModel.QUEUED
+        self.pages = None
+        self.seconds = None
+        self.error = ""
+
+# DocumentModel class for the document registry behind the file list
+class DocumentModel(QAbstractListModel):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CACHED = "cached"
+    DUPLICATE = "duplicate"
+
+    PathRole = Qt.UserRole + 1
+    StatusRole = Qt.UserRole + 2
+    IdRole = Qt.UserRole + 3
+
+    STATUS_COLORS = {
+        QUEUED: QColor("#808080"),
+        RUNNING: QColor("#FFB900"),
+        DONE: QColor("#3FB950"),
+        FAILED: QColor("#F85149"),
+        CACHED: QColor("#518FBC"),
+        DUPLICATE: QColor("#A371F7")
+    }
+
+    # Sort keys offered in the UI, in the order of the sort combo box
+    SORT_KEYS = [
+        ("Added", lambda record: record.doc_id),
+        ("Name", lambda record: record.name.lower()),
+        ("Status", lambda record: record.status),
+        ("Pages", lambda record: record.pages if record.pages is not None else -1),
+        ("Time", lambda record: record.seconds if record.seconds is not None else -1.0)
+    ]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.records = []
+        self.visible = []
+        self.row_by_id = {}
+        self.record_by_path = {}
+        self.next_id = 0
+        self.filter_text = ""
+        self.sort_column = 0
+        self.sort_order = Qt.AscendingOrder
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.visible)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        record = self.visible[index.row()]
+        if role == Qt.DisplayRole:
+            return record.name
+        if role == Qt.DecorationRole:
+            return self.STATUS_COLORS[record.status]
+        if role == Qt.ToolTipRole:
+            lines = [record.path, f"Status: {record.status}"]
+            if record.pages is not None:
+                lines.append(f"Pages: {record.pages}")
+            if record.seconds is not None:
+                lines.append(f"Time: {record.seconds:.2f} s")
+            if record.error:
+                lines.append(f"{'Note' if record.status == self.DUPLICATE else 'Error'}: {record.error}")
+            return "\n".join(lines)
+        if role == self.PathRole:
+            return record.path
+        if role == self.StatusRole:
+            return record.status
+        if role == self.IdRole:
+            return record.doc_id
+        return None
+
+    def matches_filter(self, record):
+        # Filtering happens here in one Python pass; a QSortFilterProxyModel would
+        # call data() once per row through the bindings, which is slow at 100k rows
+        text = self.filter_text
+        return not text or text in record.name.lower() or text in record.status
+
+    def rebuild_rows(self):
+        self.row_by_id = {record.doc_id: row for row, record in enumerate(self.visible)}
+
+    def contains(self, path):
+        return path in self.record_by_path
+
+    def record_for_path(self, path):
+        return self.record_by_path.get(path)
+
+    def row_for_path(self, path):
+        record = self.record_by_path.get(path)
+        return None if record is None else self.row_by_id.get(record.doc_id)
+
+    def paths(self):
+        """Every document, shown or filtered out, in the order it was added."""
+        return list(self.record_by_path)
+
+    def document_count(self):
+        return len(self.records)
+
+    def add_paths(self, paths):
+        """Appends new documents in one insertion; returns the row of the first visible one, or None if the filter hides them all."""
+        new_records = []
+        for path in paths:
+            if path in self.record_by_path:
+                continue
+            record = DocumentRecord(self.next_id, path)
+            self.next_id += 1
+            self.record_by_path[path] = record
+            new_records.append(record)
+        first_row = len(self.visible)
+        self.records.extend(new_records)
+        shown = [record for record in new_records if self.matches_filter(record)]
+        if shown:
+            self.beginInsertRows(QModelIndex(), first_row, first_row + len(shown) - 1)
+            for row, record in enumerate(shown, first_row):
+                self.visible.append(record)
+                self.row_by_id[record.doc_id] = row
+            self.endInsertRows()
+            return first_row
+        return None
+
+    def set_status(self, path, status, pages=None, seconds=None, error=""):
+        record = self.record_by_path.get(path)
+        if record is None:
+            return
+        record.status = status
+        if pages is not None:
+            record.pages = pages
+        if seconds is not None:
+            record.seconds = seconds
+        record.error = error
+        row = self.row_by_id.get(record.doc_id)
+        if row is not None:
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+
+    def set_filter(self, text):
+        self.beginResetModel()
+        self.filter_text = text.strip().lower()
+        self.visible = [record for record in self.records if self.matches_filter(record)]
+        self.rebuild_rows()
+        self.endResetModel()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sort_column = column if 0 <= column < len(self.SORT_KEYS) else 0
+        self.sort_order = order
+        key = self.SORT_KEYS[self.sort_column][1]
+        reverse = order == Qt.DescendingOrder
+        self.layoutAboutToBeChanged.emit()
+        old_persistent = self.persistentIndexList()
+        old_ids = [self.visible[index.row()].doc_id for index in old_persistent]
+        self.records.sort(key=key, reverse=reverse)
+        self.visible.sort(key=key, reverse=reverse)
+        self.rebuild_rows()
+        self.changePersistentIndexList(old_persistent, [self.index(self.row_by_id[doc_id]) for doc_id in old_ids])
+        self.layoutChanged.emit()
+
 # MainWindow class for the main application window
 class MainWindow(QMainWindow):
+    STREAM_INTERVAL_MS = 16  # streamed pages reach the viewer at most once a frame
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("PDF Text Extractor")
         self.setGeometry(100, 100, 1400, 900)
         self.setAcceptDrops(True)
-        self.pdf_paths = []
-        self.extracted_texts = {}
+        self.deduplicator = PDFDeduplicator()
+        self.extracted_pages = {}
+        # Pages of documents still being extracted, shown as they arrive
+        self.streamed_pages = {}
+        self.pending_stream = []
+        self.stream_timer = QTimer(self)
+        self.stream_timer.setSingleShot(True)
+        self.stream_timer.setInterval(self.STREAM_INTERVAL_MS)
+        self.stream_timer.timeout.connect(self.flush_streamed_pages)
         self.output_path = ""
         self.current_theme = "dark"
         self.search_positions = []
         self.current_search_index = 0
         self.theme_manager = ThemeManager()
+        self.performance_recorder = PerformanceRecorder()
+        self.last_performance_summary = ""
+        self.watch_service = None
         self.create_menu_bar()
         self.create_toolbar()
         self.create_ui()
@@ -877,6 +4853,10 @@ class MainWindow(QMainWindow):
         open_action.setShortcut("Ctrl+O")
         open_action.setToolTip("Open PDF files (Ctrl + O)")
         open_action.triggered.connect(self.select_pdf)
+        open_folder_action = QAction(QIcon.fromTheme("folder-open"), "Open Folder...", self)
+        open_folder_action.setShortcut("Ctrl+Shift+O")
+        open_folder_action.setToolTip("Add every PDF in a folder and its subfolders (Ctrl + Shift + O)")
+        open_folder_action.triggered.connect(self.select_pdf_folder)
         save_action = QAction(QIcon.fromTheme("document-save"), "Save As...", self)
         save_action.setShortcut("Ctrl+S")
         save_action.setToolTip("Select Output Folder (Ctrl + S)")
@@ -886,6 +4866,7 @@ class MainWindow(QMainWindow):
         exit_action.setToolTip("Exit Application (Ctrl + Q)")
         exit_action.triggered.connect(self.close)
         file_menu.addAction(open_action)
+        file_menu.addAction(open_folder_action)
         file_menu.addAction(save_action)
         file_menu.addSeparator()
         file_menu.addAction(exit_action)
@@ -914,6 +4895,104 @@ class MainWindow(QMainWindow):
         theme_menu.addAction(dark_action)
         theme_menu.addAction(light_action)
 
+        self.instrumentation_action = QAction("Performance Instrumentation", self)
+        self.instrumentation_action.setCheckable(True)
+        self.instrumentation_action.setChecked(True)
+        self.instrumentation_action.setToolTip("Record per-stage timings for every page and document")
+        settings_menu.addAction(self.instrumentation_action)
+
+        self.dedup_content_action = QAction("Skip Duplicate PDFs (Content Hash)", self)
+        self.dedup_content_action.setCheckable(True)
+        self.dedup_content_action.setToolTip("Ignore added files that are byte-identical to one already in the list")
+        self.dedup_content_action.toggled.connect(self.toggle_dedup_content)
+        settings_menu.addAction(self.dedup_content_action)
+
+        self.page_cache_action = QAction("Cache Extracted Pages", self)
+        self.page_cache_action.setCheckable(True)
+        self.page_cache_action.setChecked(True)
+        self.page_cache_action.setToolTip("Keep extracted page text in the output folder so later runs reuse it")
+        settings_menu.addAction(self.page_cache_action)
+
+        self.boilerplate_action = QAction("Strip Headers and Footers", self)
+        self.boilerplate_action.setCheckable(True)
+        self.boilerplate_action.setToolTip("Remove running headers, footers and page numbers that repeat across pages")
+        settings_menu.addAction(self.boilerplate_action)
+
+        self.schedule_action = QAction("Shortest Documents First", self)
+        self.schedule_action.setCheckable(True)
+        self.schedule_action.setChecked(True)
+        self.schedule_action.setToolTip("Extract short documents before long ones; clicking a document moves it to the front")
+        settings_menu.addAction(self.schedule_action)
+
+        self.isolate_action = QAction("Isolate Each Document", self)
+        self.isolate_action.setCheckable(True)
+        self.isolate_action.setToolTip(
+            f"Extract documents in a worker process that is killed if one crashes or takes longer than "
+            f"{DocumentRunner.DEFAULT_TIMEOUT // 60} minutes. Without it the limit is checked between pages, "
+            f"so a page that hangs cannot be stopped. There is no preview while extracting"
+        )
+        settings_menu.addAction(self.isolate_action)
+
+        self.fallback_action = QAction("Retry Failed Documents as Layout-preserved", self)
+        self.fallback_action.setCheckable(True)
+        self.fallback_action.setChecked(True)
+        self.fallback_action.setToolTip("Extract a document again in Layout-preserved mode when Column-aware extraction fails")
+        settings_menu.addAction(self.fallback_action)
+
+        self.statistics_action = QAction("Corpus Statistics (Word and Bigram Counts)", self)
+        self.statistics_action.setCheckable(True)
+        self.statistics_action.setToolTip(
+            f"Count words and word pairs while extracting and write frequency tables to {CorpusStatistics.FOLDER} in the output folder"
+        )
+        settings_menu.addAction(self.statistics_action)
+
+        self.near_duplicates_action = QAction("Defer Near-Duplicate Documents", self)
+        self.near_duplicates_action.setCheckable(True)
+        self.near_duplicates_action.setToolTip(
+            "Compare the first pages of each document with those already extracted and move reprints and "
+            "near-identical versions to the end of the batch; they are listed in near_duplicates.json"
+        )
+        settings_menu.addAction(self.near_duplicates_action)
+
+        self.normalize_action = QAction("Normalize Text (Hyphens, Spaces, Ligatures)", self)
+        self.normalize_action.setCheckable(True)
+        self.normalize_action.setToolTip("Join words hyphenated across lines, collapse whitespace and expand ligatures such as \ufb01")
+        settings_menu.addAction(self.normalize_action)
+
+        self.mmap_action = QAction("Memory-map PDFs", self)
+        self.mmap_action.setCheckable(True)
+        self.mmap_action.setToolTip("Read documents straight from a memory-mapped file instead of through file reads")
+        self.mmap_action.toggled.connect(self.toggle_mmap)
+        settings_menu.addAction(self.mmap_action)
+
+        self.read_ahead_action = QAction("Read Documents Ahead", self)
+        self.read_ahead_action.setCheckable(True)
+        self.read_ahead_action.setChecked(True)
+        self.read_ahead_action.setToolTip(
+            "Read the next documents on background threads while the current one is extracted and write outputs "
+            "in parallel; helps most on network shares"
+        )
+        settings_menu.addAction(self.read_ahead_action)
+
+        self.ocr_action = QAction("OCR Image-only Pages (Tesseract)", self)
+        self.ocr_action.setCheckable(True)
+        self.ocr_action.setToolTip("Read pages without a text layer with Tesseract OCR in a separate worker process")
+        settings_menu.addAction(self.ocr_action)
+
+        tools_menu = menubar.addMenu('&Tools')
+        summary_action = QAction("Performance Summary...", self)
+        summary_action.triggered.connect(self.show_performance_dialog)
+        export_trace_action = QAction("Export Performance Trace...", self)
+        export_trace_action.triggered.connect(self.export_performance_trace)
+        self.watch_action = QAction("Watch Folder...", self)
+        self.watch_action.setCheckable(True)
+        self.watch_action.setToolTip("Automatically extract PDFs dropped into a folder")
+        self.watch_action.triggered.connect(self.toggle_watch_folder)
+        tools_menu.addAction(self.watch_action)
+        tools_menu.addSeparator()
+        tools_menu.addAction(summary_action)
+        tools_menu.addAction(export_trace_action)
+
         help_menu = menubar.addMenu('&Help')
         about_action = QAction(QIcon.fromTheme("help-about"), "About", self)
         about_action.triggered.connect(self.show_about)
@@ -971,11 +5050,31 @@ class MainWindow(QMainWindow):
         
         files_label = QLabel("Selected PDF(s):")
         files_label.setObjectName("sectionLabel")
-        self.files_list = QListWidget()
-        self.files_list.setSelectionMode(QListWidget.MultiSelection)
+        self.document_model = DocumentModel(self)
+        self.files_list = QListView()
+        self.files_list.setModel(self.document_model)
+        self.files_list.setSelectionMode(QAbstractItemView.MultiSelection)
+        self.files_list.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        # Uniform rows and batched layout keep the view responsive with 100k documents
+        self.files_list.setUniformItemSizes(True)
+        self.files_list.setLayoutMode(QListView.Batched)
+        self.files_list.setBatchSize(500)
         self.files_list.setToolTip("List of selected PDF files. You can select multiple files.")
-        self.files_list.itemClicked.connect(self.on_file_selected)
+
+        list_tools_layout = QHBoxLayout()
+        self.files_filter = QLineEdit()
+        self.files_filter.setPlaceholderText("Filter by name or status...")
+        self.files_filter.setToolTip("Show only documents whose name or status contains this text")
+        self.files_filter.textChanged.connect(self.document_model.set_filter)
+        self.files_sort = QComboBox()
+        self.files_sort.addItems([f"Sort: {name}" for name, _ in DocumentModel.SORT_KEYS])
+        self.files_sort.setToolTip("Sort the document list")
+        self.files_sort.currentIndexChanged.connect(self.sort_documents)
+        list_tools_layout.addWidget(self.files_filter)
+        list_tools_layout.addWidget(self.files_sort)
+
         left_layout.addWidget(files_label)
+        left_layout.addLayout(list_tools_layout)
         left_layout.addWidget(self.files_list)
         
         extraction_label = QLabel("Extraction Options:")
@@ -1007,10 +5106,54 @@ class MainWindow(QMainWindow):
         self.output_format.setToolTip("Select the output format for extracted text")
         format_layout.addWidget(format_label)
         format_layout.addWidget(self.output_format)
+
+        folders_layout = QHBoxLayout()
+        folders_label = QLabel("Folders:")
+        self.output_layout = QComboBox()
+        for layout_name, layout_label in ExtractionEngine.OUTPUT_LAYOUTS.items():
+            self.output_layout.addItem(layout_label, layout_name)
+        self.output_layout.setToolTip(
+            "Flat: every output in the output folder\n"
+            "Mirror input folders: recreate the folders of the selected PDFs, so equal file names never clash\n"
+            "Sharded subfolders: spread outputs over 256 hashed subfolders for very large batches"
+        )
+        folders_layout.addWidget(folders_label)
+        folders_layout.addWidget(self.output_layout)
+
+        compress_layout = QHBoxLayout()
+        compress_label = QLabel("Compress:")
+        self.compression = QComboBox()
+        self.compression.addItem("None", None)
+        for method in OutputWriter.EXTENSIONS:
+            try:
+                check_compression(method)
+            except Exception as e:
+                logging.info(f"{method} compression unavailable: {str(e)}")
+                continue
+            self.compression.addItem(f"{method} per file", {"method": method, "archive": False})
+            self.compression.addItem(f"{method} archive per batch", {"method": method, "archive": True})
+        self.compression.setToolTip("Compress TXT, HTML and Markdown outputs on a background thread while extraction continues")
+        compress_layout.addWidget(compress_label)
+        compress_layout.addWidget(self.compression)
+
+        pages_layout = QHBoxLayout()
+        pages_label = QLabel("Pages:")
+        self.page_mode = QComboBox()
+        self.page_mode.addItems(list(PageSelection.MODES.values()))
+        self.page_mode.setToolTip("Extract every page, chosen page ranges, or a quick sample")
+        self.page_value = QLineEdit()
+        self.page_value.setEnabled(False)
+        self.page_mode.currentTextChanged.connect(self.update_page_value_hint)
+        pages_layout.addWidget(pages_label)
+        pages_layout.addWidget(self.page_mode)
+        pages_layout.addWidget(self.page_value)
         
         options_layout.addLayout(mode_layout)
         options_layout.addWidget(self.mode_description)
         options_layout.addLayout(format_layout)
+        options_layout.addLayout(folders_layout)
+        options_layout.addLayout(compress_layout)
+        options_layout.addLayout(pages_layout)
         options_group.setLayout(options_layout)
         left_layout.addWidget(options_group)
         
@@ -1030,10 +5173,10 @@ class MainWindow(QMainWindow):
         
         text_tab = QWidget()
         text_layout = QVBoxLayout(text_tab)
-        self.text_area = QTextEdit()
-        self.text_area.setReadOnly(True)
+        self.text_viewer = PagedTextViewer()
+        self.text_area = self.text_viewer.editor
         self.text_area.setToolTip("Extracted text will appear here")
-        text_layout.addWidget(self.text_area)
+        text_layout.addWidget(self.text_viewer)
         
         self.tabs.addTab(preview_tab, "Original PDF")
         self.tabs.addTab(text_tab, "Processed Text")
@@ -1100,7 +5243,7 @@ class MainWindow(QMainWindow):
         self.mode_description.setText(descriptions.get(mode, ""))
 
     def init_connections(self):
-        self.files_list.itemClicked.connect(self.on_file_selected)
+        self.files_list.clicked.connect(self.on_file_selected)
 
     def init_shortcuts(self):
         QShortcut(QKeySequence("Ctrl+P"), self, self.start_extraction)
@@ -1131,21 +5274,20 @@ class MainWindow(QMainWindow):
             file_dialog.setWindowTitle("Select PDF File(s)")
             if file_dialog.exec():
                 selected_files = file_dialog.selectedFiles()
-                if selected_files:
-                    for file in selected_files:
-                        if file not in self.pdf_paths:
-                            self.pdf_paths.append(file)
-                            file_name = os.path.basename(file)
-                            item = QListWidgetItem(file_name)
-                            item.setToolTip(file)
-                            self.files_list.addItem(item)
-                    self.files_list.setCurrentRow(self.files_list.count() - len(selected_files))
-                    self.preview_widget.set_document(self.pdf_paths[-1])
-                    self.check_ready_to_extract()
+                if selected_files and self.add_pdf_paths(selected_files):
                     self.show_toast("PDF(s) added successfully")
         except Exception as e:
             ErrorHandler.show_error(f"Error selecting PDF(s): {str(e)}", "Selection Error", self)
 
+    def select_pdf_folder(self):
+        try:
+            folder = QFileDialog.getExistingDirectory(self, "Select Folder with PDF(s)")
+            if folder:
+                added = self.add_pdf_paths([folder])
+                self.show_toast(f"{added} PDF(s) added from folder" if added else "No new PDF(s) found in folder")
+        except Exception as e:
+            ErrorHandler.show_error(f"Error importing folder: {str(e)}", "Selection Error", self)
+
     def select_output_folder(self):
         try:
             folder_dialog = QFileDialog(self)
@@ -1161,44 +5303,104 @@ class MainWindow(QMainWindow):
             ErrorHandler.show_error(f"Error selecting output folder: {str(e)}", "Selection Error", self)
 
     def check_ready_to_extract(self):
-        is_ready = bool(self.pdf_paths and self.output_path)
+        is_ready = bool(self.document_model.document_count() and self.output_path)
         self.process_btn.setEnabled(is_ready)
         if is_ready:
             self.status_bar.showMessage("Ready to process")
         else:
             missing = []
-            if not self.pdf_paths:
+            if not self.document_model.document_count():
                 missing.append("PDF file(s)")
             if not self.output_path:
                 missing.append("output folder")
             self.status_bar.showMessage(f"Missing: {', '.join(missing)}")
 
+    def update_page_value_hint(self, label):
+        hints = {
+            "Page ranges": ("1-5,10,-3", "Comma-separated pages and ranges; negative numbers count from the last page"),
+            "First N pages": ("N", "Extract only the first N pages"),
+            "Every k-th page": ("k", "Extract pages 1, 1+k, 1+2k, ..."),
+            "Random k pages": ("k", "Extract a repeatable random sample of k pages")
+        }
+        placeholder, tooltip = hints.get(label, ("", ""))
+        self.page_value.setEnabled(bool(placeholder))
+        self.page_value.setPlaceholderText(placeholder)
+        self.page_value.setToolTip(tooltip)
+
+    def page_selection(self):
+        return PageSelection.from_label(self.page_mode.currentText(), self.page_value.text())
+
+    def toggle_mmap(self, checked):
+        DOCUMENT_POOL.use_mmap = checked
+        # Documents opened the other way are closed once idle, so the setting applies to the next open
+        DOCUMENT_POOL.discard()
+
+    def normalize_settings(self):
+        return dict(TextNormalizer.DEFAULTS) if self.normalize_action.isChecked() else None
+
+    def ocr_settings(self):
+        if not self.ocr_action.isChecked():
+            return None
+        check_ocr_engine("tesseract")
+        return {"engine": "tesseract", "workers": max(1, min(2, (os.cpu_count() or 2) // 4))}
+
     def start_extraction(self):
-        if not self.pdf_paths or not self.output_path:
+        if not self.document_model.document_count() or not self.output_path:
             ErrorHandler.show_warning("Please select both PDF file(s) and output folder.", "Invalid Selection", self)
             return
+        try:
+            page_selection = self.page_selection()
+        except ValueError as e:
+            ErrorHandler.show_warning(str(e), "Invalid Page Selection", self)
+            return
+        self.performance_recorder.enabled = self.instrumentation_action.isChecked()
+        try:
+            self.thread = ExtractionThread(
+                self.document_model.paths(),
+                self.output_path,
+                self.extraction_mode.currentText(),
+                self.output_format.currentText(),
+                self.performance_recorder,
+                page_selection,
+                self.page_cache_action.isChecked(),
+                self.ocr_settings(),
+                self.boilerplate_action.isChecked(),
+                self.normalize_settings(),
+                self.output_layout.currentData(),
+                self.compression.currentData(),
+                "sjf" if self.schedule_action.isChecked() else "fifo",
+                DocumentRunner.DEFAULT_TIMEOUT,
+                self.isolate_action.isChecked(),
+                self.fallback_action.isChecked(),
+                {} if self.statistics_action.isChecked() else None,
+                {"action": "defer"} if self.near_duplicates_action.isChecked() else None,
+                None if self.read_ahead_action.isChecked() else {"prefetch": 0, "writers": 1}
+            )
+        except Exception as e:
+            ErrorHandler.show_error(f"Error starting extraction: {str(e)}", "Extraction Error", self)
+            return
         self.set_ui_enabled(False)
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
-        self.thread = ExtractionThread(
-            self.pdf_paths,
-            self.output_path,
-            self.extraction_mode.currentText(),
-            self.output_format.currentText()
-        )
         self.thread.progress.connect(self.update_progress)
         self.thread.finished.connect(self.extraction_finished)
         self.thread.error.connect(self.handle_error)
         self.thread.preview_ready.connect(self.preview_widget.load_current_page)
         self.thread.toast.connect(self.show_toast)
-        self.thread.extracted_text.connect(self.store_extracted_text)
+        self.thread.extracted_pages.connect(self.store_extracted_pages)
+        self.thread.page_streamed.connect(self.stream_page)
+        self.thread.document_status.connect(self.update_document_status)
+        self.thread.performance_summary.connect(self.handle_performance_summary)
+        self.thread.failures_reported.connect(self.handle_failures)
+        self.thread.batch_finished.connect(self.batch_finished)
         self.thread.start()
 
     def set_ui_enabled(self, enabled):
-        self.process_btn.setEnabled(enabled and bool(self.pdf_paths and self.output_path))
+        self.process_btn.setEnabled(enabled and bool(self.document_model.document_count() and self.output_path))
         self.extraction_mode.setEnabled(enabled)
         self.output_format.setEnabled(enabled)
-        self.files_list.setEnabled(enabled)
+        self.output_layout.setEnabled(enabled)
+        self.compression.setEnabled(enabled)
 
     def update_progress(self, percentage, message):
         self.progress_bar.setValue(percentage)
@@ -1210,6 +5412,125 @@ class MainWindow(QMainWindow):
         self.status_bar.showMessage(f"Extraction complete: {output_file}")
         self.show_toast("Extraction completed successfully")
 
+    def handle_performance_summary(self, summary):
+        self.last_performance_summary = summary
+        logging.info("Extraction performance summary:\n%s", summary)
+        self.status_bar.showMessage(summary.splitlines()[0])
+
+    def show_performance_dialog(self):
+        if not self.last_performance_summary:
+            self.show_toast("No performance data yet. Process some PDF(s) first.")
+            return
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Performance Summary")
+        dialog.setMinimumSize(700, 400)
+        layout = QVBoxLayout(dialog)
+        summary_text = QTextEdit()
+        summary_text.setReadOnly(True)
+        summary_text.setFont(QFont("Monospace"))
+        summary_text.setPlainText(self.last_performance_summary)
+        layout.addWidget(summary_text)
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(dialog.close)
+        layout.addWidget(close_btn, alignment=Qt.AlignRight)
+        dialog.exec()
+
+    def export_performance_trace(self):
+        if not self.performance_recorder.documents:
+            self.show_toast("No performance data yet. Process some PDF(s) first.")
+            return
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self,
+            "Export Performance Trace",
+            "extraction_trace.json",
+            "Chrome Trace (*.json);;JSON Report (*.json)"
+        )
+        if not file_path:
+            return
+        try:
+            if selected_filter.startswith("Chrome"):
+                self.performance_recorder.export_chrome_trace(file_path)
+            else:
+                self.performance_recorder.export_json(file_path)
+            self.show_toast("Performance trace exported")
+        except Exception as e:
+            ErrorHandler.show_error(f"Error exporting performance trace: {str(e)}", "Export Error", self)
+
+    def toggle_watch_folder(self, checked):
+        if not checked:
+            self.stop_watch_folder()
+            return
+        if not self.output_path:
+            ErrorHandler.show_warning("Please select an output folder before watching a folder.", "Invalid Selection", self)
+            self.watch_action.setChecked(False)
+            return
+        folder = QFileDialog.getExistingDirectory(self, "Select Folder to Watch")
+        if not folder:
+            self.watch_action.setChecked(False)
+            return
+        try:
+            self.watch_service = WatchFolderService(
+                folder,
+                {
+                    "output_path": self.output_path,
+                    "extraction_mode": self.extraction_mode.currentText(),
+                    "output_format": self.output_format.currentText(),
+                    "page_selection": self.page_selection(),
+                    "use_cache": self.page_cache_action.isChecked(),
+                    "ocr": self.ocr_settings(),
+                    "strip_boilerplate": self.boilerplate_action.isChecked(),
+                    "normalize": self.normalize_settings(),
+                    "output_layout": self.output_layout.currentData(),
+                    "input_root": folder,
+                    "compression": self.compression.currentData(),
+                    "use_mmap": self.mmap_action.isChecked()
+                },
+                max_workers=max(1, min(4, (os.cpu_count() or 2) // 2)),
+                parent=self
+            )
+            self.watch_service.document_started.connect(self.handle_watch_started)
+            self.watch_service.document_skipped.connect(
+                lambda pdf_path: self.add_pdf_path(pdf_path) or self.update_document_status(pdf_path, DocumentModel.CACHED)
+            )
+            self.watch_service.document_finished.connect(self.handle_watched_document)
+            self.watch_service.document_failed.connect(self.handle_watch_failure)
+            self.watch_service.start()
+            self.status_bar.showMessage(f"Watching {folder}")
+            self.show_toast("Watching folder for new PDF(s)")
+        except Exception as e:
+            self.watch_service = None
+            self.watch_action.setChecked(False)
+            ErrorHandler.show_error(f"Error starting folder watch: {str(e)}", "Watch Error", self)
+
+    def stop_watch_folder(self):
+        if self.watch_service is not None:
+            self.watch_service.stop()
+            self.watch_service.deleteLater()
+            self.watch_service = None
+            self.status_bar.showMessage("Stopped watching folder")
+
+    def handle_watch_started(self, pdf_path):
+        self.add_pdf_path(pdf_path)
+        self.update_document_status(pdf_path, DocumentModel.RUNNING)
+        self.status_bar.showMessage(f"Watching: processing {os.path.basename(pdf_path)}")
+
+    def handle_watched_document(self, result):
+        pdf_path = result["pdf_path"]
+        self.add_pdf_path(pdf_path)
+        self.update_document_status(pdf_path, DocumentModel.DONE, result["page_count"], result["seconds"])
+        self.store_extracted_pages(pdf_path, result["page_texts"])
+        self.status_bar.showMessage(f"Extraction complete: {result['output_file']}")
+        self.show_toast(f"Extraction complete for {os.path.basename(pdf_path)}")
+
+    def handle_watch_failure(self, pdf_path, error_message):
+        self.add_pdf_path(pdf_path)
+        self.update_document_status(pdf_path, DocumentModel.FAILED, error=error_message)
+        self.status_bar.showMessage(f"Extraction failed for {os.path.basename(pdf_path)}: {error_message}")
+
+    def closeEvent(self, event):
+        self.stop_watch_folder()
+        super().closeEvent(event)
+
     def handle_error(self, error_message):
         self.set_ui_enabled(True)
         self.progress_bar.setVisible(False)
@@ -1217,25 +5538,30 @@ class MainWindow(QMainWindow):
         ErrorHandler.show_error(f"An error occurred during extraction:\n{error_message}", "Extraction Error", self)
         self.show_toast("Extraction failed", error=True)
 
+    def batch_finished(self):
+        # The last document may have been skipped or failed, so no per-document signal re-enabled the UI
+        self.set_ui_enabled(True)
+        self.progress_bar.setVisible(False)
+
+    def handle_failures(self, count, report_path):
+        self.set_ui_enabled(True)
+        self.progress_bar.setVisible(False)
+        self.status_bar.showMessage(f"{count} document(s) could not be extracted")
+        message = f"{count} document(s) could not be extracted; the rest of the batch was completed."
+        if report_path:
+            message += f"\n\nDetails were written to {report_path}"
+        ErrorHandler.show_warning(message, "Extraction Failures", self)
+
     def search_text(self):
         search_term = self.search_input.text().strip()
         if not search_term:
             self.clear_search_highlights()
+            self.search_positions = []
             self.search_count.setText("0/0")
             return
-        cursor = self.text_area.textCursor()
-        highlight_format = QTextCursor().charFormat()
-        highlight_format.setBackground(QColor("#4DA6FF"))
-        cursor.movePosition(QTextCursor.Start)
-        self.text_area.setTextCursor(cursor)
-        self.clear_search_highlights()
-        self.search_positions = []
-        while True:
-            cursor = self.text_area.document().find(search_term, cursor)
-            if cursor.isNull():
-                break
-            self.search_positions.append((cursor.selectionStart(), cursor.selectionEnd()))
-            cursor.mergeCharFormat(highlight_format)
+        # Matches are found over every page, not only the pages laid out in the viewer
+        self.search_positions = self.text_viewer.find_all(search_term)
+        self.text_viewer.set_highlights(self.search_positions)
         total_matches = len(self.search_positions)
         if total_matches > 0:
             self.current_search_index = 0
@@ -1257,19 +5583,11 @@ class MainWindow(QMainWindow):
         self.navigate_to_match(self.current_search_index)
 
     def clear_search_highlights(self):
-        cursor = self.text_area.textCursor()
-        cursor.select(QTextCursor.Document)
-        format_orig = QTextCursor().charFormat()
-        format_orig.setBackground(Qt.transparent)
-        cursor.mergeCharFormat(format_orig)
+        self.text_viewer.set_highlights([])
 
     def navigate_to_match(self, index):
         if 0 <= index < len(self.search_positions):
-            start, end = self.search_positions[index]
-            cursor = self.text_area.textCursor()
-            cursor.setPosition(start)
-            cursor.setPosition(end, QTextCursor.KeepAnchor)
-            self.text_area.setTextCursor(cursor)
+            self.text_viewer.select_match(self.search_positions[index])
             self.search_count.setText(f"{index + 1}/{len(self.search_positions)}")
 
     def copy_text(self):
@@ -1316,7 +5634,7 @@ class MainWindow(QMainWindow):
     def dragEnterEvent(self, event):
         if event.mimeData().hasUrls():
             urls = event.mimeData().urls()
-            if any(url.toLocalFile().endswith('.pdf') for url in urls):
+            if any(url.toLocalFile().lower().endswith('.pdf') or os.path.isdir(url.toLocalFile()) for url in urls):
                 event.acceptProposedAction()
             else:
                 event.ignore()
@@ -1325,36 +5643,441 @@ class MainWindow(QMainWindow):
 
     def dropEvent(self, event):
         urls = event.mimeData().urls()
-        added = False
-        for url in urls:
-            file_path = url.toLocalFile()
-            if file_path.endswith('.pdf') and file_path not in self.pdf_paths:
-                self.pdf_paths.append(file_path)
-                file_name = os.path.basename(file_path)
-                item = QListWidgetItem(file_name)
-                item.setToolTip(file_path)
-                self.files_list.addItem(item)
-                added = True
-        if added:
-            self.files_list.setCurrentRow(self.files_list.count() - 1)
-            last_pdf = self.pdf_paths[-1]
-            self.preview_widget.set_document(last_pdf)
-            self.check_ready_to_extract()
+        if self.add_pdf_paths([url.toLocalFile() for url in urls if url.isLocalFile()]):
             self.show_toast("PDF(s) added via drag-and-drop")
 
-    def on_file_selected(self, item):
-        pdf_path = item.toolTip()
+    def add_pdf_paths(self, paths, recursive=True, show_preview=True):
+        """Adds PDFs (and the PDFs inside folders) to the batch; returns how many were new."""
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            deduplicate = self.dedup_content_action.isChecked()
+            new_paths = []
+            new_path_set = set()
+            skipped_duplicates = 0
+            for file_path in scan_pdf_files(paths, recursive):
+                file_path = os.path.normpath(file_path)
+                if file_path in new_path_set or self.document_model.contains(file_path):
+                    continue
+                if deduplicate and self.deduplicator.is_duplicate(file_path) is not None:
+                    skipped_duplicates += 1
+                    continue
+                new_path_set.add(file_path)
+                new_paths.append(file_path)
+            if not new_paths:
+                return 0
+            # One model insertion for the whole batch instead of one per file
+            first_new_row = self.document_model.add_paths(new_paths)
+            if skipped_duplicates:
+                logging.info(f"Skipped {skipped_duplicates} duplicate PDF(s)")
+            if show_preview:
+                if first_new_row is not None:
+                    self.files_list.setCurrentIndex(self.document_model.index(first_new_row))
+                self.preview_widget.set_document(new_paths[-1])
+            self.check_ready_to_extract()
+            return len(new_paths)
+        finally:
+            QApplication.restoreOverrideCursor()
+
+    def add_pdf_path(self, file_path):
+        return self.add_pdf_paths([file_path], show_preview=False) > 0
+
+    def toggle_dedup_content(self, checked):
+        if not checked:
+            return
+        # Files added while the option was off are registered too, so new files are checked against the whole list
+        self.deduplicator = PDFDeduplicator()
+        for pdf_path in self.document_model.paths():
+            self.deduplicator.is_duplicate(pdf_path)
+
+    def sort_documents(self, sort_index):
+        self.document_model.sort(sort_index)
+
+    def update_document_status(self, pdf_path, status, pages=None, seconds=None, error=""):
+        self.document_model.set_status(pdf_path, status, pages, seconds, error)
+        if status in (DocumentModel.FAILED, DocumentModel.DUPLICATE):
+            self.streamed_pages.pop(pdf_path, None)
+
+    def on_file_selected(self, index):
+        pdf_path = index.data(DocumentModel.PathRole)
+        if not pdf_path:
+            return
         self.preview_widget.set_document(pdf_path)
-        extracted_text = self.extracted_texts.get(pdf_path, "")
-        self.text_area.setPlainText(extracted_text)
+        self.pending_stream = []
+        if pdf_path in self.streamed_pages:
+            self.text_viewer.set_pages(list(self.streamed_pages[pdf_path]))
+        else:
+            self.text_viewer.set_pages(self.extracted_pages.get(pdf_path, []))
+        thread = getattr(self, "thread", None)
+        if thread is not None and thread.isRunning() and pdf_path not in self.extracted_pages and thread.boost(pdf_path):
+            self.status_bar.showMessage(f"{os.path.basename(pdf_path)} moved to the front of the queue")
+        if self.search_input.text().strip():
+            self.search_text()
+
+    def store_extracted_pages(self, pdf_path, page_texts):
+        self.extracted_pages[pdf_path] = page_texts
+        self.streamed_pages.pop(pdf_path, None)
+        if self.files_list.currentIndex().data(DocumentModel.PathRole) == pdf_path:
+            # The streamed pages are superseded, OCR text included
+            self.pending_stream = []
+            self.text_viewer.set_pages(page_texts)
+
+    def stream_page(self, pdf_path, page_num, text):
+        pages = self.streamed_pages.get(pdf_path)
+        current = self.files_list.currentIndex().data(DocumentModel.PathRole) == pdf_path
+        # Pages arrive in order, so a lower page number means a new run of the document (a retry in a simpler mode)
+        if pages is None or (pages and page_num <= pages[-1][0]):
+            pages = self.streamed_pages[pdf_path] = []
+            if current:
+                self.pending_stream = []
+                self.text_viewer.set_pages([])
+        pages.append((page_num, text))
+        if current:
+            self.pending_stream.append((page_num, text))
+            if not self.stream_timer.isActive():
+                self.stream_timer.start()
+
+    def flush_streamed_pages(self):
+        if self.pending_stream:
+            pages, self.pending_stream = self.pending_stream, []
+            self.text_viewer.append_pages(pages)
+
+def collect_pdf_paths(inputs, recursive=True, deduplicate_content=False):
+    pdf_paths = []
+    seen = set()
+    deduplicator = PDFDeduplicator() if deduplicate_content else None
+    for pdf_path in scan_pdf_files(inputs, recursive):
+        pdf_path = os.path.abspath(pdf_path)
+        if pdf_path in seen:
+            continue
+        seen.add(pdf_path)
+        if deduplicator is not None:
+            original = deduplicator.is_duplicate(pdf_path)
+            if original is not None:
+                logging.info(f"Skipping {pdf_path}: identical to {original}")
+                continue
+        pdf_paths.append(pdf_path)
+    return pdf_paths
+
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(description="Extract text from PDF files. Starts the GUI when none of --input, --watch or --serve is given.")
+    parser.add_argument("--input", nargs="+", metavar="PATH", help="PDF files or folders to extract headlessly")
+    parser.add_argument("--watch", metavar="FOLDER", help="Watch a folder and extract PDFs as they arrive")
+    parser.add_argument("--serve", action="store_true", help="Run the local HTTP extraction service")
+    parser.add_argument("--host", default="127.0.0.1", help="Address the service listens on")
+    parser.add_argument("--port", type=int, default=8765, help="Port the service listens on (0 picks a free one)")
+    parser.add_argument("--max-queue", type=int, default=64, help="Queued service jobs before new ones are refused with 429")
+    parser.add_argument("--output", metavar="FOLDER", help="Output folder (required for headless runs)")
+    parser.add_argument("--mode", choices=["Column-aware", "Layout-preserved"], default="Column-aware")
+    parser.add_argument("--format", choices=list(ExtractionEngine.FORMAT_EXTENSIONS), default="TXT")
+    parser.add_argument(
+        "--output-layout", choices=list(ExtractionEngine.OUTPUT_LAYOUTS), default="flat",
+        help="flat: all outputs in --output; mirror: recreate the input folder structure; sharded: 256 hashed subfolders"
+    )
+    parser.add_argument("--no-recursive", dest="recursive", action="store_false", help="Do not descend into subfolders")
+    parser.add_argument(
+        "--schedule", choices=ExtractionScheduler.POLICIES, default="sjf",
+        help="sjf: extract documents with the fewest pages first; fifo: in the order found"
+    )
+    parser.add_argument(
+        "--timeout", type=float, metavar="SECONDS",
+        help="Give up on a document that takes longer than this; with --isolate a hung worker is killed"
+    )
+    parser.add_argument(
+        "--isolate", action="store_true",
+        help="Extract each document in a worker process so a crash or hang only fails that document"
+    )
+    parser.add_argument(
+        "--no-retry", dest="retry", action="store_false",
+        help="Do not retry a failed Column-aware extraction in Layout-preserved mode"
+    )
+    parser.add_argument(
+        "--stats", action="store_true",
+        help=f"Count tokens and n-grams while extracting and write frequency tables to {CorpusStatistics.FOLDER}/ in the output folder"
+    )
+    parser.add_argument("--stats-ngram", type=int, default=2, metavar="N", help="N-gram length counted by --stats (1 to 4, 1 for none)")
+    parser.add_argument("--stats-keep-case", action="store_true", help="Count tokens as written instead of lower-cased")
+    parser.add_argument(
+        "--near-duplicates", choices=NearDuplicateIndex.ACTIONS,
+        help="Compare each document's first pages with those already extracted (MinHash); "
+             "flag: only list near-duplicates, defer: extract them last, skip: leave out their remaining pages"
+    )
+    parser.add_argument(
+        "--similarity", type=float, default=NearDuplicateIndex.DEFAULTS["threshold"],
+        help="Estimated word-shingle Jaccard similarity at which --near-duplicates considers two documents the same"
+    )
+    parser.add_argument(
+        "--duplicate-sample-pages", type=int, default=NearDuplicateIndex.DEFAULTS["sample_pages"], metavar="N",
+        help="Pages of text compared by --near-duplicates"
+    )
+    parser.add_argument("--dedup-content", action="store_true", help="Skip PDFs that are byte-identical to one already queued")
+    parser.add_argument(
+        "--prefetch", type=int, default=ExtractionPipeline.DEFAULTS["prefetch"], metavar="N",
+        help="Documents read ahead of extraction in --input batches (0: read each one when its turn comes)"
+    )
+    parser.add_argument("--readers", type=int, default=ExtractionPipeline.DEFAULTS["readers"], help="Threads reading documents ahead")
+    parser.add_argument("--writers", type=int, default=ExtractionPipeline.DEFAULTS["writers"], help="Threads writing outputs in --input batches")
+    parser.add_argument("--workers", type=int, default=2, help="Concurrent extractions in watch and service mode")
+    parser.add_argument("--trim-mb", type=float, default=32, help="Empty MuPDF's cache between documents once the process grew this much")
+    parser.add_argument("--memory-ceiling", type=float, metavar="MB", help="Fail a document that grows its process by more than this")
+    parser.add_argument("--recycle-after", type=int, default=100, metavar="N", help="Replace watch/service workers after N documents each (0: never)")
+    parser.add_argument("--recycle-mb", type=float, metavar="MB", help="Replace watch/service workers once one reaches this RSS")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="Polling interval in seconds when notifications are unavailable")
+    parser.add_argument("--settle", type=float, default=1.0, help="Seconds a new file must stay unchanged before it is processed")
+    parser.add_argument("--poll", action="store_true", help="Always poll instead of using filesystem notifications")
+    parser.add_argument("--no-instrumentation", dest="instrumentation", action="store_false", help="Disable per-stage timing")
+    selection_group = parser.add_mutually_exclusive_group()
+    selection_group.add_argument("--pages", metavar="RANGES", help="Extract only these pages, e.g. 1-5,10,-3 (negative counts from the end)")
+    selection_group.add_argument("--sample", metavar="MODE:N", help="Extract a sample: first:N, every:K or random:K")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for --sample random:K")
+    parser.add_argument("--no-cache", dest="use_cache", action="store_false", help="Do not reuse or store extracted pages in the output folder")
+    parser.add_argument("--max-columns", type=int, default=ColumnLayout.DEFAULTS["max_columns"], help="Most columns Column-aware mode splits a page into")
+    parser.add_argument("--min-gutter", type=float, default=ColumnLayout.DEFAULTS["min_gutter"], help="Narrowest column gutter as a fraction of the page width")
+    parser.add_argument("--no-layout-reuse", dest="layout_reuse", action="store_false", help="Analyze the columns of every page instead of reusing a learned profile")
+    parser.add_argument("--mmap", action="store_true", help="Read PDFs from memory-mapped files (zero-copy)")
+    parser.add_argument("--strip-boilerplate", action="store_true", help="Remove running headers, footers and page numbers that repeat across pages")
+    parser.add_argument("--compress", choices=list(OutputWriter.EXTENSIONS), help="Compress TXT, HTML and Markdown outputs (zstd needs the zstandard package)")
+    parser.add_argument("--compress-level", type=int, help="Compression level (gzip 1-9, default 6; zstd 1-22, default 3)")
+    parser.add_argument("--archive", action="store_true", help="With --compress, write one solid .tar.gz/.tar.zst per batch instead of one file per PDF")
+    parser.add_argument(
+        "--normalize", nargs="?", const=",".join(TextNormalizer.DEFAULTS), metavar="STEPS",
+        help="Normalize extracted text; STEPS is a comma list of dehyphenate, whitespace and unicode (default: all)"
+    )
+    parser.add_argument("--ocr", choices=list(OCR_ENGINES), help="OCR pages that have no text layer with this engine")
+    parser.add_argument("--ocr-language", default="eng", help="Tesseract language(s), e.g. eng+deu")
+    parser.add_argument("--ocr-dpi", type=int, default=300, help="Resolution pages are rendered at for OCR")
+    parser.add_argument("--ocr-workers", type=int, default=1, help="Processes in the separate OCR pool")
+    args, unknown = parser.parse_known_args(argv)
+    if args.input or args.watch or args.serve:
+        if unknown:
+            parser.error(f"unrecognized arguments: {' '.join(unknown)}")
+        if not args.output:
+            parser.error("--output is required with --input, --watch or --serve")
+    # Only what argparse did not recognize goes to QApplication, e.g. -style or -platform
+    args.qt_arguments = unknown
+    try:
+        if args.pages:
+            args.page_selection = PageSelection("ranges", args.pages)
+        elif args.sample:
+            mode, _, value = args.sample.partition(":")
+            if mode not in ("first", "every", "random"):
+                raise ValueError(f"Unknown sample mode '{mode}'; use first:N, every:K or random:K")
+            args.page_selection = PageSelection(mode, value, args.seed)
+        else:
+            args.page_selection = PageSelection()
+    except ValueError as e:
+        parser.error(str(e))
+    args.layout_settings = {"max_columns": args.max_columns, "min_gutter": args.min_gutter, "reuse": args.layout_reuse}
+    args.normalize_settings = None
+    if args.normalize:
+        steps = [step.strip() for step in args.normalize.split(",") if step.strip()]
+        unknown = [step for step in steps if step not in TextNormalizer.DEFAULTS]
+        if unknown:
+            parser.error(f"Unknown normalization step(s): {', '.join(unknown)}")
+        args.normalize_settings = {step: step in steps for step in TextNormalizer.DEFAULTS}
+    args.memory_settings = {
+        "trim_mb": args.trim_mb, "ceiling_mb": args.memory_ceiling,
+        "recycle_documents": args.recycle_after, "recycle_mb": args.recycle_mb
+    }
+    args.compression_settings = None
+    if args.compress:
+        try:
+            check_compression(args.compress)
+        except Exception as e:
+            parser.error(str(e))
+        args.compression_settings = {"method": args.compress, "level": args.compress_level, "archive": args.archive}
+    elif args.archive:
+        parser.error("--archive requires --compress")
+    if args.timeout is not None and args.timeout <= 0:
+        parser.error("--timeout must be positive")
+    if args.prefetch < 0:
+        parser.error("--prefetch cannot be negative")
+    if args.readers < 1 or args.writers < 1:
+        parser.error("--readers and --writers must be at least 1")
+    args.pipeline_settings = {"prefetch": args.prefetch, "readers": args.readers, "writers": args.writers}
+    args.near_duplicate_settings = None
+    if args.near_duplicates:
+        if args.watch or args.serve:
+            parser.error("--near-duplicates applies to --input batches only")
+        if not 0 < args.similarity <= 1:
+            parser.error("--similarity must be between 0 and 1")
+        if args.duplicate_sample_pages < 1:
+            parser.error("--duplicate-sample-pages must be at least 1")
+        args.near_duplicate_settings = {
+            "action": args.near_duplicates,
+            "threshold": args.similarity,
+            "sample_pages": args.duplicate_sample_pages
+        }
+    args.statistics_settings = None
+    if args.stats:
+        if args.watch or args.serve:
+            parser.error("--stats applies to --input batches only")
+        if not 1 <= args.stats_ngram <= 4:
+            parser.error("--stats-ngram must be between 1 and 4")
+        args.statistics_settings = {"ngram": args.stats_ngram, "lowercase": not args.stats_keep_case}
+    args.ocr_settings = None
+    if args.ocr:
+        try:
+            check_ocr_engine(args.ocr)
+        except Exception as e:
+            parser.error(str(e))
+        args.ocr_settings = {
+            "engine": args.ocr,
+            "language": args.ocr_language,
+            "dpi": args.ocr_dpi,
+            "workers": args.ocr_workers
+        }
+    return args
+
+def run_headless_batch(args):
+    recorder = PerformanceRecorder(enabled=args.instrumentation)
+    DOCUMENT_POOL.use_mmap = args.mmap
+    engine = ExtractionEngine(
+        args.output, args.mode, args.format, recorder, args.page_selection, args.use_cache, args.ocr_settings,
+        args.layout_settings, args.strip_boilerplate, args.normalize_settings, args.output_layout, common_folder(args.input),
+        args.compression_settings, memory=args.memory_settings, timeout=args.timeout, statistics=args.statistics_settings,
+        near_duplicates=args.near_duplicate_settings, writers=args.pipeline_settings["writers"]
+    )
+    runner = DocumentRunner(engine, args.isolate, args.retry)
+    engine.begin_statistics()
+    pdf_paths = collect_pdf_paths(args.input, args.recursive, args.dedup_content)
+    scheduler = ExtractionScheduler(pdf_paths, args.schedule)
+    scheduler.estimate(args.page_selection)
+    pipeline = ExtractionPipeline(runner, scheduler, **args.pipeline_settings)
+    pipeline.start()
+    deferred = deque()
+    try:
+        while True:
+            pdf_path, prefetched = pipeline.next()
+            if pdf_path is None:
+                if not deferred:
+                    break
+                pdf_path, prefetched = deferred.popleft(), None
+            logging.info(f"Processing {pdf_path}")
+            start = time.perf_counter()
+            try:
+                result = pipeline.run(pdf_path, prefetched=prefetched)
+            except NearDuplicateFound as e:
+                if engine.near_duplicates.action == "defer":
+                    logging.info(f"Deferring {pdf_path} to the end of the batch: {str(e)}")
+                    deferred.append(pdf_path)
+                else:
+                    logging.info(f"Skipping the rest of {pdf_path}: {str(e)}")
+                    scheduler.complete(pdf_path, time.perf_counter() - start)
+                continue
+            scheduler.complete(pdf_path, time.perf_counter() - start)
+            if result is None:
+                logging.error(f"Extraction failed for {pdf_path}: {runner.failures[-1]['attempts'][-1]['error']}")
+                continue
+            logging.info(
+                f"Extraction complete: {result['output_file']} "
+                f"({result['selected_pages']}/{result['page_count']} pages, {result['cached_pages']} from cache, "
+                f"{result['boilerplate_lines']} header/footer lines stripped)"
+            )
+            logging.info(format_page_kinds(result["page_kinds"]))
+    finally:
+        scheduler.stop()
+    runner.close()
+    failures = len(runner.failures) + len(engine.close())
+    utilization = pipeline.close()
+    statistics_summary = engine.write_statistics()
+    if statistics_summary is not None:
+        logging.info(f"Corpus statistics written to {engine.statistics_folder()}: {statistics_summary}")
+    report_path = runner.write_report(args.output)
+    if report_path:
+        logging.warning(f"{len(runner.failures)} document(s) failed; see {report_path}")
+    if engine.near_duplicates is not None:
+        duplicates_path = engine.near_duplicates.write_report(args.output)
+        if duplicates_path:
+            logging.info(f"{len(engine.near_duplicates.flagged)} near-duplicate document(s) listed in {duplicates_path}")
+    stats = engine.writer.stats
+    if args.compress and stats["raw_bytes"]:
+        logging.info(
+            f"Wrote {stats['files']} output(s): {stats['raw_bytes'] / 1e6:.1f} MB compressed to "
+            f"{stats['written_bytes'] / 1e6:.1f} MB ({stats['raw_bytes'] / max(stats['written_bytes'], 1):.1f}x) "
+            f"in {stats['seconds']:.2f} s on the writer thread(s)"
+        )
+    memory = engine.memory.stats
+    if not args.isolate:
+        # Isolated documents are governed inside the worker process
+        logging.info(
+            f"Memory: peak {memory['peak_mb']:.0f} MB RSS, MuPDF cache emptied {memory['trims']} time(s), "
+            f"{memory['freed_mb']:.0f} MB returned"
+        )
+    recorder.end_batch()
+    log_schedule_summary(scheduler)
+    if recorder.enabled:
+        logging.info("Extraction performance summary:\n%s", recorder.summary())
+    else:
+        logging.info("Pipeline utilization:\n%s", format_pipeline_utilization(utilization))
+    return 1 if failures else 0
+
+def headless_engine_settings(args, input_root=None):
+    """Engine settings for the worker processes of watch and service mode."""
+    return {
+        "output_path": args.output,
+        "extraction_mode": args.mode,
+        "output_format": args.format,
+        "page_selection": args.page_selection,
+        "use_cache": args.use_cache,
+        "ocr": args.ocr_settings,
+        "layout": args.layout_settings,
+        "strip_boilerplate": args.strip_boilerplate,
+        "normalize": args.normalize_settings,
+        "output_layout": args.output_layout,
+        "input_root": input_root,
+        "compression": args.compression_settings,
+        "use_mmap": args.mmap,
+        "memory": args.memory_settings,
+        "timeout": args.timeout
+    }
+
+def run_headless_watch(args):
+    app = QCoreApplication(sys.argv)
+    service = WatchFolderService(
+        args.watch,
+        headless_engine_settings(args, args.watch),
+        max_workers=args.workers,
+        recursive=args.recursive,
+        poll_interval=args.poll_interval,
+        settle_seconds=args.settle,
+        use_notifications=not args.poll
+    )
+    service.document_failed.connect(lambda pdf_path, message: logging.error(f"Extraction failed for {pdf_path}: {message}"))
+    signal.signal(signal.SIGINT, lambda *_: app.quit())
+    signal.signal(signal.SIGTERM, lambda *_: app.quit())
+    # Give the Python interpreter a chance to run signal handlers while Qt's loop is idle
+    keep_alive = QTimer()
+    keep_alive.timeout.connect(lambda: None)
+    keep_alive.start(250)
+    service.start()
+    exit_code = app.exec()
+    service.stop()
+    return exit_code
+
+def run_headless_serve(args):
+    service = ExtractionService(
+        headless_engine_settings(args), args.host, args.port, max_workers=args.workers, max_queue=args.max_queue
+    )
+    signal.signal(signal.SIGINT, lambda *_: service.stop())
+    signal.signal(signal.SIGTERM, lambda *_: service.stop())
+    asyncio.run(service.serve())
+    return 0
 
-    def store_extracted_text(self, pdf_path, text):
-        self.extracted_texts[pdf_path] = text
+def run_headless(args):
+    os.makedirs(args.output, exist_ok=True)
+    if args.serve:
+        return run_headless_serve(args)
+    if args.watch:
+        return run_headless_watch(args)
+    return run_headless_batch(args)
 
 # Main function to run the application
 def main():
+    args = parse_arguments(sys.argv[1:])
     setup_logging()
-    app = QApplication(sys.argv)
+    if args.input or args.watch or args.serve:
+        sys.exit(run_headless(args))
+    app = QApplication(sys.argv[:1] + args.qt_arguments)
     app.setApplicationName("PDF Text Extractor")
     try:
         window = MainWindow()
@@ -0,0 +1,92 @@
+import csv
+import os
+
+import pytest
+
+from pdf_convert import CorpusStatistics
+
+
+def count(statistics, pdf_path, pages):
+    statistics.begin_document()
+    for text in pages:
+        statistics.add_page(text)
+    statistics.end_document(pdf_path)
+
+
+def token_counts(statistics):
+    return {token: statistics.counts[token_id] for token, token_id in statistics.token_ids.items() if statistics.counts[token_id]}
+
+
+def ngram_counts(statistics):
+    return {" ".join(statistics.tokens[token_id] for token_id in statistics.unpack(key)): value for key, value in statistics.ngram_counts.items()}
+
+
+@pytest.mark.parametrize("ngram", [1, 2, 3, 4])
+def test_pack_unpack_round_trip(ngram):
+    statistics = CorpusStatistics(ngram=ngram)
+    token_ids = [0, 1, 2 ** 32 - 1, 12345][:ngram]
+    assert statistics.unpack(statistics.pack(token_ids)) == token_ids
+
+
+def test_rejects_ngrams_that_do_not_fit_the_key():
+    with pytest.raises(ValueError):
+        CorpusStatistics(ngram=5)
+
+
+def test_counts_tokens_and_ngrams_within_pages():
+    statistics = CorpusStatistics(ngram=2)
+    count(statistics, "a.pdf", ["Lorem ipsum lorem", "ipsum dolor"])
+    assert token_counts(statistics) == {"lorem": 2, "ipsum": 2, "dolor": 1}
+    # No "lorem ipsum" across the page boundary
+    assert ngram_counts(statistics) == {"lorem ipsum": 1, "ipsum lorem": 1, "ipsum dolor": 1}
+    assert statistics.documents == [("a.pdf", 5, 3)]
+
+
+def test_unfinished_document_leaves_no_counts():
+    statistics = CorpusStatistics(ngram=2)
+    count(statistics, "a.pdf", ["lorem ipsum"])
+    # Failed, timed out or stopped as a near-duplicate: never reaches end_document
+    statistics.begin_document()
+    statistics.add_page("lorem ipsum lorem ipsum")
+    count(statistics, "b.pdf", ["dolor sit"])
+    assert token_counts(statistics) == {"lorem": 1, "ipsum": 1, "dolor": 1, "sit": 1}
+    assert ngram_counts(statistics) == {"lorem ipsum": 1, "dolor sit": 1}
+    assert [document[0] for document in statistics.documents] == ["a.pdf", "b.pdf"]
+
+
+def test_merge_matches_counting_in_one_instance():
+    pages = {"a.pdf": ["alpha beta gamma", "beta gamma"], "b.pdf": ["gamma delta beta gamma"]}
+    together = CorpusStatistics(ngram=3)
+    for pdf_path, texts in pages.items():
+        count(together, pdf_path, texts)
+    merged = CorpusStatistics(ngram=3)
+    # Interned in a different order, so merge has to remap the packed n-gram keys
+    count(merged, "c.pdf", ["delta"])
+    worker = CorpusStatistics(ngram=3)
+    for pdf_path, texts in pages.items():
+        count(worker, pdf_path, texts)
+    merged.merge(worker.state())
+    expected = token_counts(together)
+    expected["delta"] += 1
+    assert token_counts(merged) == expected
+    assert ngram_counts(merged) == ngram_counts(together)
+
+
+def test_merge_rejects_other_settings():
+    with pytest.raises(ValueError):
+        CorpusStatistics(ngram=2).merge(CorpusStatistics(ngram=3).state())
+
+
+def test_write_tables(tmp_path):
+    statistics = CorpusStatistics(ngram=2)
+    statistics.open_spool(str(tmp_path))
+    count(statistics, "a.pdf", ["It's a test, a test"])
+    summary = statistics.write(str(tmp_path))
+    assert summary.startswith("1 document(s), 5 tokens, 3 types")
+    with open(os.path.join(tmp_path, "tokens.tsv"), encoding="utf-8") as f:
+        rows = list(csv.reader(f, delimiter="\t"))
+    assert rows[0] == ["token", "count", "documents"]
+    assert rows[1:] == [["a", "2", "1"], ["test", "2", "1"], ["it's", "1", "1"]]
+    with open(os.path.join(tmp_path, "2grams.tsv"), encoding="utf-8") as f:
+        assert next(csv.reader(f, delimiter="\t")) == ["ngram", "count"]
+    assert os.path.exists(os.path.join(tmp_path, "document_tokens.tsv"))
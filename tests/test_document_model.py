@@ -0,0 +1,29 @@
+from PySide6.QtCore import Qt
+
+from pdf_convert import DocumentModel
+
+
+def test_add_paths_returns_first_visible_row():
+    model = DocumentModel()
+    assert model.add_paths(["a.pdf", "b.pdf"]) == 0
+    assert model.add_paths(["b.pdf", "c.pdf"]) == 2
+    assert model.rowCount() == 3
+
+
+def test_add_paths_hidden_by_filter_returns_none():
+    model = DocumentModel()
+    model.add_paths(["report.pdf"])
+    model.set_filter("report")
+    assert model.add_paths(["invoice.pdf"]) is None
+    assert model.rowCount() == 1
+    assert model.document_count() == 2
+    model.set_filter("")
+    assert model.rowCount() == 2
+
+
+def test_paths_keep_the_order_documents_were_added():
+    model = DocumentModel()
+    model.add_paths(["b.pdf", "c.pdf", "a.pdf"])
+    model.set_filter("a")
+    model.sort(1, Qt.DescendingOrder)
+    assert model.paths() == ["b.pdf", "c.pdf", "a.pdf"]
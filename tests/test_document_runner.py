@@ -0,0 +1,50 @@
+import fitz
+import pytest
+
+from pdf_convert import DocumentRunner, ExtractionEngine
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = str(tmp_path / "columns.pdf")
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "Left column text", fontname="helv")
+    page.insert_text((320, 72), "Right column text", fontname="helv")
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def failing_engine(tmp_path):
+    engine = ExtractionEngine(str(tmp_path), "Column-aware", "TXT", use_cache=False)
+
+    def gutters_for(page, blocks):
+        raise RuntimeError("gutter analysis blew up")
+
+    engine.layout.gutters_for = gutters_for
+    return engine
+
+
+def test_failed_page_falls_back_to_layout_preserved(tmp_path, pdf_path):
+    engine = failing_engine(tmp_path)
+    runner = DocumentRunner(engine)
+    result = runner.run(pdf_path)
+    assert engine.close() == []
+    assert result["mode"] == "Layout-preserved"
+    assert "gutter analysis blew up" in result["failed_attempts"][0]["error"]
+    assert runner.failures == []
+    with open(result["output_file"], encoding="utf-8") as f:
+        text = f.read()
+    assert "Left column text" in text
+    assert "Error" not in text
+
+
+def test_failed_page_without_retry_is_reported(tmp_path, pdf_path):
+    engine = failing_engine(tmp_path)
+    runner = DocumentRunner(engine, retry=False)
+    assert runner.run(pdf_path) is None
+    engine.close()
+    assert len(runner.failures) == 1
+    error = runner.failures[0]["attempts"][0]["error"]
+    assert error.startswith("PageExtractionError") and "page 1" in error
@@ -0,0 +1,110 @@
+import os
+
+import fitz
+import pytest
+
+from pdf_convert import ExtractionEngine, PageCache, PageExtractionError
+
+
+def build_pdf(pdf_path):
+    """One page of Helvetica text whose font takes its encoding from a separate object; returns that object's xref."""
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "AAA BBB", fontname="helv")
+    font_xref = page.get_fonts()[0][0]
+    encoding_xref = doc.get_new_xref()
+    doc.update_object(encoding_xref, "<</Type/Encoding/BaseEncoding/WinAnsiEncoding/Differences[65/A]>>")
+    doc.xref_set_key(font_xref, "Encoding", f"{encoding_xref} 0 R")
+    doc.save(pdf_path)
+    doc.close()
+    return encoding_xref
+
+
+def replace_file(pdf_path, edit):
+    """Rewrites pdf_path with edit applied to the open document, as a corrected edition would."""
+    doc = fitz.open(pdf_path)
+    edit(doc)
+    data = doc.tobytes()
+    doc.close()
+    modified = os.stat(pdf_path).st_mtime_ns
+    with open(pdf_path, "wb") as f:
+        f.write(data)
+    os.utime(pdf_path, ns=(modified, modified + 10 ** 9))
+
+
+def extract(pdf_path, output_path):
+    engine = ExtractionEngine(output_path, "Column-aware", "TXT")
+    engine.process_document(pdf_path)
+    engine.close()
+    with open(engine.output_file_for(pdf_path), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_edited_font_encoding_is_extracted_again(tmp_path):
+    pdf_path = str(tmp_path / "edition.pdf")
+    output_path = str(tmp_path / "out")
+    os.makedirs(output_path)
+    encoding_xref = build_pdf(pdf_path)
+    assert "AAA BBB" in extract(pdf_path, output_path)
+
+    # Only the indirect encoding changes; the page, its content stream and the font dictionary stay the same
+    replace_file(
+        pdf_path,
+        lambda doc: doc.update_object(encoding_xref, "<</Type/Encoding/BaseEncoding/WinAnsiEncoding/Differences[65/Z]>>")
+    )
+    assert "ZZZ BBB" in extract(pdf_path, output_path)
+
+
+def test_unchanged_page_keeps_its_fingerprint(tmp_path):
+    pdf_path = str(tmp_path / "edition.pdf")
+    build_pdf(pdf_path)
+    with fitz.open(pdf_path) as doc:
+        before = PageCache.fingerprint(doc[0])
+    replace_file(pdf_path, lambda doc: doc.set_metadata({"title": "Corrected edition"}))
+    with fitz.open(pdf_path) as doc:
+        assert PageCache.fingerprint(doc[0]) == before
+
+
+def test_inherited_resources_are_fingerprinted(tmp_path):
+    pdf_path = str(tmp_path / "edition.pdf")
+    encoding_xref = build_pdf(pdf_path)
+
+    def inherit(doc):
+        # Moves the page's resources up to the page tree root
+        page_xref = doc[0].xref
+        root_xref = int(doc.xref_get_key(page_xref, "Parent")[1].split()[0])
+        doc.xref_set_key(root_xref, "Resources", doc.xref_get_key(page_xref, "Resources")[1])
+        doc.xref_set_key(page_xref, "Resources", "null")
+
+    replace_file(pdf_path, inherit)
+    with fitz.open(pdf_path) as doc:
+        assert doc.xref_get_key(doc[0].xref, "Resources")[0] == "null"
+        before = PageCache.fingerprint(doc[0])
+    replace_file(
+        pdf_path,
+        lambda doc: doc.update_object(encoding_xref, "<</Type/Encoding/BaseEncoding/WinAnsiEncoding/Differences[65/Z]>>")
+    )
+    with fitz.open(pdf_path) as doc:
+        assert PageCache.fingerprint(doc[0]) != before
+
+
+def test_failed_page_is_not_cached(tmp_path):
+    pdf_path = str(tmp_path / "edition.pdf")
+    output_path = str(tmp_path / "out")
+    os.makedirs(output_path)
+    build_pdf(pdf_path)
+    engine = ExtractionEngine(output_path, "Column-aware", "TXT")
+
+    def gutters_for(page, blocks):
+        raise RuntimeError("gutter analysis blew up")
+
+    engine.layout.gutters_for = gutters_for
+    with pytest.raises(PageExtractionError):
+        engine.process_document(pdf_path)
+    engine.close()
+
+    engine = ExtractionEngine(output_path, "Column-aware", "TXT")
+    result = engine.process_document(pdf_path)
+    engine.close()
+    assert result["cached_pages"] == 0
+    assert "AAA BBB" in result["page_texts"][0][1]
@@ -0,0 +1,82 @@
+import pytest
+
+from pdf_convert import PageSelection, parse_arguments
+
+
+@pytest.mark.parametrize("spec, pages", [
+    ("1-3", [0, 1, 2]),
+    ("2,5", [1, 4]),
+    ("1-2, 4", [0, 1, 3]),
+    ("-2", [8]),
+    ("-3--2", [7, 8]),
+    ("8-", [7, 8, 9]),
+    ("-1", [9]),
+    ("3--8", [2]),
+    ("4--8", []),
+    ("9-12", [8, 9]),
+    ("2-3,3-4", [1, 2, 3]),
+])
+def test_ranges(spec, pages):
+    assert PageSelection("ranges", spec).pages(10) == pages
+
+
+def test_range_counted_from_both_ends_depends_on_length():
+    selection = PageSelection("ranges", "2--2")
+    assert selection.pages(5) == [1, 2, 3]
+    assert selection.pages(2) == []
+
+
+@pytest.mark.parametrize("spec", ["5-1", "-1--3", "0", "1-0", "a-b", "1-2-3", "", " , "])
+def test_invalid_ranges(spec):
+    with pytest.raises(ValueError):
+        PageSelection("ranges", spec)
+
+
+def test_reversed_range_names_the_fix():
+    with pytest.raises(ValueError, match="use 1-5"):
+        PageSelection.parse_ranges("5-1")
+
+
+@pytest.mark.parametrize("sample, page_count, pages", [
+    ("first:3", 10, [0, 1, 2]),
+    ("first:30", 4, [0, 1, 2, 3]),
+    ("every:4", 10, [0, 4, 8]),
+    ("every:1", 3, [0, 1, 2]),
+])
+def test_samples(sample, page_count, pages):
+    args = parse_arguments(["--input", "in", "--output", "out", "--sample", sample])
+    assert args.page_selection.pages(page_count) == pages
+
+
+def test_random_sample_is_reproducible():
+    first = parse_arguments(["--input", "in", "--output", "out", "--sample", "random:5", "--seed", "7"])
+    again = parse_arguments(["--input", "in", "--output", "out", "--sample", "random:5", "--seed", "7"])
+    pages = first.page_selection.pages(100)
+    assert pages == again.page_selection.pages(100)
+    assert len(pages) == 5 and pages == sorted(set(pages))
+    assert first.page_selection.pages(3) == [0, 1, 2]
+
+
+@pytest.mark.parametrize("sample", ["first:0", "every:x", "random:", "last:3", "first"])
+def test_invalid_samples(sample):
+    with pytest.raises(SystemExit):
+        parse_arguments(["--input", "in", "--output", "out", "--sample", sample])
+
+
+def test_pages_option():
+    args = parse_arguments(["--input", "in", "--output", "out", "--pages", "1-2,-1"])
+    assert args.page_selection.pages(5) == [0, 1, 4]
+    with pytest.raises(SystemExit):
+        parse_arguments(["--input", "in", "--output", "out", "--pages", "5-1"])
+
+
+@pytest.mark.parametrize("mode", [["--input", "in"], ["--watch", "in"], ["--serve"]])
+def test_headless_rejects_misspelled_options(mode):
+    with pytest.raises(SystemExit):
+        parse_arguments(mode + ["--output", "out", "--compresion", "gzip", "--pagse", "1-2"])
+
+
+def test_gui_passes_only_unknown_arguments_to_qt():
+    args = parse_arguments(["--mode", "Layout-preserved", "-style", "fusion"])
+    assert args.qt_arguments == ["-style", "fusion"]
+    assert args.mode == "Layout-preserved"
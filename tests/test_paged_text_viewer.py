@@ -0,0 +1,66 @@
+import pytest
+from PySide6.QtWidgets import QApplication
+
+from pdf_convert import PagedTextViewer
+
+
+@pytest.fixture
+def viewer():
+    app = QApplication.instance() or QApplication([])
+    viewer = PagedTextViewer()
+    yield viewer
+    viewer.deleteLater()
+    app.processEvents()
+
+
+def math_pages(count):
+    # 𝑥, 𝑦 and 𝑧 lie outside the BMP, so each takes two positions in a QTextDocument
+    return [(page_num, f"page {page_num + 1} solves 𝑥 = 𝑦𝑧 twice: 𝑥𝑥") for page_num in range(count)]
+
+
+def slide(viewer, slide_page, times):
+    # As on_scroll does, so the scroll bar moving under the slide does not slide again
+    viewer.sliding = True
+    try:
+        for _ in range(times):
+            slide_page()
+    finally:
+        viewer.sliding = False
+
+
+def window_text(viewer):
+    return "".join(viewer.render_page(index) for index in range(viewer.window_start, viewer.window_end))
+
+
+def test_sliding_keeps_whole_pages_with_non_bmp_text(viewer):
+    viewer.set_pages(math_pages(20))
+    slide(viewer, viewer.slide_forward, 10)
+    assert (viewer.window_start, viewer.window_end) == (10, 16)
+    assert viewer.editor.toPlainText() == window_text(viewer)
+    slide(viewer, viewer.slide_backward, 5)
+    assert (viewer.window_start, viewer.window_end) == (5, 11)
+    assert viewer.editor.toPlainText() == window_text(viewer)
+
+
+def test_select_match_after_non_bmp_text(viewer):
+    viewer.set_pages(math_pages(20))
+    slide(viewer, viewer.slide_forward, 10)
+    match = viewer.find_all("page 12 solves")[0]
+    viewer.select_match(match)
+    assert viewer.editor.textCursor().selectedText() == "page 12 solves"
+    match = viewer.find_all("twice: 𝑥𝑥")[15]
+    viewer.select_match(match)
+    assert viewer.editor.textCursor().selectedText() == "twice: 𝑥𝑥"
+
+
+def test_streamed_pages_with_non_bmp_text(viewer):
+    pages = math_pages(20)
+    for page in pages[:3]:
+        viewer.append_pages([page])
+    viewer.append_pages(pages[3:20])
+    assert (viewer.window_start, viewer.window_end) == (0, 6)
+    slide(viewer, viewer.slide_forward, 10)
+    assert viewer.editor.toPlainText() == window_text(viewer)
+    match = viewer.find_all("page 14 solves")[0]
+    viewer.select_match(match)
+    assert viewer.editor.textCursor().selectedText() == "page 14 solves"
@@ -0,0 +1,38 @@
+import fitz
+
+from pdf_convert import ExtractionScheduler
+
+
+def build_pdfs(tmp_path, page_counts):
+    paths = []
+    for number, page_count in enumerate(page_counts):
+        path = str(tmp_path / f"doc{number}.pdf")
+        doc = fitz.open()
+        for _ in range(page_count):
+            doc.new_page()
+        doc.save(path)
+        doc.close()
+        paths.append(path)
+    return paths
+
+
+def test_counted_pages_order_the_batch(tmp_path):
+    paths = build_pdfs(tmp_path, [5, 1, 3])
+    scheduler = ExtractionScheduler(paths)
+    scheduler.estimate(background=False)
+    assert [scheduler.costs[path] for path in paths] == [5, 1, 3]
+    assert [scheduler.next() for _ in paths] == [paths[1], paths[2], paths[0]]
+
+
+def test_stopped_scheduler_counts_no_further_documents(tmp_path):
+    paths = build_pdfs(tmp_path, [5, 1, 3])
+    scheduler = ExtractionScheduler(paths)
+
+    # Stands in for a batch ending while the first document is being counted
+    class StopWhileCounting:
+        def pages(self, page_count):
+            scheduler.stop()
+            return list(range(page_count))
+
+    scheduler.count_pages(StopWhileCounting())
+    assert scheduler.costs == {paths[0]: 5}